@@ -0,0 +1,305 @@
+"""
+Prefix autocomplete for /suggestions
+Sorted-array prefix index over temple names, places, deities and popular queries, with precomputed top-k
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from embeddings import normalize_query_text
+from temple_data import catalog
+
+# Completions precomputed per prefix and the most /suggestions will return
+SUGGEST_TOP_K = 10
+# Prefixes matching more entries than this get their top-k precomputed; smaller ranges are ranked per call
+PRECOMPUTE_THRESHOLD = 256
+# A logged query becomes a suggestion once it has been asked this many times
+SUGGEST_MIN_QUERY_COUNT = float(os.environ.get('TEMPLE_SUGGEST_MIN_QUERY_COUNT', '5'))
+# Logged query counts halve over this many hours, so queries nobody asks any more drop out
+SUGGEST_QUERY_HALF_LIFE_HOURS = float(os.environ.get('TEMPLE_SUGGEST_QUERY_HALF_LIFE_HOURS', '24'))
+# Distinct logged queries kept; the least asked half is dropped when this is exceeded
+MAX_LOGGED_QUERIES = 10000
+# Seconds between rebuilds of the popular query index
+QUERY_INDEX_REFRESH_SECONDS = 5.0
+# The popular query index is rebuilt at least this often, to apply decay and catalog changes
+QUERY_INDEX_MAX_AGE_SECONDS = 600.0
+# Decayed counts below this are forgotten
+MIN_KEPT_QUERY_COUNT = 0.5
+
+# Ranking weights per source, so curated and popular queries outrank single temple names
+CURATED_WEIGHT = 1000.0
+QUERY_WEIGHT = 10.0
+FACET_WEIGHT = 2.0
+NAME_WEIGHT = 1.0
+
+# Shown for an empty prefix and ranked above every other source
+CURATED_SUGGESTIONS = [
+    "Shiva temples in Tamil Nadu",
+    "Ancient temples in North India",
+    "Famous Vishnu temples",
+    "Heritage temples in Gujarat",
+    "Pilgrimage sites in Uttarakhand",
+    "Dravidian architecture temples",
+    "Jyotirlinga temples",
+    "UNESCO World Heritage temples",
+    "Medieval period temples",
+    "Sun temples in India"
+]
+
+# Sorts after any character that appears in a normalized key
+_MAX_CHAR = '\U0010ffff'
+
+def word_suffixes(text: str) -> List[str]:
+    """Text and every tail of it that starts at a word, so completions match mid-phrase words"""
+    words = text.split()
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+class PrefixIndex:
+    """
+    Immutable prefix index: (key, suggestion) pairs sorted by key with a score per pair
+    A prefix maps to a contiguous key range found by binary search; ranges larger than
+    precompute_threshold have their best entries stored up front, so every lookup costs
+    two bisections plus ranking at most precompute_threshold scores
+    """
+    
+    def __init__(self, entries: Iterable[Tuple[str, str, float]], top_k: int = SUGGEST_TOP_K,
+                 precompute_threshold: int = PRECOMPUTE_THRESHOLD):
+        best: Dict[Tuple[str, str], float] = {}
+        for key, suggestion, score in entries:
+            key = normalize_query_text(key)
+            if key and best.get((key, suggestion), -1.0) < score:
+                best[(key, suggestion)] = score
+        
+        items = sorted(best.items())
+        self.keys = [key for (key, _), _ in items]
+        self.suggestions = [suggestion for (_, suggestion), _ in items]
+        self.scores = np.fromiter((score for _, score in items), dtype=np.float64, count=len(items))
+        # Keep extra candidates so several keys pointing at one suggestion still fill top_k
+        self.top_k = top_k
+        self._candidates = 2 * top_k
+        self.precompute_threshold = max(precompute_threshold, self._candidates)
+        self._top: Dict[str, np.ndarray] = {}
+        self._precompute()
+    
+    def __len__(self):
+        return len(self.keys)
+    
+    def _rank(self, lo: int, hi: int, count: int) -> np.ndarray:
+        """Positions of the count best scores in keys[lo:hi], best first, ties in key order"""
+        scores = self.scores[lo:hi]
+        if len(scores) > count:
+            keep = np.argpartition(-scores, count - 1)[:count]
+            order = keep[np.lexsort((keep, -scores[keep]))]
+        else:
+            order = np.argsort(-scores, kind='stable')
+        return lo + order
+    
+    def _precompute(self):
+        """Store top candidates for every prefix whose key range exceeds the threshold"""
+        keys = self.keys
+        pending = [(0, len(keys), 0)]
+        while pending:
+            lo, hi, depth = pending.pop()
+            if hi - lo <= self.precompute_threshold:
+                continue
+            self._top[keys[lo][:depth]] = self._rank(lo, hi, self._candidates)
+            
+            # Split the range by the character at this depth; keys that end here sort first
+            i = lo
+            while i < hi and len(keys[i]) <= depth:
+                i += 1
+            while i < hi:
+                prefix = keys[i][:depth + 1]
+                end = bisect_left(keys, prefix + _MAX_CHAR, i, hi)
+                pending.append((i, end, depth + 1))
+                i = end
+    
+    def complete(self, prefix: str, limit: int = SUGGEST_TOP_K) -> List[Tuple[str, float]]:
+        """Best distinct suggestions whose key starts with prefix, with their scores"""
+        prefix = normalize_query_text(prefix)
+        limit = min(limit, self.top_k)
+        positions = self._top.get(prefix)
+        if positions is None:
+            lo = bisect_left(self.keys, prefix)
+            hi = bisect_left(self.keys, prefix + _MAX_CHAR, lo)
+            positions = self._rank(lo, hi, self._candidates)
+        
+        completions = []
+        seen = set()
+        for position in positions:
+            suggestion = self.suggestions[position]
+            if suggestion not in seen:
+                seen.add(suggestion)
+                completions.append((suggestion, float(self.scores[position])))
+                if len(completions) == limit:
+                    break
+        return completions
+
+def catalog_entries(temples: Iterable[Dict], curated: List[str]) -> Iterable[Tuple[str, str, float]]:
+    """Index entries for curated queries, temple names and facet values weighted by temple count"""
+    for rank, suggestion in enumerate(curated):
+        for key in word_suffixes(suggestion):
+            yield key, suggestion, CURATED_WEIGHT - rank
+    
+    deities, cities, states = Counter(), Counter(), Counter()
+    for temple in temples:
+        yield temple['name'], temple['name'], NAME_WEIGHT
+        deities[temple['deity']] += 1
+        cities[temple['city']] += 1
+        states[temple['state']] += 1
+    
+    for deity, count in deities.items():
+        yield deity, f"{deity} temples", FACET_WEIGHT * count
+    for places in (cities, states):
+        for place, count in places.items():
+            yield place, f"Temples in {place}", FACET_WEIGHT * count
+
+class AutocompleteEngine:
+    """
+    Serves completions from a catalog index and a popular query index
+    Both are built by warm_up and then rebuilt off the request path when the catalog changes or new
+    queries are logged. Logging a query only counts it; the rebuild checks every popular query with
+    accept_query, so a query that stops matching the catalog stops being suggested
+    """
+    
+    def __init__(self, curated: List[str], accept_query: Optional[Callable[[str], bool]] = None):
+        self.curated = curated
+        self.accept_query = accept_query
+        self.query_counts = Counter()
+        # Normalized key -> the query as first asked, which is what gets suggested
+        self.display_forms: Dict[str, str] = {}
+        self._decayed_at = time.monotonic()
+        self._catalog_index: Optional[PrefixIndex] = None
+        self._catalog_version = None
+        self._query_index = PrefixIndex([])
+        self._queries_dirty = False
+        # The empty index counts as built now, so the first suggestion does not start a rebuild
+        self._query_index_built_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._refreshing = False
+    
+    @property
+    def ready(self) -> bool:
+        """Whether suggest can answer without building the catalog index first"""
+        return self._catalog_index is not None
+    
+    def warm_up(self):
+        """Build both indexes on the calling thread, so the first suggestion starts no rebuild"""
+        with self._lock:
+            self._build_catalog_index()
+        self._build_query_index()
+    
+    def record_query(self, query: str):
+        """
+        Count a query that returned results, so popular ones become suggestions
+        Cheap enough for the event loop: accept_query runs when the query index is rebuilt
+        """
+        key = normalize_query_text(query)
+        if not key:
+            return
+        with self._lock:
+            self.query_counts[key] += 1
+            self.display_forms.setdefault(key, ' '.join(query.split()))
+            self._queries_dirty = True
+            if len(self.query_counts) > MAX_LOGGED_QUERIES:
+                self.query_counts = Counter(dict(self.query_counts.most_common(MAX_LOGGED_QUERIES // 2)))
+                self._forget_display_forms()
+    
+    def _forget_display_forms(self):
+        """Drop display forms of queries no longer counted; callers hold the lock"""
+        self.display_forms = {key: self.display_forms[key] for key in self.query_counts if key in self.display_forms}
+    
+    def _build_catalog_index(self):
+        version = catalog.version
+        index = PrefixIndex(catalog_entries(catalog.all(), self.curated))
+        self._catalog_index, self._catalog_version = index, version
+    
+    def _decay_counts(self):
+        """Scale counts down by the time since the last decay, at most once per max age; callers hold the lock"""
+        now = time.monotonic()
+        if now - self._decayed_at < QUERY_INDEX_MAX_AGE_SECONDS:
+            return
+        factor = 0.5 ** ((now - self._decayed_at) / (SUGGEST_QUERY_HALF_LIFE_HOURS * 3600))
+        self._decayed_at = now
+        self.query_counts = Counter({
+            query: count * factor for query, count in self.query_counts.items() if count * factor >= MIN_KEPT_QUERY_COUNT
+        })
+        self._forget_display_forms()
+    
+    def _build_query_index(self):
+        with self._lock:
+            self._decay_counts()
+            popular = [(query, self.display_forms.get(query, query), count)
+                       for query, count in self.query_counts.items() if count >= SUGGEST_MIN_QUERY_COUNT]
+            self._queries_dirty = False
+        if self.accept_query is not None:
+            popular = [entry for entry in popular if self.accept_query(entry[0])]
+        entries = ((key, display, QUERY_WEIGHT * count)
+                   for query, display, count in popular for key in word_suffixes(query))
+        self._query_index = PrefixIndex(entries)
+        self._query_index_built_at = time.monotonic()
+    
+    def _refresh(self):
+        """Build the catalog index on first use; afterwards rebuild stale indexes in the background"""
+        if self._catalog_index is None:
+            with self._lock:
+                if self._catalog_index is None:
+                    self._build_catalog_index()
+        
+        catalog_stale = catalog.version != self._catalog_version
+        index_age = time.monotonic() - self._query_index_built_at
+        # A catalog change can turn logged queries into ones accept_query rejects, so recheck them too
+        queries_stale = (catalog_stale or index_age > QUERY_INDEX_MAX_AGE_SECONDS
+                         or (self._queries_dirty and index_age > QUERY_INDEX_REFRESH_SECONDS))
+        if not (catalog_stale or queries_stale):
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._rebuild, args=(catalog_stale, queries_stale), name='autocomplete-rebuild',
+                         daemon=True).start()
+    
+    def _rebuild(self, catalog_stale: bool, queries_stale: bool):
+        try:
+            if catalog_stale:
+                self._build_catalog_index()
+            if queries_stale:
+                self._build_query_index()
+        finally:
+            self._refreshing = False
+    
+    def _after_fork(self):
+        """A forked child has no rebuild thread, so nothing it inherited may claim one is running"""
+        self._lock = threading.Lock()
+        self._refreshing = False
+    
+    def suggest(self, partial_query: Optional[str], limit: int = 5) -> List[str]:
+        """Ranked completions for a partial query; the curated list when there is nothing to complete"""
+        self._refresh()
+        if not partial_query or not partial_query.strip():
+            return self.curated[:limit]
+        
+        completions = self._catalog_index.complete(partial_query, limit) + self._query_index.complete(partial_query, limit)
+        completions.sort(key=lambda completion: -completion[1])
+        # A popular query may repeat a catalog suggestion in other case; the higher-ranked one is kept
+        distinct = {}
+        for suggestion, _ in completions:
+            distinct.setdefault(suggestion.casefold(), suggestion)
+        suggestions = list(distinct.values())[:limit]
+        return suggestions or self.curated[:limit]
+
+# Global autocomplete engine
+autocomplete = AutocompleteEngine(CURATED_SUGGESTIONS)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=autocomplete._after_fork)
+
+def record_query(query: str):
+    """Log a successful query for popular-query suggestions"""
+    autocomplete.record_query(query)
@@ -0,0 +1,5 @@
+"""
+Benchmarks for the TempleSeeker AI search backend
+Run modules from the backend directory, e.g. `python -m benchmarks.bench_startup`
+`python -m benchmarks.suite` runs the main scenarios and writes JSON for comparing commits
+"""
@@ -0,0 +1,81 @@
+"""
+Approximate index benchmark: latency, memory and recall@k of each index type against flat
+
+    python -m benchmarks.bench_ann --temples 500000 --queries 500
+"""
+
+import argparse
+import random
+import time
+
+import faiss
+import numpy as np
+
+from benchmarks.synthetic import FILLER_WORDS, generate_temples
+from vector_store import TempleVectorStore
+
+# Query-time settings swept for each approximate index type
+SWEEPS = {
+    'flat': [{}],
+    'ivf': [{'nprobe': n} for n in (1, 4, 16, 64)],
+    'hnsw': [{'ef_search': ef} for ef in (16, 64, 256)],
+    'ivfpq': [{'nprobe': n} for n in (4, 16, 64)],
+}
+
+def generate_queries(temples, count: int, seed: int = 1):
+    """Short natural-language queries built from random temples' facets"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        temple = rng.choice(temples)
+        queries.append(f"{temple['deity']} temple {temple['city']} {rng.choice(FILLER_WORDS)}")
+    return queries
+
+def run_queries(store: TempleVectorStore, query_vectors: np.ndarray, k: int):
+    """Search one query at a time, returning result ids and per-query latencies in ms"""
+    ids = np.empty((len(query_vectors), k), dtype=np.int64)
+    latencies = np.empty(len(query_vectors))
+    for i, vector in enumerate(query_vectors):
+        start = time.perf_counter()
+        _, ids[i] = store.index.search(vector.reshape(1, -1), k)
+        latencies[i] = (time.perf_counter() - start) * 1000
+    return ids, latencies
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    """Fraction of the exact top-k neighbours recovered, averaged over queries"""
+    hits = sum(len(set(row) & set(expected)) for row, expected in zip(found, truth))
+    return hits / truth.size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--temples', type=int, default=200000, help='Synthetic corpus size')
+    parser.add_argument('--queries', type=int, default=500, help='Number of benchmark queries')
+    parser.add_argument('--k', type=int, default=10, help='Neighbours per query')
+    parser.add_argument('--types', default=','.join(SWEEPS), help='Comma-separated index types')
+    args = parser.parse_args()
+    
+    faiss.omp_set_num_threads(1)  # Single-query latency, not intra-query parallelism
+    temples = generate_temples(args.temples)
+    queries = generate_queries(temples, args.queries)
+    truth = None
+    
+    print(f"{'index':>6} {'setting':>14} {'build s':>8} {'MB':>8} {'p50 ms':>8} {'p99 ms':>8} {'recall@' + str(args.k):>9}")
+    for index_type in ['flat'] + [t for t in args.types.split(',') if t != 'flat']:
+        start = time.perf_counter()
+        store = TempleVectorStore(temples=temples, index_type=index_type)
+        build_seconds = time.perf_counter() - start
+        memory_mb = faiss.serialize_index(store.index).nbytes / 2**20
+        query_vectors = np.vstack([store.embedding_model.embed_query(q) for q in queries])
+        
+        for setting in SWEEPS[index_type]:
+            store.configure_search(**setting)
+            ids, latencies = run_queries(store, query_vectors, args.k)
+            if truth is None:
+                truth = ids  # The flat index runs first and defines exact neighbours
+            label = ','.join(f"{key}={value}" for key, value in setting.items()) or 'exact'
+            print(f"{index_type:>6} {label:>14} {build_seconds:8.2f} {memory_mb:8.1f} "
+                  f"{np.percentile(latencies, 50):8.3f} {np.percentile(latencies, 99):8.3f} "
+                  f"{recall_at_k(ids, truth):9.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Autocomplete benchmark: build time and per-keystroke lookup latency of the prefix index
+
+    python -m benchmarks.bench_autocomplete --temples 1000000
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from autocomplete import CURATED_SUGGESTIONS, PrefixIndex, catalog_entries
+from benchmarks.synthetic import generate_temples
+
+def keystroke_prefixes(temples, count: int, seed: int = 2):
+    """Prefixes a user would type on the way to a random temple name, city or state"""
+    rng = random.Random(seed)
+    prefixes = []
+    while len(prefixes) < count:
+        temple = rng.choice(temples)
+        target = temple[rng.choice(('name', 'city', 'state'))]
+        prefixes.extend(target[:length] for length in range(1, min(len(target), 12) + 1))
+    return prefixes[:count]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--temples', type=int, default=1000000, help='Synthetic catalog size')
+    parser.add_argument('--lookups', type=int, default=100000, help='Number of prefix lookups')
+    parser.add_argument('--limit', type=int, default=5, help='Completions per lookup')
+    args = parser.parse_args()
+    
+    temples = generate_temples(args.temples)
+    start = time.perf_counter()
+    index = PrefixIndex(catalog_entries(temples, CURATED_SUGGESTIONS))
+    build_seconds = time.perf_counter() - start
+    print(f"Indexed {len(index)} keys from {args.temples} temples in {build_seconds:.2f}s "
+          f"({len(index._top)} prefixes with precomputed top-k)")
+    
+    prefixes = keystroke_prefixes(temples, args.lookups)
+    latencies = np.empty(len(prefixes))
+    for i, prefix in enumerate(prefixes):
+        start = time.perf_counter()
+        index.complete(prefix, args.limit)
+        latencies[i] = (time.perf_counter() - start) * 1e6
+    print(f"lookup p50 {np.percentile(latencies, 50):.1f} us, p99 {np.percentile(latencies, 99):.1f} us, "
+          f"max {latencies.max():.1f} us")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Batch query benchmark: per-query cost of one-at-a-time searches versus batched searches
+
+    python -m benchmarks.bench_batch_queries --temples 100000 --batch 32
+"""
+
+import argparse
+import time
+
+import faiss
+
+from benchmarks.bench_ann import generate_queries
+from benchmarks.synthetic import generate_temples
+from vector_store import TempleVectorStore
+
+def time_per_query(fn, batches, repeats: int) -> float:
+    """Best-of-repeats wall time per query in ms for fn applied to each batch"""
+    best = float('inf')
+    total_queries = sum(len(batch) for batch in batches)
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for batch in batches:
+            fn(batch)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000 / total_queries
+
+def bench_store(store: TempleVectorStore, batches, repeats: int):
+    """Compare a search() loop against search_batch() on the store itself"""
+    loop_ms = time_per_query(lambda batch: [store.search(q, 5) for q in batch], batches, repeats)
+    batch_ms = time_per_query(lambda batch: store.search_batch(batch, top_ks=[5] * len(batch)), batches, repeats)
+    print(f"{'store':>8} {loop_ms:12.3f} {batch_ms:12.3f} {loop_ms / batch_ms:8.1f}x")
+
+def bench_http(batches, repeats: int):
+    """Compare N POSTs to /query against one POST to /query/batch through the ASGI stack"""
+    from fastapi.testclient import TestClient
+    from main import app
+    
+    client = TestClient(app)
+    single = lambda batch: [client.post('/query', json={'query': q}) for q in batch]
+    batched = lambda batch: client.post('/query/batch', json={'queries': [{'query': q} for q in batch]})
+    loop_ms = time_per_query(single, batches, repeats)
+    batch_ms = time_per_query(batched, batches, repeats)
+    print(f"{'http':>8} {loop_ms:12.3f} {batch_ms:12.3f} {loop_ms / batch_ms:8.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--temples', type=int, default=100000, help='Synthetic corpus size for the store benchmark')
+    parser.add_argument('--queries', type=int, default=512, help='Number of benchmark queries')
+    parser.add_argument('--batch', type=int, default=32, help='Queries per batch')
+    parser.add_argument('--repeats', type=int, default=3, help='Timed repetitions, best one reported')
+    parser.add_argument('--skip-http', action='store_true', help='Only benchmark the store')
+    args = parser.parse_args()
+    
+    faiss.omp_set_num_threads(1)
+    temples = generate_temples(args.temples)
+    store = TempleVectorStore(temples=temples, index_type='flat')
+    queries = generate_queries(temples, args.queries)
+    batches = [queries[i:i + args.batch] for i in range(0, len(queries), args.batch)]
+    
+    print(f"{'layer':>8} {'loop ms/q':>12} {'batch ms/q':>12} {'speedup':>9}")
+    bench_store(store, batches, args.repeats)
+    if not args.skip_http:
+        # Uses the app's own store (TEMPLE_INDEX_DIR or the built-in dataset)
+        bench_http(batches, args.repeats)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+BM25 benchmark: top-k latency for name lookups and facet-style queries, against a per-query scratch scorer
+
+    python -m benchmarks.bench_bm25 --temples 1000000 --queries 500
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_ann import generate_queries
+from benchmarks.synthetic import generate_temples
+from bm25_index import BM25Index, tokenize
+from temple_data import get_temple_text_for_embedding
+
+def scratch_search(index: BM25Index, query: str, top_k: int):
+    """Score every posting into a freshly allocated float64 array, then take the top k"""
+    terms = {index.vocab[token] for token in tokenize(query) if token in index.vocab}
+    scores = np.zeros(len(index), dtype=np.float64)
+    for term in terms:
+        start, end = index.offsets[term], index.offsets[term + 1]
+        scores[index.doc_rows[start:end]] += index.impacts[start:end]
+    best = np.argpartition(-scores, top_k - 1)[:top_k]
+    return index.ids[best[np.argsort(-scores[best])]]
+
+def time_queries(fn, queries):
+    latencies = np.empty(len(queries))
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        fn(query)
+        latencies[i] = (time.perf_counter() - start) * 1000
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--temples', type=int, default=1000000, help='Synthetic corpus size')
+    parser.add_argument('--queries', type=int, default=500, help='Number of benchmark queries')
+    parser.add_argument('--k', type=int, default=20, help='Results per query')
+    args = parser.parse_args()
+    
+    temples = generate_temples(args.temples)
+    start = time.perf_counter()
+    index = BM25Index((temple['id'] for temple in temples), map(get_temple_text_for_embedding, temples))
+    print(f"Indexed {len(index)} temples, {len(index.vocab)} terms, {len(index.impacts)} postings "
+          f"({index.nbytes / 2**20:.1f} MB) in {time.perf_counter() - start:.1f}s")
+    
+    # Name lookups are the case lexical retrieval is for; facet-style queries touch most postings
+    workloads = {
+        'facet': generate_queries(temples, args.queries // 2),
+        'name': [temples[i]['name'] for i in np.random.default_rng(3).integers(0, len(temples), args.queries // 2)],
+    }
+    for workload, queries in workloads.items():
+        for name, fn in (('index', lambda q: index.search(q, args.k)),
+                         ('scratch', lambda q: scratch_search(index, q, args.k))):
+            p50, p99 = time_queries(fn, queries)
+            print(f"{workload:>6} {name:>8}: p50 {p50:7.3f} ms  p99 {p99:7.3f} ms")
+
+if __name__ == '__main__':
+    main()
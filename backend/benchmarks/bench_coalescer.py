@@ -0,0 +1,65 @@
+"""
+Micro-batching benchmark: throughput and latency of coalesced vector searches per batching window
+Concurrent asyncio clients submit queries through a MicroBatcher backed by a synthetic store
+
+    python -m benchmarks.bench_coalescer --temples 100000 --clients 64 --windows 0,1,2,5
+"""
+
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from benchmarks.bench_ann import generate_queries
+from benchmarks.synthetic import generate_temples
+from search_batcher import MicroBatcher
+from search_pool import SearchPool
+from vector_store import TempleVectorStore
+
+async def client(batcher: MicroBatcher, queries, deadline: float, latencies):
+    """One simulated caller issuing searches back to back"""
+    i = 0
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        await batcher.submit(queries[i % len(queries)])
+        latencies.append((time.perf_counter() - start) * 1000)
+        i += 1
+
+async def run_window(store: TempleVectorStore, queries, window_ms: float, max_batch: int,
+                     clients: int, duration: float):
+    # Room for every client in the queue: this measures batching, not load shedding
+    pool = SearchPool(queue_depth=clients)
+    batcher = MicroBatcher(
+        lambda batch: store.search_batch(batch, top_ks=[5] * len(batch)), window_ms, max_batch, pool
+    )
+    latencies = []
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*[client(batcher, queries[c::clients], deadline, latencies) for c in range(clients)])
+    pool.shutdown()
+    return latencies, batcher.stats()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--temples', type=int, default=100000, help='Synthetic corpus size')
+    parser.add_argument('--clients', type=int, default=64, help='Concurrent callers')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per window setting')
+    parser.add_argument('--windows', default='0,1,2,5', help='Comma-separated batching windows in ms')
+    parser.add_argument('--max-batch', type=int, default=32, help='Largest batch sent to the index')
+    args = parser.parse_args()
+    
+    temples = generate_temples(args.temples)
+    store = TempleVectorStore(temples=temples, index_type='flat')
+    # Distinct queries so the embedding cache does not hide the embedding cost
+    queries = generate_queries(temples, 50000)
+    
+    print(f"{'window ms':>9} {'queries/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'mean batch':>11}")
+    for window in args.windows.split(','):
+        latencies, stats = asyncio.run(
+            run_window(store, queries, float(window), args.max_batch, args.clients, args.duration)
+        )
+        print(f"{window:>9} {len(latencies) / args.duration:10.1f} {np.percentile(latencies, 50):8.2f} "
+              f"{np.percentile(latencies, 99):8.2f} {stats['mean_batch_size']:11.2f}")
+
+if __name__ == '__main__':
+    main()
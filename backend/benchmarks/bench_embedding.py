@@ -0,0 +1,87 @@
+"""
+Embedding evaluation: retrieval quality and speed versus embedding type and dimension
+
+Quality is measured against a collision-free reference (one dimension per vocabulary word):
+recall@k counts returned temples scoring at least the reference k-th score, so ties do not
+matter, and name hit@1 checks that searching a temple's exact name returns that temple first
+
+    python -m benchmarks.bench_embedding --temples 100000 --dims 384,4096,65536,262144
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_ann import generate_queries
+from benchmarks.synthetic import generate_temples
+from embeddings import HashedEmbedding, SimpleEmbedding
+from temple_data import get_temple_text_for_embedding
+from vector_store import TempleVectorStore
+
+def index_megabytes(store: TempleVectorStore) -> float:
+    if store.is_sparse:
+        return store.index.nbytes / 2**20
+    return store.index.ntotal * store.index.d * 4 / 2**20
+
+def evaluate(store: TempleVectorStore, queries, reference, k: int):
+    """Per-query latency of store.search plus recall@k against the reference scores"""
+    latencies = np.empty(len(queries))
+    recalls = np.empty(len(queries))
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        results = store.search(query, k)
+        latencies[i] = (time.perf_counter() - start) * 1000
+        scores = reference(query)
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        recalls[i] = sum(scores[temple['id'] - 1] >= kth - 1e-6 for temple, _ in results) / k
+    return latencies, recalls.mean()
+
+def name_hit_rate(store: TempleVectorStore, temples) -> float:
+    return float(np.mean([store.search(temple['name'], 1)[0][0]['id'] == temple['id'] for temple in temples]))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--temples', type=int, default=100000, help='Synthetic corpus size')
+    parser.add_argument('--queries', type=int, default=300, help='Number of facet-style queries')
+    parser.add_argument('--names', type=int, default=300, help='Number of exact-name lookups')
+    parser.add_argument('--k', type=int, default=10, help='Results per query')
+    parser.add_argument('--dims', default='384,4096,65536,262144', help='Comma-separated hashed dimensions')
+    args = parser.parse_args()
+    
+    temples = generate_temples(args.temples)
+    queries = generate_queries(temples, args.queries)
+    rng = np.random.default_rng(5)
+    name_temples = [temples[i] for i in rng.choice(len(temples), args.names, replace=False)]
+    
+    start = time.perf_counter()
+    vocab = SimpleEmbedding(temples=temples).vocab
+    print(f"Vocabulary of {len(vocab)} words built in {time.perf_counter() - start:.1f}s")
+    # One dimension per word: nothing collides, so this ranking is the quality ceiling
+    reference_model = SimpleEmbedding(len(vocab), vocab=vocab)
+    documents = reference_model.embed_sparse([get_temple_text_for_embedding(temple) for temple in temples]).tocsc()
+    
+    def reference(query):
+        return (documents @ reference_model.embed_sparse([query]).T).toarray().ravel()
+    
+    configs = [('vocab', len(vocab), 'sparse'), ('vocab', 384, 'flat')]
+    configs += [('hashed', int(dim), 'sparse') for dim in args.dims.split(',')]
+    print(f"{'embedding':>9} {'dim':>8} {'index':>6} {'build s':>8} {'MB':>8} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'recall@' + str(args.k):>9} {'name@1':>7}")
+    for embedding_type, dimension, index_type in configs:
+        if embedding_type == 'hashed':
+            model = HashedEmbedding(dimension)
+        else:
+            model = SimpleEmbedding(dimension, vocab=vocab)
+        start = time.perf_counter()
+        store = TempleVectorStore(temples=temples, index_type=index_type, embedding_model=model)
+        build_seconds = time.perf_counter() - start
+        store.search(queries[0], args.k)  # The sparse index consolidates its rows on first search
+        
+        latencies, recall = evaluate(store, queries, reference, args.k)
+        print(f"{embedding_type:>9} {dimension:>8} {index_type:>6} {build_seconds:8.2f} {index_megabytes(store):8.1f} "
+              f"{np.percentile(latencies, 50):8.3f} {np.percentile(latencies, 99):8.3f} "
+              f"{recall:9.3f} {name_hit_rate(store, name_temples):7.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Embedding backend benchmark: index build throughput (docs/sec) and query latency (ms/query)
+
+The onnx rows need a model directory with model.onnx and tokenizer.json; they are run with a
+cold and then a warm disk cache, and with one thread versus --threads inference threads
+
+    python -m benchmarks.bench_embedding_backend --temples 20000 --model-dir models/minilm
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_ann import generate_queries
+from benchmarks.synthetic import generate_temples
+from embeddings import EMBED_THREADS, EmbeddingDiskCache, HashedEmbedding, OnnxEmbedding, SimpleEmbedding
+from vector_store import TempleVectorStore
+
+def measure(label: str, model, temples, queries, index_type: str = 'flat', k: int = 10):
+    start = time.perf_counter()
+    store = TempleVectorStore(temples=temples, index_type=index_type, embedding_model=model)
+    build_seconds = time.perf_counter() - start
+    
+    latencies = np.empty(len(queries))
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        store.search(query, k)
+        latencies[i] = (time.perf_counter() - start) * 1000
+    print(f"{label:>24} {len(temples) / build_seconds:12,.0f} {np.percentile(latencies, 50):8.3f} "
+          f"{np.percentile(latencies, 99):8.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--temples', type=int, default=20000, help='Synthetic corpus size')
+    parser.add_argument('--queries', type=int, default=200, help='Number of distinct benchmark queries')
+    parser.add_argument('--model-dir', help='ONNX model directory; onnx rows are skipped without it')
+    parser.add_argument('--threads', type=int, default=EMBED_THREADS, help='Inference threads for the onnx rows')
+    parser.add_argument('--batch-size', type=int, default=32, help='Texts per model call')
+    args = parser.parse_args()
+    
+    temples = generate_temples(args.temples)
+    # Distinct queries, so the in-memory query cache never answers for the model
+    queries = list(dict.fromkeys(generate_queries(temples, args.queries * 2)))[:args.queries]
+    
+    print(f"{'backend':>24} {'build docs/s':>12} {'p50 ms':>8} {'p99 ms':>8}")
+    measure('vocab 384', SimpleEmbedding(temples=temples), temples, queries)
+    measure('hashed 2^18 (sparse)', HashedEmbedding(), temples, queries, index_type='sparse')
+    if not args.model_dir:
+        print("Pass --model-dir to benchmark the onnx backend")
+        return
+    
+    measure('onnx, 1 thread', OnnxEmbedding(args.model_dir, args.batch_size, threads=1), temples, queries)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        disk_cache = EmbeddingDiskCache(os.path.join(cache_dir, 'embeddings.db'))
+        model = OnnxEmbedding(args.model_dir, args.batch_size, threads=args.threads, disk_cache=disk_cache)
+        measure(f"onnx, {args.threads} threads", model, temples, queries)
+        # Same texts again: a re-index where nothing changed reads every vector from disk
+        model.query_cache.clear()
+        measure('onnx, warm disk cache', model, temples, queries)
+        print(f"Disk cache: {disk_cache.stats()}")
+
+if __name__ == '__main__':
+    main()
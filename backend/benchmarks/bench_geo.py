@@ -0,0 +1,60 @@
+"""
+Geospatial benchmark: KD-tree radius and nearest queries versus a linear haversine scan
+
+    python -m benchmarks.bench_geo --points 1000000 --radius-km 50
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from geo_index import GeoIndex, haversine_km
+
+# Roughly the bounding box of India
+LAT_RANGE = (8.0, 35.0)
+LNG_RANGE = (68.0, 97.0)
+
+def percentile_ms(latencies):
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--points', type=int, default=1000000, help='Number of temple locations')
+    parser.add_argument('--queries', type=int, default=200, help='Number of query points')
+    parser.add_argument('--radius-km', type=float, default=50.0, help='Radius for range queries')
+    parser.add_argument('--k', type=int, default=10, help='Neighbours for nearest queries')
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(*LAT_RANGE, args.points).astype(np.float32)
+    lng = rng.uniform(*LNG_RANGE, args.points).astype(np.float32)
+    ids = np.arange(args.points, dtype=np.int64)
+    query_lat = rng.uniform(*LAT_RANGE, args.queries)
+    query_lng = rng.uniform(*LNG_RANGE, args.queries)
+    
+    start = time.perf_counter()
+    index = GeoIndex(ids, lat, lng)
+    print(f"Built KD-tree over {args.points} points in {time.perf_counter() - start:.2f}s")
+    
+    timings = {'kd radius': [], 'scan radius': [], 'kd nearest': []}
+    for q_lat, q_lng in zip(query_lat, query_lng):
+        start = time.perf_counter()
+        found, _ = index.within(q_lat, q_lng, args.radius_km)
+        timings['kd radius'].append((time.perf_counter() - start) * 1000)
+        
+        start = time.perf_counter()
+        expected = ids[haversine_km(q_lat, q_lng, lat, lng) <= args.radius_km]
+        timings['scan radius'].append((time.perf_counter() - start) * 1000)
+        assert abs(len(found) - len(expected)) <= 1, "KD-tree and scan disagree beyond float rounding"
+        
+        start = time.perf_counter()
+        index.nearest(q_lat, q_lng, args.k)
+        timings['kd nearest'].append((time.perf_counter() - start) * 1000)
+    
+    for name, latencies in timings.items():
+        p50, p99 = percentile_ms(latencies)
+        print(f"{name:>12}: p50 {p50:8.3f} ms  p99 {p99:8.3f} ms")
+
+if __name__ == '__main__':
+    main()
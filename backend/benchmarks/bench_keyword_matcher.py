@@ -0,0 +1,69 @@
+"""
+Keyword matcher benchmark: per-query cost of the compiled matcher versus nested substring scans
+Keyword tables are padded with synthetic aliases to show how each approach scales
+
+    python -m benchmarks.bench_keyword_matcher --aliases 0,1000,10000
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.bench_ann import generate_queries
+from benchmarks.synthetic import generate_temples
+from langchain_tool import KeywordMatcher, TempleQueryProcessor
+
+def padded_tables(processor: TempleQueryProcessor, extra_aliases: int, seed: int = 0):
+    """Copies of the deity/state/era tables with extra_aliases made-up aliases spread across values"""
+    rng = random.Random(seed)
+    tables = {
+        'deity': {value: list(aliases) for value, aliases in processor.deity_keywords.items()},
+        'state': {value: list(aliases) for value, aliases in processor.state_keywords.items()},
+        'era': {value: list(aliases) for value, aliases in processor.era_keywords.items()},
+    }
+    for i in range(extra_aliases):
+        table = tables[rng.choice(list(tables))]
+        table[rng.choice(list(table))].append(f"alias{i}" if i % 4 else f"alias{i} extra")
+    return tables
+
+def substring_extract(tables, query: str):
+    """The previous approach: lowercase, then any(keyword in query) per value until one matches"""
+    query_lower = query.lower()
+    filters = {}
+    for facet, table in tables.items():
+        for value, keywords in table.items():
+            if any(keyword in query_lower for keyword in keywords):
+                filters[facet] = value.title()
+                break
+    return filters
+
+def matcher_extract(matcher: KeywordMatcher, query: str):
+    return {facet: values[0].title() for facet, values in matcher.match(query).items()}
+
+def time_per_query(fn, queries) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - start) * 1e6 / len(queries)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--queries', type=int, default=5000, help='Number of benchmark queries')
+    parser.add_argument('--aliases', default='0,1000,10000', help='Comma-separated synthetic alias counts')
+    args = parser.parse_args()
+    
+    processor = TempleQueryProcessor()
+    queries = generate_queries(generate_temples(2000), args.queries)
+    
+    print(f"{'aliases':>8} {'substring us/q':>15} {'matcher us/q':>13} {'build ms':>9} {'speedup':>8}")
+    for extra in map(int, args.aliases.split(',')):
+        tables = padded_tables(processor, extra)
+        start = time.perf_counter()
+        matcher = KeywordMatcher(tables)
+        build_ms = (time.perf_counter() - start) * 1000
+        substring_us = time_per_query(lambda q: substring_extract(tables, q), queries)
+        matcher_us = time_per_query(lambda q: matcher_extract(matcher, q), queries)
+        print(f"{extra:>8} {substring_us:15.2f} {matcher_us:13.2f} {build_ms:9.2f} {substring_us / matcher_us:7.1f}x")
+
+if __name__ == '__main__':
+    main()
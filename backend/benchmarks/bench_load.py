@@ -0,0 +1,127 @@
+"""
+Load test: /health and /query latency under many concurrent clients
+Starts the API in a subprocess per configuration, serving a synthetic corpus, and drives it with httpx
+
+    python -m benchmarks.bench_load --temples 100000 --clients 200 --workers 0,4
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+def serve(temples_count: int, port: int):
+    """Swap a synthetic store into the app and run it with uvicorn"""
+    import uvicorn
+    
+    from benchmarks.suite import install_corpus
+    from benchmarks.synthetic import generate_temples
+    from main import app
+    
+    if temples_count:
+        install_corpus(generate_temples(temples_count))
+    uvicorn.run(app, host='127.0.0.1', port=port, log_level='warning')
+
+async def wait_until_up(client, timeout: float = 600.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get('/health')).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not come up")
+
+async def query_client(client, queries, deadline: float, latencies, statuses):
+    """One simulated user sending /query requests back to back"""
+    i = 0
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        response = await client.post('/query', json={'query': queries[i % len(queries)]})
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[response.status_code] += 1
+        i += 1
+
+async def health_probe(client, deadline: float, latencies, interval: float = 0.05):
+    """Poll /health to see how long the event loop takes to answer a trivial request"""
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        await client.get('/health')
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+
+async def run_load(base_url: str, queries, clients: int, duration: float):
+    import httpx
+    
+    limits = httpx.Limits(max_connections=clients + 8, max_keepalive_connections=clients + 8)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        await wait_until_up(client)
+        query_latencies, health_latencies, statuses = [], [], Counter()
+        deadline = time.monotonic() + duration
+        await asyncio.gather(
+            health_probe(client, deadline, health_latencies),
+            *[query_client(client, queries[c::clients] or queries, deadline, query_latencies, statuses)
+              for c in range(clients)],
+        )
+    return query_latencies, health_latencies, statuses
+
+def percentiles(latencies):
+    if not latencies:
+        return float('nan'), float('nan')
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--temples', type=int, default=100000, help='Synthetic corpus size (0 serves the built-in dataset)')
+    parser.add_argument('--clients', type=int, default=200, help='Concurrent /query clients')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds of load per configuration')
+    parser.add_argument('--workers', default='0,4', help='Comma-separated TEMPLE_SEARCH_WORKERS values to compare')
+    parser.add_argument('--queue-depth', type=int, default=0, help='TEMPLE_SEARCH_QUEUE_DEPTH for the server')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.serve:
+        serve(args.temples, args.port)
+        return
+    
+    try:
+        import httpx  # noqa: F401
+    except ImportError as e:
+        raise ImportError("The load test requires httpx (pip install httpx)") from e
+    
+    from benchmarks.bench_ann import generate_queries
+    from benchmarks.synthetic import generate_temples
+    
+    # Distinct queries so the embedding cache does not hide the work
+    queries = generate_queries(generate_temples(max(args.temples, 1000)), 20000)
+    
+    print(f"{'workers':>8} {'req/s':>8} {'query p50':>10} {'query p99':>10} {'health p50':>11} {'health p99':>11} {'503s':>6}")
+    for workers in args.workers.split(','):
+        env = dict(os.environ, TEMPLE_SEARCH_WORKERS=workers, TEMPLE_SEARCH_QUEUE_DEPTH=str(args.queue_depth))
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'benchmarks.bench_load', '--serve',
+             '--temples', str(args.temples), '--port', str(args.port)],
+            env=env,
+        )
+        try:
+            query_latencies, health_latencies, statuses = asyncio.run(
+                run_load(f"http://127.0.0.1:{args.port}", queries, args.clients, args.duration)
+            )
+        finally:
+            server.terminate()
+            server.wait()
+        
+        query_p50, query_p99 = percentiles(query_latencies)
+        health_p50, health_p99 = percentiles(health_latencies)
+        print(f"{workers:>8} {len(query_latencies) / args.duration:8.1f} {query_p50:10.1f} {query_p99:10.1f} "
+              f"{health_p50:11.1f} {health_p99:11.1f} {statuses.get(503, 0):6d}")
+
+if __name__ == '__main__':
+    main()
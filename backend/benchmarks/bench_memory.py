@@ -0,0 +1,60 @@
+"""
+Memory benchmark: what the server holds for the temple records
+
+Before, the catalog kept a dict per temple and the vector store a columnar copy of the same records;
+now both read one ColumnarTempleStore owned by the catalog
+
+    python -m benchmarks.bench_memory --temples 1000000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from benchmarks.synthetic import generate_temples
+from temple_data import TempleCatalog
+from temple_store import ColumnarTempleStore
+
+def measure(build):
+    """Return (result, bytes still allocated by build, seconds)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+def dicts_and_copy(count: int):
+    """The previous layout: id -> dict in the catalog, plus the vector store's columnar copy"""
+    by_id = {temple['id']: temple for temple in generate_temples(count)}
+    return by_id, ColumnarTempleStore(by_id.values())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--temples', type=int, default=200000, help='Synthetic corpus size')
+    args = parser.parse_args()
+    
+    # Each layout is built from its own generator call, so the input is counted only where it is kept
+    before, before_bytes, before_seconds = measure(lambda: dicts_and_copy(args.temples))
+    del before
+    catalog, shared_bytes, shared_seconds = measure(lambda: TempleCatalog(generate_temples(args.temples)))
+    records = catalog.records
+    
+    start = time.perf_counter()
+    rows = [records[row] for row in range(0, records.num_rows, max(1, records.num_rows // 1000))]
+    materialize_us = (time.perf_counter() - start) / len(rows) * 1e6
+    
+    print(f"Temples:            {args.temples}")
+    print(f"Dicts + copy:       {before_bytes / 2**20:10.1f} MB ({before_bytes / args.temples:.0f} B/record)")
+    print(f"Shared table:       {shared_bytes / 2**20:10.1f} MB ({shared_bytes / args.temples:.0f} B/record, "
+          f"{records.nbytes / 2**20:.1f} MB in column buffers, the rest mostly the id -> row map)")
+    print(f"Reduction:          {before_bytes / shared_bytes:10.1f}x")
+    print(f"Build time:         {before_seconds:.2f}s before, {shared_seconds:.2f}s shared (includes generation)")
+    print(f"Materialize a row:  {materialize_us:10.1f} us")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Memory per worker: pre-forked workers sharing one build versus workers that each build their own
+RSS counts shared pages once per process, so its sum grows linearly whatever is shared; PSS splits
+shared pages between the processes mapping them, so its sum is the memory the deployment really uses
+
+    python -m benchmarks.bench_prefork --temples 100000 --workers 1,2,4
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks.bench_startup import memory_kb, request_ok
+
+def serve(temples_count: int, workers: int, port: int, preload: bool):
+    """Put a synthetic catalog in place, then run the pre-fork server over it"""
+    from benchmarks.synthetic import generate_temples
+    from prefork import serve as serve_prefork
+    from temple_data import catalog
+    
+    catalog.upsert(generate_temples(temples_count))
+    serve_prefork(workers, '127.0.0.1', port, preload=preload, log_level='warning')
+
+def child_pids(pid: int) -> List[int]:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+def wait_until_ready(base: str, workers: int, timeout: float = 900.0):
+    """Wait for /ready to pass on many fresh connections in a row, so every worker has likely warmed up"""
+    deadline = time.monotonic() + timeout
+    streak = 0
+    while streak < 10 * workers:
+        if time.monotonic() > deadline:
+            raise RuntimeError("Workers did not become ready")
+        streak = streak + 1 if request_ok(f"{base}/ready") else 0
+        if not streak:
+            time.sleep(0.1)
+
+def measure(temples_count: int, workers: int, port: int, preload: bool, queries: int) -> Dict:
+    base = f"http://127.0.0.1:{port}"
+    command = [sys.executable, '-m', 'benchmarks.bench_prefork', '--serve', '--temples', str(temples_count),
+               '--workers-count', str(workers), '--port', str(port)]
+    if not preload:
+        command.append('--no-preload')
+    master = subprocess.Popen(command)
+    try:
+        wait_until_ready(base, workers)
+        # Serve some traffic, so pages workers touch while searching count against them
+        for i in range(queries):
+            request_ok(f"{base}/query", {'query': f"ancient shiva temple {i}"})
+            request_ok(f"{base}/temple/{i % temples_count + 1}")
+        time.sleep(0.5)
+        pids = [master.pid] + child_pids(master.pid)
+        usage = [memory_kb(pid) for pid in pids]
+    finally:
+        master.terminate()
+        master.wait()
+    
+    worker_usage = usage[1:]
+    return {
+        'rss_mb': sum(u['Rss'] for u in usage) / 1024,
+        'pss_mb': sum(u['Pss'] for u in usage) / 1024,
+        'master_pss_mb': usage[0]['Pss'] / 1024,
+        'worker_private_mb': sum(u['Private_Dirty'] for u in worker_usage) / 1024 / max(len(worker_usage), 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--temples', type=int, default=100000, help='Synthetic corpus size')
+    parser.add_argument('--workers', default='1,2,4', help='Comma-separated worker counts')
+    parser.add_argument('--queries', type=int, default=200, help='Requests served before measuring')
+    parser.add_argument('--port', type=int, default=8767)
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--workers-count', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--no-preload', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.serve:
+        serve(args.temples, args.workers_count, args.port, preload=not args.no_preload)
+        return
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        sys.exit("This benchmark reads /proc/<pid>/smaps_rollup and needs Linux 4.14 or later")
+    
+    print(f"{'mode':>12} {'workers':>8} {'sum RSS MB':>11} {'sum PSS MB':>11} {'PSS/worker':>11} "
+          f"{'private/worker':>15}")
+    for workers in map(int, args.workers.split(',')):
+        for label, preload in (('independent', False), ('prefork', True)):
+            result = measure(args.temples, workers, args.port, preload, args.queries)
+            print(f"{label:>12} {workers:8d} {result['rss_mb']:11.1f} {result['pss_mb']:11.1f} "
+                  f"{result['pss_mb'] / workers:11.1f} {result['worker_private_mb']:15.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Startup benchmark: rebuild-at-start versus loading a prebuilt index artifact, and time to first
+request of the API under each TEMPLE_WARMUP mode
+Each mode runs in a fresh interpreter started from a parent that never built an index, and reports the
+memory it holds once loaded, from /proc/self/smaps_rollup: peak RSS (ru_maxrss) is inherited across
+fork and exec, so it would only show the parent. Anonymous memory is what a worker owns privately; a
+memory-mapped index shows up as file-backed RSS instead, shared through the page cache
+
+    python -m benchmarks.bench_startup --temples 50000
+    python -m benchmarks.bench_startup --temples 50000 --http
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+MODES = ['build', 'load', 'load-mmap']
+WARMUP_MODES = ['eager', 'background', 'lazy']
+# Fields of /proc/<pid>/smaps_rollup the benchmarks report, in kB
+MEMORY_FIELDS = ('Rss', 'Pss', 'Anonymous', 'Private_Dirty')
+
+def memory_kb(pid='self') -> dict:
+    """Current Rss, Pss, Anonymous and Private_Dirty of a process in kB, from /proc/<pid>/smaps_rollup"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            if name in MEMORY_FIELDS:
+                fields[name] = int(value.split()[0])
+    return fields
+
+def save_artifact(temples_count: int, index_dir: str):
+    """Build and save the artifact in its own process, so the measuring parent stays small"""
+    from benchmarks.synthetic import generate_temples
+    from vector_store import TempleVectorStore
+    
+    TempleVectorStore(temples=generate_temples(temples_count)).save(index_dir)
+
+def run_mode(mode: str, temples_count: int, index_dir: str):
+    """Start one vector store in this process and report elapsed time and the memory it added"""
+    import gc
+    
+    from benchmarks.synthetic import generate_temples
+    from vector_store import TempleVectorStore
+    
+    temples = generate_temples(temples_count)
+    gc.collect()
+    before = memory_kb()
+    
+    start = time.perf_counter()
+    if mode == 'build':
+        store = TempleVectorStore(temples=temples)
+    else:
+        store = TempleVectorStore(temples=temples, index_dir=index_dir, mmap=(mode == 'load-mmap'))
+    elapsed = time.perf_counter() - start
+    # Touch every index page, as serving traffic eventually does
+    store.search('temple', 10)
+    gc.collect()
+    after = memory_kb()
+    
+    print(json.dumps({
+        'mode': mode,
+        'temples': len(store.temple_ids),
+        'seconds': round(elapsed, 4),
+        'mmapped': store._mmap_path is not None,
+        **{f"{name.lower()}_mb": round(after[name] / 1024, 1) for name in MEMORY_FIELDS},
+        **{f"{name.lower()}_added_mb": round((after[name] - before[name]) / 1024, 1) for name in MEMORY_FIELDS},
+    }))
+
+def serve(temples_count: int, port: int, report_path: str):
+    """Put a synthetic catalog in place, then run the API, which builds its indexes from the catalog"""
+    start = time.perf_counter()
+    import uvicorn
+    
+    from benchmarks.synthetic import generate_temples
+    from temple_data import catalog
+    
+    catalog.upsert(generate_temples(temples_count))
+    with open(report_path, 'w') as f:
+        json.dump({'setup_seconds': time.perf_counter() - start}, f)
+    
+    from main import app
+    uvicorn.run(app, host='127.0.0.1', port=port, log_level='warning')
+
+def request_ok(url: str, body: dict = None) -> bool:
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=600) as response:
+            return response.status == 200
+    except (urllib.error.URLError, ConnectionError):
+        return False
+
+def wait_until(url: str, started: float, body: dict = None, timeout: float = 600.0) -> float:
+    """Seconds from started until url answers 200, polling every 10 ms"""
+    while time.perf_counter() - started < timeout:
+        if request_ok(url, body):
+            return time.perf_counter() - started
+        time.sleep(0.01)
+    raise RuntimeError(f"{url} did not answer within {timeout}s")
+
+def time_to_first_request(warmup_mode: str, temples_count: int, port: int):
+    """Start the API in a subprocess and time /health, /ready and a first /query from process start"""
+    base = f"http://127.0.0.1:{port}"
+    with tempfile.NamedTemporaryFile(suffix='.json') as report:
+        started = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'benchmarks.bench_startup', '--serve', '--temples', str(temples_count),
+             '--port', str(port), '--report', report.name],
+            env=dict(os.environ, TEMPLE_WARMUP=warmup_mode),
+        )
+        try:
+            health = wait_until(f"{base}/health", started)
+            ready = wait_until(f"{base}/ready", started)
+            query_start = time.perf_counter()
+            wait_until(f"{base}/query", query_start, {'query': 'ancient shiva temples'})
+            first_query = time.perf_counter() - query_start
+        finally:
+            server.terminate()
+            server.wait()
+        with open(report.name) as f:
+            setup = json.load(f)['setup_seconds']
+    # Corpus generation happens before the app starts in every mode, so leave it out
+    return health - setup, ready - setup, first_query
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--temples', type=int, default=20000, help='Synthetic corpus size')
+    parser.add_argument('--http', action='store_true', help='Time the API to first request per TEMPLE_WARMUP mode')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--index-dir', help=argparse.SUPPRESS)
+    parser.add_argument('--save', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--report', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.save:
+        save_artifact(args.temples, args.index_dir)
+        return
+    if args.mode:
+        run_mode(args.mode, args.temples, args.index_dir)
+        return
+    if args.serve:
+        serve(args.temples, args.port, args.report)
+        return
+    if args.http:
+        print(f"{'warm-up':>10} {'/health s':>10} {'/ready s':>10} {'first /query s':>15}")
+        for warmup_mode in WARMUP_MODES:
+            health, ready, first_query = time_to_first_request(warmup_mode, args.temples, args.port)
+            print(f"{warmup_mode:>10} {health:10.3f} {ready:10.3f} {first_query:15.3f}")
+        return
+    
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        sys.exit("This benchmark reads /proc/self/smaps_rollup and needs Linux 4.14 or later")
+    
+    with tempfile.TemporaryDirectory() as index_dir:
+        command = [sys.executable, '-m', 'benchmarks.bench_startup', '--temples', str(args.temples),
+                   '--index-dir', index_dir]
+        subprocess.run(command + ['--save'], check=True)
+        artifact_mb = sum(os.path.getsize(os.path.join(index_dir, f)) for f in os.listdir(index_dir)) / 2**20
+        print(f"Artifact for {args.temples} temples: {artifact_mb:.1f} MB")
+        
+        print(f"{'mode':>10} {'seconds':>8} {'mmapped':>8} {'RSS MB':>8} {'PSS MB':>8} {'anon MB':>8} "
+              f"{'+RSS MB':>8} {'+anon MB':>9}")
+        for mode in MODES:
+            output = subprocess.run(command + ['--mode', mode], check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:>10} {result['seconds']:8.3f} {str(result['mmapped']):>8} {result['rss_mb']:8.1f} "
+                  f"{result['pss_mb']:8.1f} {result['anonymous_mb']:8.1f} {result['rss_added_mb']:8.1f} "
+                  f"{result['anonymous_added_mb']:9.1f}")
+
+if __name__ == '__main__':
+    main()
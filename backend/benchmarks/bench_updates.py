@@ -0,0 +1,64 @@
+"""
+Live update benchmark: single-temple upserts and deletes interleaved with searches
+
+Each step replaces, deletes or re-inserts one temple through the catalog, then runs an unfiltered,
+a facet-filtered and a nearby search, so caches that writes invalidate are paid for by the reads
+
+    python -m benchmarks.bench_updates --temples 200000 --index-type flat
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import vector_store
+from benchmarks.suite import install_corpus
+from benchmarks.synthetic import generate_temples
+from temple_data import catalog
+
+def percentile_ms(latencies):
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--temples', type=int, default=200000, help='Synthetic corpus size')
+    parser.add_argument('--index-type', choices=vector_store.INDEX_TYPES, default=None, help='Index to update')
+    parser.add_argument('--steps', type=int, default=300, help='Writes, each followed by three searches')
+    args = parser.parse_args()
+    
+    temples = generate_temples(args.temples)
+    print(f"Built {install_corpus(temples, args.index_type)}")
+    store = vector_store.vector_store
+    
+    rng = np.random.default_rng(0)
+    timings = {'upsert': [], 'delete': [], 'search': [], 'filtered': [], 'nearby': []}
+    # Every third step deletes a temple and the next one puts it back
+    deleted = None
+    for step in range(args.steps):
+        temple = deleted or temples[int(rng.integers(len(temples)))]
+        start = time.perf_counter()
+        if step % 3 == 1:
+            catalog.delete([temple['id']])
+            deleted = temple
+            timings['delete'].append((time.perf_counter() - start) * 1000)
+        else:
+            catalog.upsert([dict(temple, name=f"{temple['name']} {step}")])
+            deleted = None
+            timings['upsert'].append((time.perf_counter() - start) * 1000)
+        
+        for name, search in (
+            ('search', lambda: store.search(f"{temple['deity']} temple", top_k=10)),
+            ('filtered', lambda: store.search_with_filters("temple", {'state': temple['state']}, top_k=10)),
+            ('nearby', lambda: store.nearby(20.0, 78.0, radius_km=200, limit=10)),
+        ):
+            start = time.perf_counter()
+            search()
+            timings[name].append((time.perf_counter() - start) * 1000)
+    
+    for name, latencies in timings.items():
+        p50, p99 = percentile_ms(latencies)
+        print(f"{name:>9}: p50 {p50:8.3f} ms  p99 {p99:8.3f} ms  ({len(latencies)} calls)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+"""
+Benchmark suite: one run over a synthetic corpus and a replayable workload, written to JSON
+Scenarios cover index build, single and batched /query processing, filtered vector search,
+autocomplete and end-to-end HTTP through an in-process ASGI client. Pass --compare with an earlier
+result file to flag regressions between commits
+
+    python -m benchmarks.suite --temples 100000 --output before.json
+    python -m benchmarks.suite --temples 100000 --workload before.jsonl --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+import faiss
+import numpy as np
+
+import vector_store
+from autocomplete import autocomplete
+from benchmarks.synthetic import generate_temples
+from benchmarks.workload import generate_workload, load_workload, save_workload, workload_digest
+from langchain_tool import process_query, process_query_batch
+from response_cache import response_cache
+from temple_data import catalog
+
+# Bump when scenario definitions change so old result files are not compared against new ones
+SUITE_VERSION = 1
+# Metrics compared by --compare, and whether a larger value is an improvement
+COMPARED_METRICS = {
+    'p50_ms': False, 'p99_ms': False, 'per_query_ms': False, 'build_seconds': False,
+    'qps': True, 'docs_per_second': True,
+}
+
+def summarize(latencies_ms: List[float], elapsed_seconds: float) -> Dict:
+    """Latency percentiles in ms plus throughput for one scenario"""
+    latencies = np.asarray(latencies_ms)
+    if not len(latencies):
+        return {'count': 0}
+    return {
+        'count': len(latencies),
+        'mean_ms': round(float(latencies.mean()), 4),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 4),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 4),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 4),
+        'max_ms': round(float(latencies.max()), 4),
+        'qps': round(len(latencies) / elapsed_seconds, 2) if elapsed_seconds else 0.0,
+    }
+
+def time_calls(fn: Callable, items: List, warmup: int) -> Dict:
+    """Call fn on every item one at a time, after warming up on the first few"""
+    for item in items[:warmup]:
+        fn(item)
+    latencies = []
+    start = time.perf_counter()
+    for item in items:
+        call_start = time.perf_counter()
+        fn(item)
+        latencies.append((time.perf_counter() - call_start) * 1000)
+    return summarize(latencies, time.perf_counter() - start)
+
+def install_corpus(temples: List[Dict], index_type: Optional[str] = None) -> Dict:
+    """Serve the synthetic temples from the global store and catalog, as the API would after a load"""
+    # Synthetic ids start at 1, so upserting replaces the sample records; drop any left over. The
+    # previous store is detached first so the records change without embedding them one write at a time
+    synthetic_ids = {temple['id'] for temple in temples}
+    with catalog.records.lock.write():
+        catalog.attach_index(None)
+        catalog.apply_upsert(temples)
+        catalog.apply_delete([temple_id for temple_id in catalog.records.live_ids().tolist()
+                              if temple_id not in synthetic_ids])
+    
+    # The new store indexes the catalog's table, as the server's own store does
+    start = time.perf_counter()
+    vector_store.vector_store = vector_store.TempleVectorStore(index_type=index_type)
+    build_seconds = time.perf_counter() - start
+    return {
+        'temples': len(temples),
+        'index_type': vector_store.vector_store.index_type,
+        'build_seconds': round(build_seconds, 4),
+        'docs_per_second': round(len(temples) / build_seconds, 1),
+    }
+
+def bench_single_query(workload: List[Dict], args) -> Dict:
+    items = [item for item in workload if item['kind'] == 'query']
+    return time_calls(lambda item: process_query(item['text'], item['filters']), items, args.warmup)
+
+def bench_batched_query(workload: List[Dict], args) -> Dict:
+    items = [item for item in workload if item['kind'] == 'query']
+    batches = [
+        [(item['text'], item['filters']) for item in items[i:i + args.batch]]
+        for i in range(0, len(items), args.batch)
+    ]
+    result = time_calls(process_query_batch, batches, max(args.warmup // args.batch, 1))
+    result['batch_size'] = args.batch
+    if result['count']:
+        result['per_query_ms'] = round(result['mean_ms'] * result['count'] / len(items), 4)
+    return result
+
+def bench_filtered_search(workload: List[Dict], args) -> Dict:
+    items = [item for item in workload if item['kind'] == 'filtered']
+    search = lambda item: vector_store.search_temples_vector(item['text'], item['filters'], item['limit'])
+    return time_calls(search, items, args.warmup)
+
+def bench_suggestions(workload: List[Dict], args) -> Dict:
+    items = [item for item in workload if item['kind'] == 'suggest']
+    return time_calls(lambda item: autocomplete.suggest(item['text'], item['limit']), items, args.warmup)
+
+def http_request(item: Dict):
+    """Method, path and keyword arguments replaying a workload item against the API"""
+    if item['kind'] == 'suggest':
+        return 'GET', '/suggestions', {'params': {'q': item['text'], 'limit': item['limit']}}
+    path = '/search/vector' if item['kind'] == 'filtered' else '/query'
+    return 'POST', path, {'json': {'query': item['text'], 'filters': item['filters'] or {}, 'limit': item['limit']}}
+
+async def replay_http(workload: List[Dict], concurrency: int, warmup: int) -> Dict:
+    import httpx
+    from main import app
+    
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        for item in workload[:warmup]:
+            method, path, kwargs = http_request(item)
+            await client.request(method, path, **kwargs)
+        # Warm-up answers must not turn the measured requests into cache hits
+        response_cache.clear()
+        
+        latencies, failures = [], 0
+        
+        async def worker(items):
+            nonlocal failures
+            for item in items:
+                method, path, kwargs = http_request(item)
+                call_start = time.perf_counter()
+                response = await client.request(method, path, **kwargs)
+                latencies.append((time.perf_counter() - call_start) * 1000)
+                failures += response.status_code != 200
+        
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(workload[i::concurrency]) for i in range(concurrency)])
+        result = summarize(latencies, time.perf_counter() - start)
+    result.update({'concurrency': concurrency, 'failures': failures})
+    return result
+
+def bench_http(workload: List[Dict], args) -> Dict:
+    try:
+        import httpx  # noqa: F401
+    except ImportError as e:
+        raise ImportError("The http scenario requires httpx (pip install httpx)") from e
+    return asyncio.run(replay_http(workload, args.concurrency, args.warmup))
+
+# Scenario name -> benchmark run against the installed corpus; index_build is measured by install_corpus
+SCENARIOS = {
+    'single_query': bench_single_query,
+    'batched_query': bench_batched_query,
+    'filtered_search': bench_filtered_search,
+    'suggestions': bench_suggestions,
+    'http': bench_http,
+}
+
+def git_revision() -> Dict:
+    def git(*command):
+        return subprocess.run(['git', *command], capture_output=True, text=True, check=True).stdout.strip()
+    try:
+        return {'commit': git('rev-parse', 'HEAD'), 'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+
+def environment() -> Dict:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'faiss': getattr(faiss, '__version__', None),
+        'search_workers': int(os.environ.get('TEMPLE_SEARCH_WORKERS', str(os.cpu_count() or 1))),
+    }
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Print metric changes against a baseline run and return the regressions beyond threshold"""
+    if baseline.get('suite_version') != current['suite_version']:
+        print(f"Baseline was written by suite version {baseline.get('suite_version')}; results may not be comparable")
+    if baseline.get('workload', {}).get('digest') != current['workload']['digest']:
+        print("Baseline replayed a different workload; pass the same --workload file to both runs")
+    if baseline.get('corpus', {}).get('temples') != current['corpus']['temples']:
+        print(f"Baseline indexed {baseline.get('corpus', {}).get('temples')} temples, this run {current['corpus']['temples']}")
+    
+    regressions = []
+    print(f"\n{'scenario':>16} {'metric':>16} {'baseline':>12} {'current':>12} {'change':>8}")
+    for scenario, metrics in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(scenario, {})
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            if metric not in metrics or not before.get(metric):
+                continue
+            change = metrics[metric] / before[metric] - 1
+            worse = -change if higher_is_better else change
+            flag = ' REGRESSION' if worse > threshold else ''
+            if flag:
+                regressions.append(f"{scenario}.{metric}")
+            print(f"{scenario:>16} {metric:>16} {before[metric]:12.4f} {metrics[metric]:12.4f} {change:+8.1%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--temples', type=int, default=100000, help='Synthetic corpus size (10 to 1,000,000)')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus generator seed')
+    parser.add_argument('--requests', type=int, default=2000, help='Workload size when generating one')
+    parser.add_argument('--workload', help='JSON Lines workload to replay; written here first if it does not exist')
+    parser.add_argument('--scenarios', default='index_build,' + ','.join(SCENARIOS), help='Comma-separated scenarios')
+    parser.add_argument('--batch', type=int, default=32, help='Queries per call in batched_query')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients in the http scenario')
+    parser.add_argument('--warmup', type=int, default=20, help='Untimed requests before each scenario')
+    parser.add_argument('--output', help='Result file (default benchmark-results/<time>-<commit>.json)')
+    parser.add_argument('--compare', help='Earlier result file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Relative slowdown reported as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 on any regression')
+    args = parser.parse_args()
+    
+    selected = args.scenarios.split(',')
+    unknown = set(selected) - set(SCENARIOS) - {'index_build'}
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    
+    temples = generate_temples(args.temples, seed=args.seed)
+    if args.workload and os.path.exists(args.workload):
+        workload = load_workload(args.workload)
+    else:
+        workload = generate_workload(temples, args.requests)
+        if args.workload:
+            save_workload(args.workload, workload)
+    
+    revision = git_revision()
+    result = {
+        'suite_version': SUITE_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'git': revision,
+        'environment': environment(),
+        'config': vars(args),
+        'workload': {'path': args.workload, 'requests': len(workload), 'digest': workload_digest(workload)},
+        'scenarios': {},
+    }
+    
+    print(f"Building the index over {len(temples)} temples")
+    build = install_corpus(temples)
+    result['corpus'] = build
+    if 'index_build' in selected:
+        result['scenarios']['index_build'] = build
+    for name in selected:
+        if name in SCENARIOS:
+            print(f"Running {name}")
+            result['scenarios'][name] = SCENARIOS[name](workload, args)
+    
+    print(f"\n{'scenario':>16} {'count':>7} {'p50 ms':>9} {'p99 ms':>9} {'qps':>10}")
+    for name, metrics in result['scenarios'].items():
+        if name == 'index_build':
+            print(f"{name:>16} {build['temples']:>7} {'':>9} {'':>9} {build['docs_per_second']:10.1f} docs/s")
+        elif metrics.get('count'):
+            print(f"{name:>16} {metrics['count']:>7} {metrics['p50_ms']:9.3f} {metrics['p99_ms']:9.3f} {metrics['qps']:10.1f}")
+    
+    output = args.output or os.path.join(
+        'benchmark-results', f"{time.strftime('%Y%m%d-%H%M%S')}-{(revision['commit'] or 'unknown')[:10]}.json"
+    )
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults written to {output}")
+    
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            if args.fail_on_regression:
+                sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Synthetic temple corpus generator for benchmarks
+Produces records with the same schema as TEMPLES_DATA at any scale
+"""
+
+import random
+from typing import Dict, List
+
+from temple_data import get_all_temples
+
+NAME_PREFIXES = ['Sri', 'Shri', 'Arulmigu', 'Maha', 'Prachin', 'Dakshin', 'Uttar', 'Nava']
+NAME_SUFFIXES = ['Temple', 'Mandir', 'Kovil', 'Devasthanam', 'Shrine', 'Gurdwara']
+FILLER_WORDS = [
+    'gopuram', 'mandapa', 'shikhara', 'garbhagriha', 'festival', 'river', 'hill', 'fort',
+    'dynasty', 'king', 'queen', 'sage', 'legend', 'pond', 'chariot', 'inscription',
+    'pillar', 'bronze', 'granite', 'sandstone', 'monsoon', 'harvest', 'lamp', 'bell',
+]
+
+def generate_temples(count: int, seed: int = 0) -> List[Dict]:
+    """Generate `count` synthetic temples by recombining the sample dataset"""
+    rng = random.Random(seed)
+    base_temples = get_all_temples()
+    temples = []
+    
+    for i in range(count):
+        base = base_temples[rng.randrange(len(base_temples))]
+        extra = ' '.join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(3, 8)))
+        temples.append({
+            "id": i + 1,
+            "name": f"{rng.choice(NAME_PREFIXES)} {base['city']} {rng.choice(NAME_SUFFIXES)} {i + 1}",
+            "deity": base['deity'],
+            "state": base['state'],
+            "city": base['city'],
+            "history": f"{base['history']} {extra}",
+            "photo_url": base['photo_url'],
+            "location": {
+                "lat": round(base['location']['lat'] + rng.uniform(-1.0, 1.0), 4),
+                "lng": round(base['location']['lng'] + rng.uniform(-1.0, 1.0), 4),
+            },
+            "era": base['era'],
+            "architecture": base['architecture'],
+            "significance": base['significance'],
+        })
+    
+    return temples
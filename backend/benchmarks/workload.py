@@ -0,0 +1,74 @@
+"""
+Replayable query workload for the benchmark suite
+A workload is a JSON Lines file of requests drawn from a corpus with a fixed seed; saving it keeps
+the exact same requests comparable across commits even if this generator changes
+"""
+
+import hashlib
+import json
+import random
+from typing import Dict, List
+
+from benchmarks.synthetic import FILLER_WORDS
+
+# Request kinds and their share of a generated workload
+KIND_WEIGHTS = {'query': 0.5, 'filtered': 0.3, 'suggest': 0.2}
+QUERY_TEMPLATES = [
+    "{deity} temples in {state}",
+    "{era} {deity} temple {city}",
+    "famous temples in {city}",
+    "{deity} temple near {city}",
+    "temples within {radius} km of {city}",
+    "{architecture} architecture {filler}",
+    "{name}",
+]
+
+def _query_item(temple: Dict, rng: random.Random) -> Dict:
+    text = rng.choice(QUERY_TEMPLATES).format(
+        deity=temple['deity'], state=temple['state'], city=temple['city'], era=temple['era'].lower(),
+        architecture=temple['architecture'], name=temple['name'], filler=rng.choice(FILLER_WORDS),
+        radius=rng.choice([10, 25, 50, 100]),
+    )
+    return {'kind': 'query', 'text': text, 'filters': None, 'limit': 8}
+
+def _filtered_item(temple: Dict, rng: random.Random) -> Dict:
+    # Facet combinations from one real temple, so every filter matches at least one record
+    choice = rng.randrange(4)
+    if choice == 0:
+        filters = {'deity': temple['deity']}
+    elif choice == 1:
+        filters = {'deity': temple['deity'], 'state': temple['state']}
+    elif choice == 2:
+        filters = {'era': temple['era'], 'architecture': temple['architecture']}
+    else:
+        location = temple['location']
+        filters = {'near': {'lat': location['lat'], 'lng': location['lng'], 'radius_km': rng.choice([25, 100])}}
+    text = f"{rng.choice(FILLER_WORDS)} {rng.choice(FILLER_WORDS)} temple"
+    return {'kind': 'filtered', 'text': text, 'filters': filters, 'limit': 5}
+
+def _suggest_item(temple: Dict, rng: random.Random) -> Dict:
+    source = rng.choice([temple['name'], temple['city'], temple['deity']])
+    return {'kind': 'suggest', 'text': source[:rng.randint(1, min(8, len(source)))].lower(), 'filters': None, 'limit': 5}
+
+def generate_workload(temples: List[Dict], count: int, seed: int = 7) -> List[Dict]:
+    """`count` requests mixing natural language queries, filtered vector searches and autocomplete prefixes"""
+    rng = random.Random(seed)
+    makers = {'query': _query_item, 'filtered': _filtered_item, 'suggest': _suggest_item}
+    kinds = rng.choices(list(KIND_WEIGHTS), weights=list(KIND_WEIGHTS.values()), k=count)
+    return [makers[kind](rng.choice(temples), rng) for kind in kinds]
+
+def save_workload(path: str, items: List[Dict]):
+    with open(path, 'w', encoding='utf-8') as f:
+        for item in items:
+            f.write(json.dumps(item, sort_keys=True) + '\n')
+
+def load_workload(path: str) -> List[Dict]:
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def workload_digest(items: List[Dict]) -> str:
+    """Content hash recorded with results, so runs are only compared when they replayed the same requests"""
+    digest = hashlib.sha256()
+    for item in items:
+        digest.update(json.dumps(item, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()[:16]
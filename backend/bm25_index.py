@@ -0,0 +1,202 @@
+"""
+BM25 lexical retrieval over temple text
+Posting lists live in flat numpy arrays with precomputed impact scores, summed per query into a dense accumulator
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import vector_store as vector_store_module
+from metrics import registry, short_results
+from temple_data import get_temple_text_for_embedding
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Standard BM25 saturation and length normalization parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Extra hits fetched per search to cover temples deleted since the index was last built
+BM25_OVERFETCH = 8
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric words of a text"""
+    return WORD_PATTERN.findall(text.lower())
+
+class BM25Index:
+    """
+    Immutable BM25 index; rows are documents in ascending temple id order
+    Term t owns postings [offsets[t], offsets[t + 1]) of doc_rows (ascending) and impacts,
+    where impacts hold each posting's full BM25 contribution
+    """
+    
+    def __init__(self, temple_ids: Iterable[int], texts: Iterable[str], k1: float = BM25_K1, b: float = BM25_B):
+        ids = np.fromiter(temple_ids, dtype=np.int64)
+        token_lists = [tokenize(text) for text in texts]
+        order = np.argsort(ids, kind='stable')
+        self.ids = ids[order]
+        token_lists = [token_lists[row] for row in order]
+        
+        self.vocab: Dict[str, int] = {}
+        lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=len(token_lists))
+        term_ids = np.fromiter(
+            (self.vocab.setdefault(token, len(self.vocab)) for tokens in token_lists for token in tokens),
+            dtype=np.int64, count=int(lengths.sum()),
+        )
+        doc_rows = np.repeat(np.arange(len(token_lists), dtype=np.int64), lengths)
+        
+        # Count each (term, doc) pair once; keys sort term-major so postings come out grouped by term
+        num_docs = max(len(token_lists), 1)
+        pairs, term_freqs = np.unique(term_ids * num_docs + doc_rows, return_counts=True)
+        posting_terms = pairs // num_docs
+        self.doc_rows = (pairs % num_docs).astype(np.int32)
+        doc_freqs = np.bincount(posting_terms, minlength=len(self.vocab))
+        self.offsets = np.concatenate(([0], np.cumsum(doc_freqs))).astype(np.int64)
+        
+        doc_lengths = lengths.astype(np.float32)
+        average_length = float(doc_lengths.mean()) if len(doc_lengths) else 1.0
+        idf = np.log(1.0 + (len(token_lists) - doc_freqs + 0.5) / (doc_freqs + 0.5))
+        norms = k1 * (1.0 - b + b * doc_lengths[self.doc_rows] / max(average_length, 1e-9))
+        self.impacts = (idf[posting_terms] * term_freqs * (k1 + 1.0) / (term_freqs + norms)).astype(np.float32)
+        self._scratch = threading.local()
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    @property
+    def nbytes(self) -> int:
+        return self.ids.nbytes + self.doc_rows.nbytes + self.offsets.nbytes + self.impacts.nbytes
+    
+    def rows_for_ids(self, temple_ids: np.ndarray) -> np.ndarray:
+        """Boolean row mask selecting the given temple ids"""
+        mask = np.zeros(len(self.ids), dtype=np.bool_)
+        positions = np.searchsorted(self.ids, temple_ids)
+        in_range = positions < len(self.ids)
+        positions = positions[in_range]
+        mask[positions[self.ids[positions] == temple_ids[in_range]]] = True
+        return mask
+    
+    def _accumulator(self) -> np.ndarray:
+        """Per-thread dense score accumulator, all zero between queries"""
+        accumulator = getattr(self._scratch, 'accumulator', None)
+        if accumulator is None:
+            accumulator = np.zeros(len(self.ids), dtype=np.float32)
+            self._scratch.accumulator = accumulator
+        return accumulator
+    
+    def search(self, query: str, top_k: int = 10, allowed: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Top temple ids by BM25 score, optionally limited to rows where allowed is True
+        Every posting of every query term is added into a dense accumulator and the top k are
+        partitioned out of it; common terms cover most documents, so pruning posting lists saves less
+        than its bookkeeping costs
+        """
+        terms = {self.vocab[token] for token in tokenize(query) if token in self.vocab}
+        if not terms or top_k <= 0 or not len(self.ids):
+            return []
+        
+        accumulator = self._accumulator()
+        try:
+            for term in terms:
+                start, end = self.offsets[term], self.offsets[term + 1]
+                accumulator[self.doc_rows[start:end]] += self.impacts[start:end]  # Rows are unique within one list
+            scores = accumulator if allowed is None else np.where(allowed, accumulator, np.float32(0.0))
+            # Partition the negated scores: selecting the largest k of an array that is mostly zeros
+            # is far slower than selecting the smallest k
+            negated = -scores
+            count = min(top_k, len(scores))
+            best = np.argpartition(negated, count - 1)[:count]
+            best = best[np.argsort(negated[best], kind='stable')]
+            return [(int(self.ids[row]), float(scores[row])) for row in best if scores[row] > 0]
+        finally:
+            accumulator.fill(0.0)
+
+class LexicalIndex:
+    """
+    BM25 index over the global vector store's temples, rebuilt in the background when the store's
+    version changes; until a rebuild lands, deleted temples are skipped and new ones are not yet found
+    """
+    
+    def __init__(self):
+        self._index: Optional[BM25Index] = None
+        self._version = None
+        self._lock = threading.Lock()
+        self._rebuilding = False
+        self.build_seconds = 0.0
+    
+    @property
+    def version(self) -> Optional[str]:
+        """Store version the served index was built from, None before the first build"""
+        return self._version
+    
+    def _build(self):
+        store = vector_store_module.vector_store
+        start = time.perf_counter()
+        with store._lock.read():
+            version = store.version
+            temples = store.temples_data.live_records()
+        index = BM25Index(temples.ids.tolist(), map(get_temple_text_for_embedding, temples))
+        self.build_seconds = time.perf_counter() - start
+        self._index, self._version = index, version
+    
+    def _rebuild(self):
+        try:
+            self._build()
+        finally:
+            self._rebuilding = False
+    
+    def _after_fork(self):
+        """A forked child has no rebuild thread, so nothing it inherited may claim one is running"""
+        self._lock = threading.Lock()
+        self._rebuilding = False
+    
+    def current(self) -> BM25Index:
+        """The latest built index, building it on first use and refreshing it off the request path"""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._build()
+        elif self._version != vector_store_module.vector_store.version:
+            with self._lock:
+                if self._rebuilding:
+                    return self._index
+                self._rebuilding = True
+            threading.Thread(target=self._rebuild, name='bm25-rebuild', daemon=True).start()
+        return self._index
+    
+    def search(self, query: str, filters: Optional[dict] = None, top_k: int = 10) -> List[Tuple[dict, float]]:
+        """(temple, BM25 score) pairs for the query, honouring the same filters as vector search"""
+        store = vector_store_module.vector_store
+        index = self.current()
+        allowed = None
+        if filters:
+            candidate_ids = store.filter_ids(filters)
+            if candidate_ids is not None:
+                allowed = index.rows_for_ids(candidate_ids)
+        # Ask for a little more than top_k so temples deleted since the last build do not leave gaps
+        hits = index.search(query, top_k + BM25_OVERFETCH, allowed)
+        results = []
+        for temple_id, score in hits:
+            temple = store.temples_data.get(temple_id)
+            if temple is not None:
+                results.append((temple, score))
+                if len(results) == top_k:
+                    break
+        if len(results) < top_k and len(hits) == top_k + BM25_OVERFETCH:
+            # More deletions since the last build than the over-fetch covers
+            short_results.inc('bm25')
+        return results
+
+# Global lexical index over the served temples
+lexical_index = LexicalIndex()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=lexical_index._after_fork)
+registry.gauge('temple_bm25_index_bytes', 'Bytes held by the BM25 postings', lambda: lexical_index._index.nbytes)
+
+def search_temples_bm25(query: str, filters: dict = None, top_k: int = 10) -> List[Tuple[dict, float]]:
+    """Keyword search over temple text with BM25 ranking"""
+    return lexical_index.search(query, filters, top_k)
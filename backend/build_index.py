@@ -0,0 +1,42 @@
+"""
+Build step for the temple vector index
+Embeds the dataset once and writes a versioned artifact that workers load memory-mapped
+"""
+
+import argparse
+import os
+import time
+
+from temple_data import DATA_PATH
+from temple_loader import build_store_from_file
+from vector_store import BUILD_BATCH_SIZE, INDEX_TYPES, TempleVectorStore
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the TempleSeeker vector index artifact")
+    parser.add_argument("output_dir", help="Directory to write index.faiss and metadata.json into")
+    parser.add_argument("--source", help="Stream temples from a .jsonl, .csv or .parquet file instead of temple_data")
+    parser.add_argument("--chunk-size", type=int, default=BUILD_BATCH_SIZE, help="Temples per streamed chunk")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, help="Override TEMPLE_INDEX_TYPE")
+    args = parser.parse_args()
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    
+    start = time.perf_counter()
+    if args.source:
+        store = build_store_from_file(args.source, chunk_size=args.chunk_size, index_type=args.index_type)
+    else:
+        # Indexes the catalog's own table: the TEMPLE_DATA_PATH dataset, or the sample temples without it
+        store = TempleVectorStore(index_type=args.index_type)
+    store.save(args.output_dir)
+    elapsed = time.perf_counter() - start
+    
+    print(f"Indexed {len(store.temple_ids)} temples into {args.output_dir} in {elapsed:.2f}s")
+    # The server only loads an artifact built from the dataset it serves itself
+    source = args.source or DATA_PATH
+    if source:
+        print(f"Serve it with TEMPLE_DATA_PATH={os.path.abspath(source)} TEMPLE_INDEX_DIR={args.output_dir}")
+    else:
+        print(f"Serve it with TEMPLE_INDEX_DIR={args.output_dir} and TEMPLE_DATA_PATH unset")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,489 @@
+"""
+Embedding backends for the temple vector store
+Bag-of-words and feature-hashing embeddings built in, plus local ONNX sentence-embedding models
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import chain, repeat
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from temple_data import get_all_temples, get_temple_text_for_embedding
+
+# Embedding configuration: vocab gives each known word the dimension vocab id % dimension; hashed
+# uses signed feature hashing with no vocabulary, meant for large dimensions and the sparse index;
+# onnx runs a sentence-embedding model from TEMPLE_EMBEDDING_MODEL_DIR
+EMBEDDING_TYPES = ('vocab', 'hashed', 'onnx')
+EMBEDDING_TYPE = os.environ.get('TEMPLE_EMBEDDING', 'vocab')
+DEFAULT_DIMENSIONS = {'vocab': 384, 'hashed': 2 ** 18}
+EMBEDDING_DIMENSION = int(os.environ.get('TEMPLE_EMBEDDING_DIM', '0'))  # 0 picks DEFAULT_DIMENSIONS
+
+# Directory holding model.onnx and tokenizer.json for the onnx backend, supplied offline
+EMBEDDING_MODEL_DIR = os.environ.get('TEMPLE_EMBEDDING_MODEL_DIR')
+# Texts per model call and threads running calls in parallel; each call uses one intra-op thread
+EMBED_BATCH_SIZE = int(os.environ.get('TEMPLE_EMBED_BATCH_SIZE', '32'))
+EMBED_THREADS = int(os.environ.get('TEMPLE_EMBED_THREADS', str(os.cpu_count() or 1)))
+# Tokens per text the model sees; longer texts are truncated
+EMBED_MAX_TOKENS = int(os.environ.get('TEMPLE_EMBED_MAX_TOKENS', '256'))
+# SQLite file of document vectors keyed by model and text hash; unset disables the disk cache
+EMBEDDING_CACHE_PATH = os.environ.get('TEMPLE_EMBEDDING_CACHE')
+
+def normalize_query_text(text: str) -> str:
+    """Case-fold and collapse whitespace so equivalent queries share one cache key"""
+    return ' '.join(text.lower().split())
+
+class QueryEmbeddingCache:
+    """Bounded LRU cache of query embeddings with hit/miss counters"""
+    
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # Bumped by clear, so embeddings computed before it are not cached after it
+        self.generation = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+    
+    def put(self, key: str, embedding: np.ndarray, generation: Optional[int] = None):
+        """Cache an embedding, unless the cache was cleared since generation was read"""
+        # Cached arrays are shared between callers, so make sure nobody mutates them
+        embedding.setflags(write=False)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+    
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+class EmbeddingDiskCache:
+    """
+    Document vectors in a SQLite file, keyed by a hash of the model id and the text
+    Re-indexing finds every unchanged temple here and only runs the model on new or edited text
+    """
+    
+    # SQLite caps the number of bound parameters per statement
+    LOOKUP_CHUNK = 500
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB)')
+    
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections cannot be shared across threads, so each thread opens its own
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30.0)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+    
+    @staticmethod
+    def key(model_id: str, text: str) -> bytes:
+        return hashlib.sha256(f"{model_id}\0{text}".encode('utf-8')).digest()
+    
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        found = {}
+        connection = self._connection()
+        for start in range(0, len(keys), self.LOOKUP_CHUNK):
+            chunk = keys[start:start + self.LOOKUP_CHUNK]
+            rows = connection.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            )
+            found.update((key, np.frombuffer(vector, dtype=np.float32)) for key, vector in rows)
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+    
+    def put_many(self, items: Iterable[Tuple[bytes, np.ndarray]]):
+        with self._connection() as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)',
+                ((key, np.ascontiguousarray(vector, dtype=np.float32).tobytes()) for key, vector in items),
+            )
+    
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'path': self.path,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+class EmbeddingBackend:
+    """
+    Turns text into unit-length float32 vectors for TempleVectorStore
+    Subclasses implement _embed_batch; documents go through the optional disk cache and
+    queries through the in-memory LRU
+    """
+    
+    embedding_type = None
+    
+    def __init__(self, dimension: int, cache_size: int = 4096, disk_cache: Optional[EmbeddingDiskCache] = None):
+        self.dimension = dimension
+        self.query_cache = QueryEmbeddingCache(cache_size)
+        self.disk_cache = disk_cache
+    
+    @property
+    def model_id(self) -> Optional[str]:
+        """Names the vectors this backend produces; None when they depend on mutable state like a vocabulary"""
+        return None
+    
+    def metadata(self) -> Dict:
+        """What an index artifact records to recreate this backend with create_embedding"""
+        return {'embedding': self.embedding_type, 'dimension': self.dimension, 'model_id': self.model_id}
+    
+    def extend_vocab(self, texts: Iterable[str]) -> int:
+        """Prepare for embedding new texts, returning how many vocabulary words were added"""
+        return 0
+    
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+    
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed many texts at once; returns a contiguous float32 matrix with one row per text"""
+        if self.disk_cache is None or self.model_id is None:
+            return self._embed_batch(texts)
+        
+        keys = [EmbeddingDiskCache.key(self.model_id, text) for text in texts]
+        cached = self.disk_cache.get_many(keys)
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        if missing:
+            fresh = self._embed_batch([texts[i] for i in missing])
+            embeddings[missing] = fresh
+            self.disk_cache.put_many(zip((keys[i] for i in missing), fresh))
+        for i, key in enumerate(keys):
+            vector = cached.get(key)
+            if vector is not None:
+                embeddings[i] = vector
+        return embeddings
+    
+    def embed_sparse(self, texts: List[str]) -> sparse.csr_matrix:
+        """Embed many texts as a float32 CSR matrix, for the sparse index"""
+        return sparse.csr_matrix(self.embed_batch(texts))
+    
+    def embed_queries(self, texts: List[str]) -> np.ndarray:
+        """Embed several queries as one matrix, batch-embedding only the cache misses"""
+        keys = [normalize_query_text(text) for text in texts]
+        generation = self.query_cache.generation
+        embeddings = [self.query_cache.get(key) for key in keys]
+        missing = sorted({key for key, embedding in zip(keys, embeddings) if embedding is None})
+        
+        if missing:
+            # Queries skip the disk cache; it holds document vectors
+            fresh = dict(zip(missing, self._embed_batch(missing)))
+            for key, embedding in fresh.items():
+                self.query_cache.put(key, embedding, generation)
+            embeddings = [fresh[key] if embedding is None else embedding for key, embedding in zip(keys, embeddings)]
+        
+        if not embeddings:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return np.ascontiguousarray(np.vstack(embeddings))
+    
+    def embed_query(self, text: str) -> np.ndarray:
+        """Embed a search query, serving repeats from the LRU cache"""
+        return self.embed_queries([text])[0]
+
+class SimpleEmbedding(EmbeddingBackend):
+    """Simple embedding class that creates basic text embeddings"""
+    
+    embedding_type = 'vocab'
+    
+    def __init__(self, dimension=384, vocab: Optional[Dict[str, int]] = None, temples: List[dict] = None,
+                 noise_scale: float = 0.0, cache_size: int = 4096):
+        super().__init__(dimension, cache_size)
+        # Noise is seeded from the text itself, so embeddings stay reproducible even when enabled
+        self.noise_scale = noise_scale
+        # Simple vocabulary for basic embedding simulation
+        self.vocab = {}
+        if vocab is not None:
+            self.vocab.update(vocab)
+        else:
+            self._build_vocab(temples)
+    
+    def _build_vocab(self, temples: List[dict] = None):
+        """Build vocabulary from temple data"""
+        if temples is None:
+            temples = get_all_temples()
+        words = set()
+        
+        for temple in temples:
+            text = get_temple_text_for_embedding(temple).lower()
+            words.update(text.split())
+        
+        # Add common temple-related words
+        temple_words = [
+            'temple', 'shiva', 'vishnu', 'parvati', 'ancient', 'medieval', 'modern',
+            'dravidian', 'north', 'south', 'india', 'pilgrimage', 'heritage', 'jyotirlinga',
+            'tamil', 'nadu', 'uttar', 'pradesh', 'gujarat', 'punjab', 'odisha', 'kerala',
+            'karnataka', 'rajasthan', 'maharashtra', 'andhra', 'telangana', 'bihar',
+            'jharkhand', 'chhattisgarh', 'madhya', 'himachal', 'uttarakhand', 'haryana',
+            'delhi', 'goa', 'assam', 'bengal', 'tripura', 'manipur', 'nagaland', 'mizoram'
+        ]
+        
+        words.update(temple_words)
+        
+        for i, word in enumerate(sorted(words)):
+            self.vocab[word] = i
+    
+    def metadata(self) -> Dict:
+        # The vocabulary is replaced, never changed, once built, so this is a consistent snapshot
+        return {**super().metadata(), 'noise_scale': self.noise_scale, 'vocab': self.vocab}
+    
+    def extend_vocab(self, texts: Iterable[str]) -> int:
+        """Give unseen words the next free ids, returning how many were added"""
+        new_words = set()
+        for text in texts:
+            new_words.update(word for word in text.lower().split() if word not in self.vocab)
+        if not new_words:
+            return 0
+        
+        # Existing ids never move, so vectors already in the index keep their meaning; the extended copy
+        # replaces the vocabulary in one step, so readers and metadata() never see it half-written
+        vocab = dict(self.vocab)
+        for word in sorted(new_words):
+            vocab[word] = len(vocab)
+        self.vocab = vocab
+        # Cached queries may contain words that now carry weight
+        self.query_cache.clear()
+        return len(new_words)
+    
+    def _features(self, words: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Dimension and sign of each word; dimension -1 marks words the embedding ignores"""
+        vocab_ids = np.fromiter(map(self.vocab.get, words, repeat(-1)), dtype=np.int64, count=len(words))
+        dimensions = np.where(vocab_ids >= 0, vocab_ids % self.dimension, -1)
+        return dimensions, np.ones(len(words))
+    
+    def embed_text(self, text: str) -> np.ndarray:
+        """Create a simple embedding for text"""
+        words = text.lower().split()
+        embedding = np.zeros(self.dimension)
+        dimensions, signs = self._features(words)
+        
+        # Simple bag-of-words with position encoding
+        for i in np.flatnonzero(dimensions >= 0):
+            embedding[dimensions[i]] += signs[i] / (i + 1)  # Position weighting
+        
+        # Optional deterministic noise for better separation
+        if self.noise_scale:
+            rng = np.random.default_rng(zlib.crc32(' '.join(words).encode('utf-8')))
+            embedding += rng.normal(0, self.noise_scale, self.dimension)
+        
+        # Normalize
+        norm = np.linalg.norm(embedding)
+        if norm > 0:
+            embedding = embedding / norm
+        
+        return embedding.astype(np.float32)
+    
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        if self.noise_scale:
+            return np.vstack([self.embed_text(text) for text in texts])
+        return np.ascontiguousarray(self.embed_sparse(texts).toarray())
+    
+    def embed_sparse(self, texts: List[str]) -> sparse.csr_matrix:
+        """Embed many texts as a float32 CSR matrix, never materializing dense rows"""
+        if self.noise_scale:
+            # Noise touches every dimension, so there is nothing sparse left to keep
+            return sparse.csr_matrix(np.vstack([self.embed_text(text) for text in texts]))
+        
+        # Tokenize the whole batch once and flatten it into parallel token/row/position arrays
+        token_lists = [text.lower().split() for text in texts]
+        lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=len(token_lists))
+        total_tokens = int(lengths.sum())
+        dimensions, signs = self._features(list(chain.from_iterable(token_lists)))
+        rows = np.repeat(np.arange(len(texts)), lengths)
+        starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        positions = np.arange(total_tokens) - starts
+        
+        # Same position weighting as embed_text; ignored tokens still consume a position
+        known = dimensions >= 0
+        term_matrix = sparse.csr_matrix(
+            (signs[known] / (positions[known] + 1), (rows[known], dimensions[known])),
+            shape=(len(texts), self.dimension),
+        )
+        term_matrix.sum_duplicates()
+        
+        # Normalize every row together, leaving all-zero rows untouched
+        norms = np.sqrt(np.asarray(term_matrix.multiply(term_matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        term_matrix = sparse.diags(1.0 / norms) @ term_matrix
+        
+        return term_matrix.astype(np.float32).tocsr()
+
+@lru_cache(maxsize=1 << 20)
+def _word_hash(word: str) -> int:
+    # Python's hash() is salted per process; embeddings must agree across workers and artifacts
+    return int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest(), 'little')
+
+class HashedEmbedding(SimpleEmbedding):
+    """
+    Signed feature hashing: every word hashes to a dimension and a sign, with no vocabulary to build
+    Words that collide cancel out on average instead of adding up, and a large dimension keeps
+    collisions rare; pair it with the sparse index so documents never become dense vectors
+    """
+    
+    embedding_type = 'hashed'
+    
+    def __init__(self, dimension: int = DEFAULT_DIMENSIONS['hashed'], noise_scale: float = 0.0,
+                 cache_size: int = 4096):
+        super().__init__(dimension, vocab={}, noise_scale=noise_scale, cache_size=cache_size)
+    
+    def extend_vocab(self, texts: Iterable[str]) -> int:
+        """Every word already has a dimension, so there is never anything to add"""
+        return 0
+    
+    def _features(self, words: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        hashes = np.fromiter(map(_word_hash, words), dtype=np.uint64, count=len(words))
+        # The top bit picks the sign and the rest pick the dimension, so the two are independent
+        dimensions = ((hashes & np.uint64(2 ** 63 - 1)) % np.uint64(self.dimension)).astype(np.int64)
+        signs = np.where(hashes >> np.uint64(63), -1.0, 1.0)
+        return dimensions, signs
+
+class OnnxEmbedding(EmbeddingBackend):
+    """
+    Sentence-embedding model exported to ONNX and run on CPU with ONNX Runtime
+    model_dir holds model.onnx and a Hugging Face tokenizer.json. Texts are sorted by length so
+    batches carry little padding, and batches run in parallel on a thread pool (ONNX Runtime
+    releases the GIL). Token outputs are mean-pooled over the attention mask and L2-normalized
+    """
+    
+    embedding_type = 'onnx'
+    
+    def __init__(self, model_dir: str, batch_size: int = EMBED_BATCH_SIZE, threads: int = EMBED_THREADS,
+                 max_tokens: int = EMBED_MAX_TOKENS, cache_size: int = 4096,
+                 disk_cache: Optional[EmbeddingDiskCache] = None):
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError("The onnx embedding backend requires onnxruntime and tokenizers "
+                              "(pip install onnxruntime tokenizers)") from e
+        
+        model_path = os.path.join(model_dir, 'model.onnx')
+        tokenizer_path = os.path.join(model_dir, 'tokenizer.json')
+        digest = hashlib.sha256()
+        for path in (model_path, tokenizer_path):
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        self._model_id = f"onnx:{digest.hexdigest()[:16]}:{max_tokens}"
+        
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_tokens)
+        if self.tokenizer.padding is None:
+            self.tokenizer.enable_padding()
+        
+        options = onnxruntime.SessionOptions()
+        # Parallelism comes from running batches side by side, not from threads inside one call
+        options.intra_op_num_threads = 1 if threads > 1 else 0
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.batch_size = max(batch_size, 1)
+        self.threads = max(threads, 1)
+        self._executor = ThreadPoolExecutor(self.threads, thread_name_prefix='embed') if self.threads > 1 else None
+        
+        # Output widths are often symbolic in exported graphs, so measure the model instead
+        super().__init__(self._run(['temple']).shape[1], cache_size, disk_cache)
+    
+    @property
+    def model_id(self) -> str:
+        return self._model_id
+    
+    def _run(self, texts: List[str]) -> np.ndarray:
+        """One model call over a batch of texts"""
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if 'token_type_ids' in self._input_names:
+            feeds['token_type_ids'] = np.zeros_like(input_ids)
+        output = self.session.run(None, {name: value for name, value in feeds.items() if name in self._input_names})[0]
+        
+        if output.ndim == 3:
+            # Token embeddings: average the real tokens, ignoring padding
+            mask = attention_mask[:, :, None].astype(np.float32)
+            output = (output * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1.0)
+        norms = np.linalg.norm(output, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (output / norms).astype(np.float32)
+    
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        batches = [[texts[i] for i in order[start:start + self.batch_size]]
+                   for start in range(0, len(order), self.batch_size)]
+        if self._executor is None or len(batches) == 1:
+            outputs = [self._run(batch) for batch in batches]
+        else:
+            outputs = list(self._executor.map(self._run, batches))
+        
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        embeddings[order] = np.vstack(outputs)
+        return embeddings
+
+def create_embedding(embedding_type: Optional[str] = None, dimension: int = 0, temples: Iterable[dict] = None,
+                     vocab: Optional[Dict[str, int]] = None, noise_scale: float = 0.0,
+                     model_dir: Optional[str] = None) -> EmbeddingBackend:
+    """
+    Embedding backend of the given type; dimension 0 uses TEMPLE_EMBEDDING_DIM or the type's default
+    The onnx backend takes its dimension from the model and caches document vectors on disk when
+    TEMPLE_EMBEDDING_CACHE is set
+    """
+    embedding_type = (embedding_type or EMBEDDING_TYPE).lower()
+    if embedding_type not in EMBEDDING_TYPES:
+        raise ValueError(f"Unknown embedding type '{embedding_type}', expected one of {', '.join(EMBEDDING_TYPES)}")
+    
+    if embedding_type == 'onnx':
+        model_dir = model_dir or EMBEDDING_MODEL_DIR
+        if not model_dir:
+            raise ValueError("The onnx embedding backend needs TEMPLE_EMBEDDING_MODEL_DIR")
+        disk_cache = EmbeddingDiskCache(EMBEDDING_CACHE_PATH) if EMBEDDING_CACHE_PATH else None
+        return OnnxEmbedding(model_dir, disk_cache=disk_cache)
+    
+    dimension = dimension or EMBEDDING_DIMENSION or DEFAULT_DIMENSIONS[embedding_type]
+    if embedding_type == 'hashed':
+        return HashedEmbedding(dimension, noise_scale=noise_scale)
+    return SimpleEmbedding(dimension, vocab=vocab, temples=temples, noise_scale=noise_scale)
@@ -0,0 +1,119 @@
+"""
+Spatial index over temple coordinates
+Points live on the unit sphere in a KD-tree, so radius and nearest-neighbour queries follow great-circle distance
+"""
+
+import copy
+from typing import Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+# Writes are patched in until removed and added points exceed this fraction of the tree (see GeoIndex)
+OVERLAY_FRACTION = 16
+MIN_OVERLAY_POINTS = 1024
+
+def to_unit_vectors(lat, lng) -> np.ndarray:
+    """Latitude/longitude in degrees to 3-D points on the unit sphere"""
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lng = np.radians(np.asarray(lng, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lng), cos_lat * np.sin(lng), np.sin(lat)))
+
+def chord_for_km(distance_km: float) -> float:
+    """Straight-line distance through the unit sphere between points distance_km apart on the surface"""
+    angle = min(distance_km / EARTH_RADIUS_KM, np.pi)
+    return 2.0 * np.sin(angle / 2.0)
+
+def km_for_chord(chord: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km for unit-sphere chord lengths"""
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2.0, 0.0, 1.0))
+
+def haversine_km(lat1: float, lng1: float, lat2, lng2) -> np.ndarray:
+    """Great-circle distance in km from one point to one or more others"""
+    lat1, lng1 = np.radians(lat1), np.radians(lng1)
+    lat2, lng2 = np.radians(np.asarray(lat2, dtype=np.float64)), np.radians(np.asarray(lng2, dtype=np.float64))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+class GeoIndex:
+    """
+    KD-tree of temple ids by location, patched by writes rather than rebuilt
+    A patched index masks ids removed from the tree and scans added points directly; updated() returns
+    None once those outnumber OVERLAY_FRACTION of the tree, and the caller rebuilds it from scratch
+    """
+
+    def __init__(self, ids: np.ndarray, lat: np.ndarray, lng: np.ndarray):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.points = to_unit_vectors(lat, lng)
+        # scipy.spatial adds ~0.1s to import, so only radius searches pay for it
+        from scipy.spatial import cKDTree
+        self.tree = cKDTree(self.points) if len(self.ids) else None
+        # Sorted ids whose tree points no longer count, and points added since the tree was built
+        self.removed = np.empty(0, dtype=np.int64)
+        self.added_ids = np.empty(0, dtype=np.int64)
+        self.added_points = np.empty((0, 3))
+
+    def __len__(self):
+        return len(self.ids) - int(np.count_nonzero(np.isin(self.ids, self.removed))) + len(self.added_ids)
+
+    def updated(self, removed_ids, ids, lat, lng) -> Optional['GeoIndex']:
+        """
+        A copy with removed_ids dropped and the given points added (re-adding an id moves it), or None
+        when the changes have grown large enough that rebuilding is cheaper than scanning them
+        """
+        removed_ids = np.asarray(removed_ids, dtype=np.int64)
+        removed = np.union1d(self.removed, removed_ids)
+        keep = ~np.isin(self.added_ids, removed_ids)
+        added_ids = np.concatenate([self.added_ids[keep], np.asarray(ids, dtype=np.int64)])
+        if len(removed) + len(added_ids) > max(MIN_OVERLAY_POINTS, len(self.ids) // OVERLAY_FRACTION):
+            return None
+        geo = copy.copy(self)
+        geo.removed, geo.added_ids = removed, added_ids
+        geo.added_points = np.concatenate([self.added_points[keep], to_unit_vectors(lat, lng).reshape(-1, 3)])
+        return geo
+
+    def _distances_km(self, point: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        return km_for_chord(np.linalg.norm(self.points[rows] - point, axis=1))
+
+    def _with_added(self, point: np.ndarray, ids: np.ndarray, distances: np.ndarray,
+                    max_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Tree hits minus removed ids, plus added points within max_km, nearest first"""
+        live = ~np.isin(ids, self.removed)
+        ids, distances = ids[live], distances[live]
+        if len(self.added_ids):
+            added = km_for_chord(np.linalg.norm(self.added_points - point, axis=1))
+            near = added <= max_km
+            ids = np.concatenate([ids, self.added_ids[near]])
+            distances = np.concatenate([distances, added[near]])
+        order = np.argsort(distances, kind='stable')
+        return ids[order], distances[order]
+
+    def within(self, lat: float, lng: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Ids and distances of temples within radius_km, nearest first"""
+        if radius_km < 0 or (self.tree is None and not len(self.added_ids)):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        point = to_unit_vectors([lat], [lng])[0]
+        rows = np.empty(0, dtype=np.int64)
+        if self.tree is not None:
+            rows = np.asarray(self.tree.query_ball_point(point, chord_for_km(radius_km)), dtype=np.int64)
+        # Tree hits are filtered on their chord; added points on the same distance, with a little slack
+        return self._with_added(point, self.ids[rows], self._distances_km(point, rows), radius_km * (1 + 1e-9))
+
+    def nearest(self, lat: float, lng: float, k: int, radius_km: float = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Ids and distances of the k nearest temples, optionally no farther than radius_km"""
+        if k <= 0 or (self.tree is None and not len(self.added_ids)):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        point = to_unit_vectors([lat], [lng])[0]
+        ids, distances = np.empty(0, dtype=np.int64), np.empty(0)
+        if self.tree is not None:
+            upper_bound = chord_for_km(radius_km) * (1 + 1e-9) if radius_km is not None else np.inf
+            # Removed ids may take some of the k nearest places, so ask for enough to still have k
+            count = min(k + len(self.removed), len(self.ids))
+            chords, rows = self.tree.query(point, k=count, distance_upper_bound=upper_bound)
+            chords, rows = np.atleast_1d(chords), np.atleast_1d(rows)
+            found = rows < len(self.ids)  # Missing neighbours come back as len(ids)
+            ids, distances = self.ids[rows[found]], km_for_chord(chords[found])
+        max_km = radius_km * (1 + 1e-9) if radius_km is not None else np.inf
+        ids, distances = self._with_added(point, ids, distances, max_km)
+        return ids[:k], distances[:k]
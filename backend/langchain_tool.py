@@ -3,9 +3,104 @@ LangChain integration for natural language query processing
 Simulates GPT-4 agent functionality for temple search
 """
 
+import os
 import re
-from typing import Dict, List, Tuple
-from vector_store import search_temples_vector
+from typing import Dict, List, Optional, Tuple
+from autocomplete import autocomplete
+from bm25_index import lexical_index, search_temples_bm25, tokenize
+from geo_index import haversine_km
+from metrics import errors, stage_timer
+from temple_data import catalog
+from vector_store import DEFAULT_NEAR_RADIUS_KM, NEAR_FILTER, search_temples_vector, search_temples_vector_batch
+
+# Fuse BM25 keyword results with vector results; set TEMPLE_HYBRID_SEARCH=0 for vector search only
+HYBRID_SEARCH = os.environ.get('TEMPLE_HYBRID_SEARCH', '1') != '0'
+# Reciprocal-rank fusion constant; larger values flatten the advantage of top ranks
+RRF_K = 60
+# Results returned per query, and candidates taken from each retriever before fusion
+RESULT_COUNT = 8
+FUSION_CANDIDATES = 20
+
+# "within 20 km of Madurai", "within 5 miles"
+RADIUS_PATTERN = re.compile(
+    r"\bwithin\s+(\d+(?:\.\d+)?)\s*(km|kms|kilometers?|kilometres?|mi|miles?)\b(?:\s+(?:of|from|around)\s+([a-z][a-z .]*))?"
+)
+# "near Madurai", "close to Thanjavur", "near me"
+NEAR_PATTERN = re.compile(r"\b(?:near|around|close to)\s+([a-z][a-z .]*)")
+# Places that mean the caller's own location
+SELF_PLACES = ('me', 'here', 'my location', 'my current location')
+# Words that end a place name inside a radius or near phrase
+PLACE_STOP_WORDS = {'within', 'with', 'for', 'and', 'that', 'which', 'temple', 'temples', 'in'}
+KM_PER_MILE = 1.609344
+# Words of a query in their original case, for aliases matched case-sensitively
+CASED_WORD_PATTERN = re.compile(r"[A-Za-z0-9]+")
+
+# A query without a deity, state, era or region must score at least this against some temple's text to
+# become a suggestion; glue words like "temple in" score well below it
+SUGGEST_MIN_LEXICAL_SCORE = float(os.environ.get('TEMPLE_SUGGEST_MIN_LEXICAL_SCORE', '1.0'))
+# Words a suggestion may use besides catalog terms and keyword aliases
+QUERY_WORDS = {
+    'temple', 'temples', 'in', 'of', 'from', 'to', 'and', 'with', 'near', 'nearby', 'around', 'close', 'within',
+    'me', 'here', 'my', 'current', 'location', 'km', 'kms', 'kilometers', 'kilometres', 'mi', 'miles'
+}
+# Keyword groups that name what a temple is, as opposed to words that only enhance the query
+ENTITY_GROUPS = ('deity', 'state', 'era', 'region')
+
+def fuse_rankings(rankings: List[List[Tuple[Dict, float]]], top_k: int, k: int = RRF_K) -> List[Tuple[Dict, float]]:
+    """
+    Reciprocal-rank fusion of (temple, score) lists
+    Scores are scaled so a temple ranked first by every list gets 1.0
+    """
+    fused: Dict[int, float] = {}
+    temples: Dict[int, Dict] = {}
+    for ranking in rankings:
+        for rank, (temple, _) in enumerate(ranking, start=1):
+            fused[temple['id']] = fused.get(temple['id'], 0.0) + 1.0 / (k + rank)
+            temples.setdefault(temple['id'], temple)
+    
+    best_possible = len(rankings) / (k + 1)
+    ranked = sorted(fused.items(), key=lambda item: -item[1])[:top_k]
+    return [(temples[temple_id], score / best_possible) for temple_id, score in ranked]
+
+class KeywordMatcher:
+    """
+    Whole-word keyword matcher built once from {group: {value: [aliases]}} tables
+    Aliases may span several words and the longest alias starting at a word wins, so the words it
+    covers are not matched again on their own; matching costs one dict probe per word and alias
+    length, however many aliases the tables hold. Aliases written in capitals ("UP") match only
+    words written the same way, other aliases match words in any case
+    """
+    
+    def __init__(self, tables: Dict[str, Dict[str, List[str]]]):
+        # Alias word tuple -> (group, priority, value) for every table entry using that alias
+        self._aliases: Dict[Tuple[str, ...], List[Tuple[str, int, str]]] = {}
+        self.max_words = 1
+        for group, table in tables.items():
+            for priority, (value, aliases) in enumerate(table.items()):
+                for alias in aliases:
+                    words = tuple(CASED_WORD_PATTERN.findall(alias) if alias.isupper() else tokenize(alias))
+                    if words:
+                        self._aliases.setdefault(words, []).append((group, priority, value))
+                        self.max_words = max(self.max_words, len(words))
+    
+    def match(self, text: str) -> Dict[str, List[str]]:
+        """Values matched per group, in table order, from a single pass over the words of text"""
+        cased = CASED_WORD_PATTERN.findall(text)
+        words = [word.lower() for word in cased]
+        found: Dict[str, Dict[int, str]] = {}
+        start = 0
+        while start < len(words):
+            step = 1
+            for length in range(min(self.max_words, len(words) - start), 0, -1):
+                entries = (self._aliases.get(tuple(words[start:start + length]))
+                           or self._aliases.get(tuple(cased[start:start + length])))
+                if entries:
+                    for group, priority, value in entries:
+                        found.setdefault(group, {})[priority] = value
+                    step = length
+                    break
+            start += step
+        return {group: [values[priority] for priority in sorted(values)] for group, values in found.items()}
 
 class TempleQueryProcessor:
     """Processes natural language queries about temples"""
@@ -20,13 +115,16 @@ class TempleQueryProcessor:
             'guru nanak': ['guru', 'nanak', 'sikh', 'gurdwara']
         }
         
+        # Full names come first and win over their parts; words shared by several states are not
+        # aliases on their own, and abbreviations that are also English words are written in capitals
+        # so "temples in UP" names the state but "pick up" does not
         self.state_keywords = {
-            'tamil nadu': ['tamil', 'nadu', 'tn'],
-            'uttar pradesh': ['uttar', 'pradesh', 'up'],
+            'tamil nadu': ['tamil nadu', 'tamil', 'tn'],
+            'uttar pradesh': ['uttar pradesh', 'uttar', 'UP'],
             'gujarat': ['gujarat', 'guj'],
             'punjab': ['punjab', 'pb'],
             'odisha': ['odisha', 'orissa'],
-            'andhra pradesh': ['andhra', 'pradesh', 'ap'],
+            'andhra pradesh': ['andhra pradesh', 'andhra', 'ap'],
             'uttarakhand': ['uttarakhand', 'uk']
         }
         
@@ -42,46 +140,88 @@ class TempleQueryProcessor:
             'west india': ['west', 'western'],
             'east india': ['east', 'eastern']
         }
+        
+        # Search terms appended to queries that use any of the listed words
+        self.enhancement_keywords = {
+            'pilgrimage heritage significance': ['famous', 'popular', 'important'],
+            'ancient heritage historical': ['ancient', 'old', 'historic'],
+            'architecture dravidian carved sculpture': ['architecture', 'beautiful', 'carved']
+        }
+        
+        # Words that make a temple's significance part of its match reason
+        self.significance_keywords = {
+            'significance': ['famous', 'important', 'heritage']
+        }
+        
+        # One matcher over every table so each query is scanned once
+        self.matcher = KeywordMatcher({
+            'deity': self.deity_keywords,
+            'state': self.state_keywords,
+            'era': self.era_keywords,
+            'region': self.region_keywords,
+            'enhancement': self.enhancement_keywords,
+            'significance': self.significance_keywords
+        })
+        
+        # Words a suggestion may contain besides the terms of the current catalog
+        self.known_words = set(QUERY_WORDS)
+        for table in (self.deity_keywords, self.state_keywords, self.era_keywords, self.region_keywords,
+                      self.enhancement_keywords, self.significance_keywords):
+            for aliases in table.values():
+                for alias in aliases:
+                    self.known_words.update(tokenize(alias))
+        for suggestion in autocomplete.curated:
+            self.known_words.update(tokenize(suggestion))
     
-    def extract_filters(self, query: str) -> Dict:
-        """Extract filters from natural language query"""
-        query_lower = query.lower()
+    def match_keywords(self, query: str) -> Dict[str, List[str]]:
+        """Deity, state, era, region and enhancement keywords found in the query"""
+        return self.matcher.match(query)
+    
+    def is_suggestible(self, query: str) -> bool:
+        """
+        Whether a logged query may be shown to everyone as a suggestion: every word is a term of the
+        current catalog or a known keyword, so typos, abuse and names of deleted temples are left out,
+        and it names a deity, state, era or region or scores SUGGEST_MIN_LEXICAL_SCORE against temple text
+        """
+        words = tokenize(query)
+        if not words:
+            return False
+        index = lexical_index.current()
+        if any(word not in index.vocab and word not in self.known_words and not word.isdigit() for word in words):
+            return False
+        matches = self.match_keywords(query)
+        if any(matches.get(group) for group in ENTITY_GROUPS):
+            return True
+        hits = index.search(query, 1)
+        return bool(hits) and hits[0][1] >= SUGGEST_MIN_LEXICAL_SCORE
+    
+    def extract_filters(self, query: str, matches: Optional[Dict[str, List[str]]] = None,
+                        location: Optional[Dict] = None) -> Dict:
+        """Extract filters from natural language query; location is the caller's position, if known"""
+        if matches is None:
+            matches = self.match_keywords(query)
         filters = {}
         
-        # Extract deity
-        for deity, keywords in self.deity_keywords.items():
-            if any(keyword in query_lower for keyword in keywords):
-                filters['deity'] = deity.title()
-                break
+        # The first matching deity, state and era in table order become filters
+        for facet in ('deity', 'state', 'era'):
+            if matches.get(facet):
+                filters[facet] = matches[facet][0].title()
         
-        # Extract state
-        for state, keywords in self.state_keywords.items():
-            if any(keyword in query_lower for keyword in keywords):
-                filters['state'] = state.title()
-                break
-        
-        # Extract era
-        for era, keywords in self.era_keywords.items():
-            if any(keyword in query_lower for keyword in keywords):
-                filters['era'] = era.title()
-                break
+        # A radius around a named place or the caller replaces the state, which it already narrows
+        near = self.extract_near(query, location)
+        if near:
+            filters.pop('state', None)
+            filters[NEAR_FILTER] = near
         
         return filters
     
-    def enhance_query(self, query: str) -> str:
+    def enhance_query(self, query: str, matches: Optional[Dict[str, List[str]]] = None) -> str:
         """Enhance query with relevant temple search terms"""
-        query_lower = query.lower()
-        enhanced_terms = []
+        if matches is None:
+            matches = self.match_keywords(query)
         
         # Add temple-specific terms based on query content
-        if any(word in query_lower for word in ['famous', 'popular', 'important']):
-            enhanced_terms.append('pilgrimage heritage significance')
-        
-        if any(word in query_lower for word in ['ancient', 'old', 'historic']):
-            enhanced_terms.append('ancient heritage historical')
-        
-        if any(word in query_lower for word in ['architecture', 'beautiful', 'carved']):
-            enhanced_terms.append('architecture dravidian carved sculpture')
+        enhanced_terms = matches.get('enhancement', [])
         
         enhanced_query = query
         if enhanced_terms:
@@ -89,58 +229,184 @@ class TempleQueryProcessor:
         
         return enhanced_query
     
-    def process_query(self, query: str, filters: Dict = None) -> List[Dict]:
+    def resolve_place(self, place: str) -> Optional[Tuple[float, float]]:
+        """Centre of the temples in a city or state named by place, trying shorter word prefixes"""
+        words = place.split()
+        for end in range(len(words), 0, -1):
+            name = ' '.join(words[:end])
+            temples = catalog.filter(city=name) or catalog.filter(state=name)
+            centre = temples.centre() if temples else None
+            if centre is not None:
+                return centre
+        return None
+    
+    def extract_near(self, query: str, location: Optional[Dict] = None) -> Optional[Dict]:
+        """Radius filter from phrases like "within 50 km of Madurai" or "near me", or None"""
+        query_lower = query.lower()
+        radius_km = None
+        place = None
+        
+        radius_match = RADIUS_PATTERN.search(query_lower)
+        if radius_match:
+            radius_km = float(radius_match.group(1))
+            if radius_match.group(2).startswith('mi'):
+                radius_km *= KM_PER_MILE
+            place = radius_match.group(3)
+        if place is None:
+            near_match = NEAR_PATTERN.search(query_lower)
+            if near_match:
+                place = near_match.group(1)
+            elif 'nearby' in tokenize(query_lower):
+                place = 'me'
+        if radius_km is None and place is None:
+            return None
+        
+        # Keep the place name up to the first word that starts the rest of the query
+        place_words = []
+        for word in (place or 'me').replace('.', ' ').split():
+            if word in PLACE_STOP_WORDS:
+                break
+            place_words.append(word)
+        place = ' '.join(place_words) or 'me'
+        
+        if place in SELF_PLACES:
+            if not location:
+                return None
+            try:
+                center = (float(location['lat']), float(location['lng']))
+            except (KeyError, TypeError, ValueError):
+                raise ValueError("location needs numeric 'lat' and 'lng'")
+        else:
+            center = self.resolve_place(place)
+            if center is None:
+                return None
+        return {'lat': center[0], 'lng': center[1], 'radius_km': radius_km or DEFAULT_NEAR_RADIUS_KM}
+    
+    def process_query(self, query: str, filters: Dict = None, location: Optional[Dict] = None) -> List[Dict]:
         """
         Main function to process natural language query
         Simulates LangChain agent functionality
         """
         try:
-            # Extract filters from query if not provided
-            if not filters:
-                filters = self.extract_filters(query)
+            with stage_timer('filter_extraction'):
+                matches = self.match_keywords(query)
+                
+                # Extract filters from query if not provided
+                if not filters:
+                    filters = self.extract_filters(query, matches, location)
             
             # Enhance query for better search
-            enhanced_query = self.enhance_query(query)
+            with stage_timer('query_enhancement'):
+                enhanced_query = self.enhance_query(query, matches)
             
-            # Search using vector store
-            results = search_temples_vector(enhanced_query, filters, top_k=8)
+            # Search using vector store, fused with keyword matches when hybrid search is on
+            if HYBRID_SEARCH:
+                vector_results = search_temples_vector(enhanced_query, filters, top_k=FUSION_CANDIDATES)
+                with stage_timer('bm25_search'):
+                    bm25_results = search_temples_bm25(query, filters, top_k=FUSION_CANDIDATES)
+                with stage_timer('fusion'):
+                    results = fuse_rankings([vector_results, bm25_results], RESULT_COUNT)
+            else:
+                results = search_temples_vector(enhanced_query, filters, top_k=RESULT_COUNT)
             
-            # Format results
-            formatted_results = []
-            for temple, score in results:
-                formatted_results.append({
-                    'temple': temple,
-                    'relevance_score': round(score, 3),
-                    'match_reason': self._generate_match_reason(query, temple, filters)
-                })
+            with stage_timer('match_reason'):
+                return self._format_results(query, results, filters, matches)
             
-            return formatted_results
+        except Exception:
+            # Let callers tell a failed search from one that matched nothing
+            errors.inc('process_query')
+            raise
+    
+    def process_query_batch(self, queries: List[Tuple]) -> List[List[Dict]]:
+        """
+        Process several (query, filters) or (query, filters, location) tuples with one batched vector search
+        Results come back in the same order as the queries
+        """
+        try:
+            queries = [(item + (None,))[:3] for item in queries]
+            with stage_timer('filter_extraction'):
+                matches_list = [self.match_keywords(query) for query, _, _ in queries]
+                filters_list = [
+                    filters or self.extract_filters(query, matches, location)
+                    for (query, filters, location), matches in zip(queries, matches_list)
+                ]
+            with stage_timer('query_enhancement'):
+                enhanced_queries = [
+                    self.enhance_query(query, matches) for (query, _, _), matches in zip(queries, matches_list)
+                ]
+            
+            if HYBRID_SEARCH:
+                vector_results = search_temples_vector_batch(
+                    enhanced_queries, filters_list, [FUSION_CANDIDATES] * len(queries)
+                )
+                with stage_timer('bm25_search'):
+                    bm25_results = [
+                        search_temples_bm25(query, filters, top_k=FUSION_CANDIDATES)
+                        for (query, _, _), filters in zip(queries, filters_list)
+                    ]
+                with stage_timer('fusion'):
+                    batch_results = [
+                        fuse_rankings([results, keyword_results], RESULT_COUNT)
+                        for results, keyword_results in zip(vector_results, bm25_results)
+                    ]
+            else:
+                batch_results = search_temples_vector_batch(enhanced_queries, filters_list, [RESULT_COUNT] * len(queries))
             
-        except Exception as e:
-            print(f"Error processing query: {e}")
-            return []
+            with stage_timer('match_reason'):
+                return [
+                    self._format_results(query, results, filters, matches)
+                    for (query, _, _), results, filters, matches in zip(queries, batch_results, filters_list, matches_list)
+                ]
+            
+        except Exception:
+            errors.inc('process_query_batch')
+            raise
+    
+    def _format_results(self, query: str, results: List[Tuple[Dict, float]], filters: Dict,
+                        matches: Dict[str, List[str]]) -> List[Dict]:
+        """Attach relevance scores and match reasons to search results"""
+        # Space-padded words of the query, so phrase checks below only match whole words
+        query_words = f" {' '.join(tokenize(query))} "
+        formatted_results = []
+        for temple, score in results:
+            formatted_results.append({
+                'temple': temple,
+                'relevance_score': round(score, 3),
+                'match_reason': self._generate_match_reason(query_words, temple, filters, matches)
+            })
+        
+        return formatted_results
     
-    def _generate_match_reason(self, query: str, temple: Dict, filters: Dict) -> str:
+    def _generate_match_reason(self, query_words: str, temple: Dict, filters: Dict,
+                               matches: Dict[str, List[str]]) -> str:
         """Generate explanation for why this temple matches the query"""
         reasons = []
         
-        query_lower = query.lower()
+        def mentioned(value: str) -> bool:
+            phrase = ' '.join(tokenize(value))
+            return bool(phrase) and f" {phrase} " in query_words
         
         # Check deity match
-        if temple['deity'].lower() in query_lower:
+        if mentioned(temple['deity']):
             reasons.append(f"Dedicated to {temple['deity']}")
         
         # Check location match
-        if temple['state'].lower() in query_lower or temple['city'].lower() in query_lower:
+        if mentioned(temple['state']) or mentioned(temple['city']):
             reasons.append(f"Located in {temple['city']}, {temple['state']}")
         
         # Check era match
-        if temple['era'].lower() in query_lower:
+        if mentioned(temple['era']):
             reasons.append(f"{temple['era']} period temple")
         
+        # Check distance when searching within a radius
+        near = filters.get(NEAR_FILTER) if filters else None
+        if near and 'location' in temple:
+            distance = float(haversine_km(near['lat'], near['lng'], temple['location']['lat'], temple['location']['lng']))
+            reasons.append(f"{distance:.0f} km away")
+        
         # Check significance
         if 'significance' in temple and temple['significance']:
-            if any(word in query_lower for word in ['famous', 'important', 'heritage']):
+            if matches.get('significance'):
                 reasons.append(temple['significance'])
         
         # Default reason
@@ -151,30 +417,17 @@ class TempleQueryProcessor:
 
 # Global processor instance
 query_processor = TempleQueryProcessor()
+# Only queries the processor recognizes become suggestions; autocomplete cannot import this module itself
+autocomplete.accept_query = query_processor.is_suggestible
 
-def process_query(query_text: str, filters: Dict = None) -> List[Dict]:
+def process_query(query_text: str, filters: Dict = None, location: Optional[Dict] = None) -> List[Dict]:
     """Main function to process temple queries"""
-    return query_processor.process_query(query_text, filters)
+    return query_processor.process_query(query_text, filters, location)
+
+def process_query_batch(queries: List[Tuple]) -> List[List[Dict]]:
+    """Process several temple queries in one batch"""
+    return query_processor.process_query_batch(queries)
 
 def get_query_suggestions(partial_query: str) -> List[str]:
     """Generate query suggestions based on partial input"""
-    suggestions = [
-        "Shiva temples in Tamil Nadu",
-        "Ancient temples in North India",
-        "Famous Vishnu temples",
-        "Heritage temples in Gujarat",
-        "Pilgrimage sites in Uttarakhand",
-        "Dravidian architecture temples",
-        "Jyotirlinga temples",
-        "UNESCO World Heritage temples",
-        "Medieval period temples",
-        "Sun temples in India"
-    ]
-    
-    if partial_query:
-        # Filter suggestions based on partial query
-        partial_lower = partial_query.lower()
-        filtered = [s for s in suggestions if any(word in s.lower() for word in partial_lower.split())]
-        return filtered[:5] if filtered else suggestions[:5]
-    
-    return suggestions[:5]
+    return autocomplete.suggest(partial_query)
@@ -3,21 +3,75 @@ FastAPI backend for TempleSeeker AI
 Provides endpoints for temple search and data retrieval
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, Response
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, Field
 from typing import Dict, List, Optional
+import os
+import threading
+import time
 import uvicorn
 
-from temple_data import get_all_temples, get_temple_by_id, search_temples_by_filters
-from langchain_tool import process_query, get_query_suggestions
-from vector_store import search_temples_vector
+from temple_data import catalog, get_all_temples, get_temple_by_id, search_temples_by_filters
+from temple_loader import validate_temple
+from autocomplete import SUGGEST_TOP_K, autocomplete, record_query
+from bm25_index import lexical_index
+from langchain_tool import process_query_batch
+from metrics import registry, request_seconds
+from response_cache import cached_response, response_cache
+from search_batcher import batcher_stats, process_query_coalesced, search_vector_coalesced
+from search_pool import RETRY_AFTER_SECONDS, SearchPoolSaturated, run_search, search_pool
+from serialization import dumps, json_array, json_object, parse_fields, project
+from temple_store import TempleRows
+from vector_store import (delete_temples, embedding_cache_stats, find_temples_nearby, search_temples_vector_batch,
+                          upsert_temples, warm_up)
+
+# Upper bound on queries accepted by the batch endpoints
+MAX_BATCH_QUERIES = 100
+
+# Admin endpoints stay disabled unless a token is configured
+ADMIN_TOKEN = os.environ.get("TEMPLE_ADMIN_TOKEN")
+
+# When the search indexes are built: background (serve at once, /ready passes once built),
+# eager (build before accepting any request) or lazy (build on the first search)
+WARMUP_MODE = os.environ.get("TEMPLE_WARMUP", "background")
+
+# Startup progress reported by /ready
+warmup_state = {"status": "pending", "seconds": None, "error": None}
+
+def warm_up_search():
+    """Build the vector store, BM25 index, autocomplete index and encoded temples so no request pays for them"""
+    warmup_state["status"] = "warming"
+    start = time.perf_counter()
+    try:
+        warm_up()
+        lexical_index.current()
+        autocomplete.warm_up()
+        catalog.encode_all()
+    except Exception as e:
+        # Searches still build whatever is missing on demand; /ready keeps reporting the failure
+        warmup_state.update(status="failed", error=str(e))
+        print(f"Search warm-up failed: {e}")
+        return
+    warmup_state.update(status="ready", seconds=round(time.perf_counter() - start, 3))
+    print(f"Search indexes ready in {warmup_state['seconds']}s")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP_MODE == "eager":
+        warm_up_search()
+    elif WARMUP_MODE == "background":
+        threading.Thread(target=warm_up_search, name="warm-up", daemon=True).start()
+    yield
 
 # Initialize FastAPI app
 app = FastAPI(
     title="TempleSeeker AI API",
     description="Backend API for finding Indian temples using natural language queries",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware to allow frontend requests
@@ -29,11 +83,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Time every request by its route template, so /temple/{temple_id} is one series and not one per id
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        request_seconds.observe(
+            time.perf_counter() - start, request.method, route.path if route else "unmatched", str(status)
+        )
+
+# Searches run on a bounded thread pool; shed load with 503 once it is full
+@app.exception_handler(SearchPoolSaturated)
+async def search_pool_saturated_handler(request: Request, exc: SearchPoolSaturated):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"Server is busy: {exc}"},
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+    )
+
 # Pydantic models for request/response
+class Location(BaseModel):
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
+
 class QueryRequest(BaseModel):
     query: str
     filters: Optional[Dict] = {}
     limit: Optional[int] = 8
+    # Caller's position, used by queries like "temples near me"
+    location: Optional[Location] = None
+    
+    def location_dict(self) -> Optional[Dict]:
+        return self.location.model_dump() if self.location else None
 
 class QueryResponse(BaseModel):
     results: List[Dict]
@@ -50,22 +137,126 @@ class TemplesResponse(BaseModel):
 class SuggestionsResponse(BaseModel):
     suggestions: List[str]
 
+class BatchQueryRequest(BaseModel):
+    queries: List[QueryRequest]
+
+class BatchQueryResponse(BaseModel):
+    responses: List[QueryResponse]
+
+class TempleUpsertRequest(BaseModel):
+    temples: List[Dict]
+
+def requested_fields(fields: Optional[str]):
+    """Parse a ?fields= projection, rejecting unknown field names with 400"""
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def cached_encoding(temple_id: int, version: Optional[int]) -> Optional[bytes]:
+    """
+    The catalog's cached bytes for a temple read while the catalog was at version, or None
+    Entries always hold the current record, so they only describe the one that was read if no
+    write has landed since; checking again after the lookup covers a write racing it
+    """
+    if version is None or catalog.version != version:
+        return None
+    body = catalog.encoded(temple_id)
+    return body if catalog.version == version else None
+
+def encode_temple(temple: Dict, fields=None, version: Optional[int] = None) -> bytes:
+    """A temple as JSON: only the requested fields, or cached bytes if the catalog is still at version"""
+    if fields:
+        return dumps(project(temple, fields))
+    # A store installed outside the catalog (the benchmarks do) can return temples it does not hold
+    return cached_encoding(temple["id"], version) or dumps(temple)
+
+def encode_temples(temples: TempleRows, fields=None, version: Optional[int] = None) -> bytes:
+    """Temples as a JSON array; a projection is encoded in one call rather than once per temple"""
+    if fields:
+        return dumps([project(temple, fields) for temple in temples])
+    # Catalog listings are row views: the cached bytes are found by ID, without materializing the rows
+    return json_array(
+        cached_encoding(temple_id, version) or dumps(temples[position])
+        for position, temple_id in enumerate(temples.ids.tolist())
+    )
+
+def encode_results(results: List[Dict], fields=None, version: Optional[int] = None) -> bytes:
+    """Search results as a JSON array, with each nested temple taken from the catalog's cached bytes"""
+    return json_array(
+        json_object(**{key: encode_temple(value, fields, version) if key == "temple" else dumps(value)
+                       for key, value in result.items()})
+        for result in results
+    )
+
+def encode_query_response(query: str, response: Dict, fields=None) -> bytes:
+    """Body of a QueryResponse, assembled from encoded results rather than validated and re-encoded"""
+    return json_object(
+        results=encode_results(response["results"], fields, response.get("catalog_version")),
+        total_results=dumps(response["total_results"]),
+        query_processed=dumps(query)
+    )
+
+def encode_vector_response(response: Dict, fields=None) -> bytes:
+    """Body of a /search/vector response"""
+    return json_object(
+        results=encode_results(response["results"], fields, response.get("catalog_version")),
+        total_results=dumps(response["total_results"]),
+        search_type=dumps(response["search_type"])
+    )
+
+def temples_body(filters: Dict[str, str], limit: Optional[int], fields=None) -> bytes:
+    """Body of a /temples response; runs on the search pool"""
+    # Read before the records, so cached bytes are only used if nothing changed after this point
+    version = catalog.version
+    temples = search_temples_by_filters(**filters) if filters else get_all_temples()
+    if limit:
+        temples = temples[:limit]
+    return json_object(
+        temples=encode_temples(temples, fields, version),
+        total_count=dumps(len(temples))
+    )
+
+def query_batch_body(requests: List['QueryRequest'], fields=None) -> bytes:
+    """Body of a /query/batch response; runs on the search pool"""
+    version = catalog.version
+    batch_results = process_query_batch([(q.query, q.filters, q.location_dict()) for q in requests])
+    responses = []
+    for query_request, results in zip(requests, batch_results):
+        limited_results = results[:query_request.limit] if query_request.limit else results
+        responses.append(encode_query_response(query_request.query, {
+            "results": limited_results, "total_results": len(results), "catalog_version": version
+        }, fields))
+    return json_object(responses=json_array(responses))
+
+# Large responses are assembled from pre-encoded temples; the response models only document them
+def json_bytes_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
 # Health check endpoint
 @app.get("/")
 async def root():
     return {
         "message": "TempleSeeker AI API is running",
         "version": "1.0.0",
-        "endpoints": ["/query", "/temples", "/temple/{id}", "/suggestions"]
+        "endpoints": ["/query", "/temples", "/temples/nearby", "/temple/{id}", "/suggestions", "/health", "/ready"]
     }
 
+# Liveness: answers as soon as the process serves requests, even while indexes are still building
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "TempleSeeker AI API"}
 
+# Readiness: 503 until the search indexes are built, so load balancers hold traffic back until then
+@app.get("/ready")
+async def readiness_check():
+    ready = WARMUP_MODE == "lazy" or warmup_state["status"] == "ready"
+    content = dict(warmup_state, mode=WARMUP_MODE, ready=ready)
+    return JSONResponse(status_code=200 if ready else 503, content=content)
+
 # Main query endpoint - processes natural language queries
 @app.post("/query", response_model=QueryResponse)
-async def query_temples(request: QueryRequest):
+async def query_temples(request: QueryRequest, fields: Optional[str] = None):
     """
     Process natural language query to find matching temples
     
@@ -73,23 +264,40 @@ async def query_temples(request: QueryRequest):
     - "Shiva temples in Tamil Nadu"
     - "Ancient temples in North India"
     - "Famous Vishnu temples"
+    
+    Query parameter:
+    - fields: Comma-separated temple fields to return (e.g., "id,name,state")
     """
+    selected_fields = requested_fields(fields)
     try:
         if not request.query.strip():
             raise HTTPException(status_code=400, detail="Query cannot be empty")
         
-        # Process query using LangChain-like functionality
-        results = process_query(request.query, request.filters)
-        
-        # Limit results
-        limited_results = results[:request.limit] if request.limit else results
+        async def compute():
+            # Records are encoded from the catalog's cache only if it is still at this version
+            version = catalog.version
+            # Process query using LangChain-like functionality
+            # Concurrent queries are coalesced into one batched search
+            results = await process_query_coalesced(request.query, request.filters, request.location_dict())
+            
+            # Limit results
+            limited_results = results[:request.limit] if request.limit else results
+            
+            return {"results": limited_results, "total_results": len(results), "catalog_version": version}
         
-        return QueryResponse(
-            results=limited_results,
-            total_results=len(results),
-            query_processed=request.query
-        )
+        # Repeated queries are answered from the response cache until the index changes
+        location = request.location_dict()
+        cache_filters = dict(request.filters or {}, location=location) if location else request.filters
+        response = await cached_response("query", request.query, cache_filters, request.limit, compute)
+        if response["total_results"]:
+            record_query(request.query)
+        # Encoding a large page is real work, so it runs on the pool like the search did
+        return json_bytes_response(await run_search(encode_query_response, request.query, response, selected_fields))
         
+    except (HTTPException, SearchPoolSaturated):
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid filters: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
@@ -99,7 +307,10 @@ async def list_temples(
     state: Optional[str] = None,
     deity: Optional[str] = None,
     era: Optional[str] = None,
-    limit: Optional[int] = None
+    city: Optional[str] = None,
+    architecture: Optional[str] = None,
+    limit: Optional[int] = None,
+    fields: Optional[str] = None
 ):
     """
     Get all temples with optional filtering
@@ -108,40 +319,68 @@ async def list_temples(
     - state: Filter by state (e.g., "Tamil Nadu")
     - deity: Filter by deity (e.g., "Shiva")
     - era: Filter by era (e.g., "Ancient")
+    - city: Filter by city (e.g., "Madurai")
+    - architecture: Filter by architecture style (e.g., "Dravidian")
     - limit: Limit number of results
+    - fields: Comma-separated fields to return (e.g., "id,name,state")
     """
+    selected_fields = requested_fields(fields)
     try:
-        # Apply filters if provided
-        if state or deity or era:
-            temples = search_temples_by_filters(state=state, deity=deity, era=era)
-        else:
-            temples = get_all_temples()
+        # Filtering, the limit and encoding all run on the pool
+        filters = {facet: value for facet, value in
+                   (('state', state), ('deity', deity), ('era', era), ('city', city), ('architecture', architecture))
+                   if value}
+        return json_bytes_response(await run_search(temples_body, filters, limit, selected_fields))
         
-        # Apply limit
-        if limit:
-            temples = temples[:limit]
+    except SearchPoolSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching temples: {str(e)}")
+
+# Find temples near a point
+@app.get("/temples/nearby")
+async def nearby_temples(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0),
+    limit: int = Query(10, ge=1, le=100)
+):
+    """
+    Get the temples nearest to a location, closest first
+    
+    Query parameters:
+    - lat, lng: Location in degrees
+    - radius_km: Only return temples within this distance
+    - limit: Maximum number of temples
+    """
+    try:
+        results = await run_search(find_temples_nearby, lat, lng, radius_km, limit)
         
-        return TemplesResponse(
-            temples=temples,
-            total_count=len(temples)
-        )
+        return {
+            "temples": [{"temple": temple, "distance_km": round(distance, 2)} for temple, distance in results],
+            "total_results": len(results)
+        }
         
+    except SearchPoolSaturated:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching temples: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error finding nearby temples: {str(e)}")
 
 # Get specific temple by ID
 @app.get("/temple/{temple_id}", response_model=TempleResponse)
-async def get_temple_detail(temple_id: int):
+async def get_temple_detail(temple_id: int, fields: Optional[str] = None):
     """
     Get detailed information about a specific temple
     """
+    selected_fields = requested_fields(fields)
     try:
+        version = catalog.version
         temple = get_temple_by_id(temple_id)
         
         if not temple:
             raise HTTPException(status_code=404, detail=f"Temple with ID {temple_id} not found")
         
-        return TempleResponse(temple=temple)
+        return json_bytes_response(json_object(temple=encode_temple(temple, selected_fields, version)))
         
     except HTTPException:
         raise
@@ -150,15 +389,21 @@ async def get_temple_detail(temple_id: int):
 
 # Get query suggestions
 @app.get("/suggestions", response_model=SuggestionsResponse)
-async def get_suggestions(q: Optional[str] = None):
+async def get_suggestions(q: Optional[str] = None, limit: int = 5):
     """
     Get query suggestions for autocomplete
     
     Query parameter:
-    - q: Partial query for filtering suggestions
+    - q: Partial query; completions match the start of temple names, places, deities and popular queries
+    - limit: Number of suggestions (at most 10)
     """
     try:
-        suggestions = get_query_suggestions(q)
+        limit = max(1, min(limit, SUGGEST_TOP_K))
+        if autocomplete.ready:
+            suggestions = autocomplete.suggest(q, limit)
+        else:
+            # Without a warm-up the first call builds the catalog index, which belongs in the pool
+            suggestions = await run_search(autocomplete.suggest, q, limit)
         return SuggestionsResponse(suggestions=suggestions)
         
     except Exception as e:
@@ -166,68 +411,198 @@ async def get_suggestions(q: Optional[str] = None):
 
 # Vector search endpoint (for advanced users)
 @app.post("/search/vector")
-async def vector_search(request: QueryRequest):
+async def vector_search(request: QueryRequest, fields: Optional[str] = None):
     """
     Direct vector search endpoint for advanced queries
     """
+    selected_fields = requested_fields(fields)
     try:
         if not request.query.strip():
             raise HTTPException(status_code=400, detail="Query cannot be empty")
         
-        results = search_temples_vector(request.query, request.filters, request.limit or 5)
-        
-        formatted_results = []
-        for temple, score in results:
-            formatted_results.append({
-                "temple": temple,
-                "similarity_score": round(score, 3)
-            })
+        async def compute():
+            version = catalog.version
+            results = await search_vector_coalesced(request.query, request.filters, request.limit or 5)
+            return dict(format_vector_results(results), catalog_version=version)
         
-        return {
-            "results": formatted_results,
-            "total_results": len(formatted_results),
-            "search_type": "vector_similarity"
-        }
+        response = await cached_response("search_vector", request.query, request.filters, request.limit or 5, compute)
+        return json_bytes_response(await run_search(encode_vector_response, response, selected_fields))
         
+    except (HTTPException, SearchPoolSaturated):
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid filters: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in vector search: {str(e)}")
 
+def format_vector_results(results) -> Dict:
+    """Shape (temple, score) pairs as a /search/vector response"""
+    formatted_results = []
+    for temple, score in results:
+        formatted_results.append({
+            "temple": temple,
+            "similarity_score": round(score, 3)
+        })
+    
+    return {
+        "results": formatted_results,
+        "total_results": len(formatted_results),
+        "search_type": "vector_similarity"
+    }
+
+def validate_batch(request: BatchQueryRequest):
+    """Reject empty, oversized or blank-query batches before doing any search work"""
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="At least one query is required")
+    if len(request.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_QUERIES} queries per batch")
+    for i, query_request in enumerate(request.queries):
+        if not query_request.query.strip():
+            raise HTTPException(status_code=400, detail=f"Query {i} cannot be empty")
+
+# Batch query endpoint - one embedding pass and one index search for many queries
+@app.post("/query/batch", response_model=BatchQueryResponse)
+async def query_temples_batch(request: BatchQueryRequest, fields: Optional[str] = None):
+    """
+    Process several natural language queries at once
+    
+    Each query takes its own filters and limit; responses come back in request order.
+    """
+    validate_batch(request)
+    selected_fields = requested_fields(fields)
+    try:
+        # Searching and encoding happen in one pool task
+        return json_bytes_response(await run_search(query_batch_body, request.queries, selected_fields))
+        
+    except SearchPoolSaturated:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid filters: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing query batch: {str(e)}")
+
+# Batch vector search endpoint
+@app.post("/search/vector/batch")
+async def vector_search_batch(request: BatchQueryRequest):
+    """
+    Direct vector search for several queries with one batched index search
+    """
+    validate_batch(request)
+    try:
+        batch_results = await run_search(
+            search_temples_vector_batch,
+            [q.query for q in request.queries],
+            [q.filters for q in request.queries],
+            [q.limit or 5 for q in request.queries],
+        )
+        return {"responses": [format_vector_results(results) for results in batch_results]}
+        
+    except SearchPoolSaturated:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid filters: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error in batch vector search: {str(e)}")
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names the given entity tag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as RFC 9110 specifies for If-None-Match
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
 # Get temple statistics
 @app.get("/stats")
-async def get_temple_stats():
+async def get_temple_stats(if_none_match: Optional[str] = Header(None)):
     """
-    Get statistics about the temple dataset
+    Get statistics about the temple dataset: totals, facet counts and pairwise cross-tabs
+    Served from a snapshot maintained as temples change; send If-None-Match for a 304
     """
+    body, etag = catalog.stats_snapshot()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# Search execution statistics
+@app.get("/stats/search")
+async def get_search_stats():
+    """
+    Thread pool load, micro-batch size histograms, and response and query embedding cache hit ratios
+    """
+    return {
+        "search_pool": search_pool.stats(),
+        "batching": batcher_stats(),
+        "response_cache": response_cache.stats(),
+        "query_embedding_cache": embedding_cache_stats()
+    }
+
+# Prometheus scrape endpoint
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Stage latency histograms, request latency, error and short-result counters, and size gauges
+    in the Prometheus text exposition format
+    """
+    return Response(content=registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def require_admin(token: Optional[str]):
+    """Reject admin calls unless TEMPLE_ADMIN_TOKEN is set and matches"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set TEMPLE_ADMIN_TOKEN")
+    if token != ADMIN_TOKEN:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+# Add or replace temples without rebuilding the index
+@app.post("/admin/temples")
+async def admin_upsert_temples(request: TempleUpsertRequest, x_admin_token: Optional[str] = Header(None)):
+    """
+    Insert or update temples in the catalog and the vector index
+    
+    Temples with an existing ID replace the stored record and its embedding.
+    """
+    require_admin(x_admin_token)
     try:
-        temples = get_all_temples()
+        temples = [validate_temple(temple) for temple in request.temples]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid temple: {str(e)}")
+    
+    try:
+        start = time.perf_counter()
+        # The vector store shares the catalog's records and updates both in one step
+        result = await run_search(upsert_temples, temples)
+        result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return result
         
-        # Calculate statistics
-        states = {}
-        deities = {}
-        eras = {}
+    except SearchPoolSaturated:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating temples: {str(e)}")
+
+# Remove a temple from the catalog and the vector index
+@app.delete("/admin/temples/{temple_id}")
+async def admin_delete_temple(temple_id: int, x_admin_token: Optional[str] = Header(None)):
+    """
+    Delete a temple by ID
+    """
+    require_admin(x_admin_token)
+    try:
+        removed = await run_search(delete_temples, [temple_id])
         
-        for temple in temples:
-            # Count by state
-            state = temple['state']
-            states[state] = states.get(state, 0) + 1
-            
-            # Count by deity
-            deity = temple['deity']
-            deities[deity] = deities.get(deity, 0) + 1
-            
-            # Count by era
-            era = temple['era']
-            eras[era] = eras.get(era, 0) + 1
+        if not removed:
+            raise HTTPException(status_code=404, detail=f"Temple with ID {temple_id} not found")
         
-        return {
-            "total_temples": len(temples),
-            "by_state": states,
-            "by_deity": deities,
-            "by_era": eras
-        }
+        return {"deleted": removed}
         
+    except (HTTPException, SearchPoolSaturated):
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error deleting temple: {str(e)}")
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8001)
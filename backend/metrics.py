@@ -0,0 +1,206 @@
+"""
+In-process metrics in the Prometheus text exposition format
+Stage timing histograms for the search hot path, counters and scrape-time gauges, served by /metrics
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Upper bounds in seconds; the stages of one query range from microseconds to tens of milliseconds
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    # Whole numbers print exactly however large; everything else round-trips through repr
+    return str(int(value)) if value.is_integer() else repr(value)
+
+class Metric:
+    """Base for metrics with a fixed set of label names"""
+    
+    kind = 'untyped'
+    
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+    
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+    
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self.samples()
+
+class Counter(Metric):
+    """Monotonically increasing count per label set"""
+    
+    kind = 'counter'
+    
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+    
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0.0)
+    
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}" for labels, value in values
+        ]
+
+class Gauge(Metric):
+    """Value read from a callback at scrape time, so nothing has to keep it up to date"""
+    
+    kind = 'gauge'
+    
+    def __init__(self, name: str, documentation: str, read: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.read = read
+    
+    def samples(self) -> List[str]:
+        try:
+            value = float(self.read())
+        except Exception:
+            # A component that is not ready yet should not take the whole scrape down
+            return []
+        return [f"{self.name} {_format_value(value)}"]
+
+class ObservedCounter(Gauge):
+    """Count kept by another component and read at scrape time, exposed with counter semantics"""
+    
+    kind = 'counter'
+
+class _Timer:
+    """Context manager observing elapsed seconds into a histogram"""
+    
+    __slots__ = ('histogram', 'label_values', 'start')
+    
+    def __init__(self, histogram: 'Histogram', label_values: Tuple[str, ...]):
+        self.histogram = histogram
+        self.label_values = label_values
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.label_values)
+        return False
+
+class Histogram(Metric):
+    """Cumulative bucket counts, sum and count per label set"""
+    
+    kind = 'histogram'
+    
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+    
+    def observe(self, value: float, *label_values: str):
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][slot] += 1
+            series[1] += value
+    
+    def time(self, *label_values: str) -> _Timer:
+        """Time a with-block into this histogram"""
+        return _Timer(self, label_values)
+    
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return sum(series[0]) if series else 0
+    
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        lines = []
+        for labels, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                bucket_labels = _format_labels(self.label_names, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """Named metrics rendered together for a scrape"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+    
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            # Re-registering a name (module reloads, repeated setup) keeps the newest definition
+            self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, label_names))
+    
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names, buckets))
+    
+    def gauge(self, name: str, documentation: str, read: Callable[[], float]) -> Gauge:
+        return self.register(Gauge(name, documentation, read))
+    
+    def observed_counter(self, name: str, documentation: str, read: Callable[[], float]) -> ObservedCounter:
+        return self.register(ObservedCounter(name, documentation, read))
+    
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(line for metric in metrics for line in metric.render()) + '\n'
+
+def resident_memory_bytes() -> float:
+    """Resident set size of this process, from /proc where available"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # No /proc (macOS): fall back to the peak resident size, which macOS reports in bytes
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+# Global registry and the metrics shared across modules
+registry = MetricsRegistry()
+stage_seconds = registry.histogram(
+    'temple_search_stage_seconds', 'Time spent in each stage of query processing', ['stage']
+)
+request_seconds = registry.histogram(
+    'temple_http_request_seconds', 'HTTP request latency by route', ['method', 'route', 'status']
+)
+short_results = registry.counter(
+    'temple_search_short_results_total',
+    'Searches returning fewer hits than requested although enough temples passed the filters', ['path']
+)
+errors = registry.counter('temple_errors_total', 'Exceptions raised while processing queries', ['stage'])
+registry.gauge('temple_process_resident_bytes', 'Resident memory of this worker process', resident_memory_bytes)
+
+def stage_timer(stage: str) -> _Timer:
+    """Time one stage of query processing: with stage_timer('embedding'): ..."""
+    return stage_seconds.time(stage)
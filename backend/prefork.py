@@ -0,0 +1,138 @@
+"""
+Pre-fork server for multi-worker deployments
+The master builds or loads the catalog and search indexes once, then forks uvicorn workers that
+share them copy-on-write: FAISS and numpy buffers are never written by searches, and the Python
+objects built before the fork are frozen out of the garbage collector so collections in a worker
+do not copy every page. Serve a prebuilt artifact (TEMPLE_INDEX_DIR, see build_index.py) and the
+index pages are a read-only memory map shared through the page cache as well
+
+Admin writes still apply to the worker that received them only, as with `uvicorn --workers`
+
+    python prefork.py --workers 4 --port 8001
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Dict
+
+# Worker processes forked by the master
+PREFORK_WORKERS = int(os.environ.get('TEMPLE_WORKERS', str(os.cpu_count() or 1)))
+# Background index rebuilds the master waits for before forking
+REBUILD_THREADS = ('autocomplete-rebuild', 'bm25-rebuild')
+
+def prepare_shared_state():
+    """Build everything a worker would otherwise build for itself, then freeze it out of the GC"""
+    import faiss
+    
+    # libgomp's thread pool does not survive fork: a master that ran a parallel region would leave
+    # every worker hanging in its first one, so the master builds on one thread
+    faiss.omp_set_num_threads(1)
+    
+    from main import warm_up_search, warmup_state
+    
+    warm_up_search()
+    if warmup_state['status'] != 'ready':
+        raise RuntimeError(f"Search warm-up failed in the master: {warmup_state['error']}")
+    # Let any rebuild finish so its index is shared; the engines also reset their rebuild flags
+    # after a fork, so a child never waits on a thread it does not have
+    for thread in threading.enumerate():
+        if thread.name in REBUILD_THREADS:
+            thread.join()
+    if threading.active_count() > 1:
+        # Locks held by those threads would stay locked forever in the children
+        print(f"Warning: forking with {threading.active_count() - 1} extra threads running")
+    
+    # A collection writes to the header of every object it scans, which would copy each shared page
+    # into every worker; frozen objects are never scanned, so only pages a worker really uses diverge
+    gc.collect()
+    gc.freeze()
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Listening socket created once in the master; every worker accepts on it"""
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+def run_worker(sock: socket.socket, host: str, port: int, log_level: str):
+    """Serve the app on the inherited socket until uvicorn is told to stop"""
+    import uvicorn
+    
+    from main import app
+    
+    # The master's handlers signal every worker; here uvicorn installs its own on startup
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level=log_level))
+    server.run(sockets=[sock])
+
+def serve(workers: int = PREFORK_WORKERS, host: str = '127.0.0.1', port: int = 8001, preload: bool = True,
+          log_level: str = 'info'):
+    """
+    Fork workers serving the app on one socket and restart any that die
+    preload=False skips the shared build, so every worker builds its own copy as `uvicorn --workers` does
+    """
+    if preload:
+        start = time.perf_counter()
+        prepare_shared_state()
+        print(f"Master {os.getpid()} prepared shared search state in {time.perf_counter() - start:.2f}s")
+    sock = bind_socket(host, port)
+    children: Dict[int, int] = {}  # pid -> worker slot
+    stopping = False
+    
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                run_worker(sock, host, port, log_level)
+                status = 0
+            finally:
+                # Never fall back into the master's loop from a worker
+                os._exit(status)
+        children[pid] = slot
+    
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for slot in range(max(workers, 1)):
+        spawn(slot)
+    print(f"Serving on http://{host}:{port} with {len(children)} workers: {', '.join(map(str, children))}")
+    
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        slot = children.pop(pid, None)
+        if slot is not None and not stopping:
+            print(f"Worker {pid} exited with status {status}; starting a replacement")
+            spawn(slot)
+    sock.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=PREFORK_WORKERS, help='Worker processes (TEMPLE_WORKERS)')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--no-preload', action='store_true', help='Let every worker build its own indexes')
+    parser.add_argument('--log-level', default='info')
+    args = parser.parse_args()
+    serve(args.workers, args.host, args.port, preload=not args.no_preload, log_level=args.log_level)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Sampling profiler for slow searches
+While tracked work runs, a background thread samples its stack; calls slower than a threshold
+write their samples as collapsed stacks ("outer;inner;leaf count" lines) for flamegraph.pl or speedscope
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from functools import partial
+from typing import Callable, Dict
+
+from metrics import registry
+
+# Calls on the search pool slower than this many ms dump a profile; 0 disables the profiler
+PROFILE_SLOW_MS = float(os.environ.get('TEMPLE_PROFILE_SLOW_MS', '0'))
+# Milliseconds between stack samples of each tracked call
+PROFILE_INTERVAL_MS = float(os.environ.get('TEMPLE_PROFILE_INTERVAL_MS', '5'))
+# Where .folded files go, and how many one process writes before it stops
+PROFILE_DIR = os.environ.get('TEMPLE_PROFILE_DIR', 'profiles')
+PROFILE_MAX_DUMPS = int(os.environ.get('TEMPLE_PROFILE_MAX_DUMPS', '100'))
+
+def collapse_stack(frame) -> str:
+    """Frames from outermost to innermost, one entry per function, joined by semicolons"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+class SlowCallProfiler:
+    """Samples the threads running wrapped calls and keeps the stacks of the slow ones"""
+    
+    def __init__(self, slow_ms: float = PROFILE_SLOW_MS, interval_ms: float = PROFILE_INTERVAL_MS,
+                 output_dir: str = PROFILE_DIR, max_dumps: int = PROFILE_MAX_DUMPS):
+        self.slow_ms = slow_ms
+        self.interval = max(interval_ms, 0.1) / 1000
+        self.output_dir = output_dir
+        self.max_dumps = max_dumps
+        self.dumps = 0
+        self._samples: Dict[int, Counter] = {}  # thread id -> stack -> samples, for calls in progress
+        self._lock = threading.Lock()
+        self._sampler = None
+        self._slow_calls = registry.counter(
+            'temple_slow_calls_total', 'Search pool calls slower than TEMPLE_PROFILE_SLOW_MS'
+        )
+    
+    @property
+    def enabled(self) -> bool:
+        return self.slow_ms > 0
+    
+    def wrap(self, fn: Callable) -> Callable:
+        """fn itself when profiling is off, otherwise fn sampled while it runs"""
+        return partial(self.call, fn) if self.enabled else fn
+    
+    def call(self, fn: Callable, *args, **kwargs):
+        samples = Counter()
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._samples[thread_id] = samples
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample_forever, name='profiler', daemon=True)
+                self._sampler.start()
+        
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                del self._samples[thread_id]
+            if elapsed_ms >= self.slow_ms:
+                self._slow_calls.inc()
+                if samples and self.dumps < self.max_dumps:
+                    self._dump(fn, elapsed_ms, samples)
+    
+    def _sample_forever(self):
+        while True:
+            time.sleep(self.interval)
+            # Sample under the lock so a finishing call never sees its counts change mid-dump
+            with self._lock:
+                if not self._samples:
+                    continue
+                frames = sys._current_frames()
+                for thread_id, samples in self._samples.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[collapse_stack(frame)] += 1
+    
+    def _dump(self, fn: Callable, elapsed_ms: float, samples: Counter):
+        self.dumps += 1
+        target = fn.func if isinstance(fn, partial) else fn
+        name = getattr(target, '__name__', 'call')
+        os.makedirs(self.output_dir, exist_ok=True)
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{elapsed_ms:.0f}ms-{self.dumps}.folded"
+        path = os.path.join(self.output_dir, filename)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in samples.most_common())
+        print(f"Slow call {name} took {elapsed_ms:.0f} ms; {sum(samples.values())} stack samples written to {path}")
+
+# Global profiler wrapped around search pool calls
+profiler = SlowCallProfiler()
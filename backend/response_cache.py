@@ -0,0 +1,224 @@
+"""
+Two-tier response cache for search endpoints
+An in-process LRU with TTL in front of an optional shared backend, keyed on the served index versions
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+from bm25_index import lexical_index
+from embeddings import normalize_query_text
+from vector_store import index_version, is_ready
+
+# Entries kept in the in-process tier; 0 disables response caching
+RESPONSE_CACHE_SIZE = int(os.environ.get('TEMPLE_RESPONSE_CACHE_SIZE', '1024'))
+# Seconds an entry stays valid in either tier
+RESPONSE_CACHE_TTL = float(os.environ.get('TEMPLE_RESPONSE_CACHE_TTL', '300'))
+# SQLite file shared by every worker on the host; unset keeps the cache in-process only
+RESPONSE_CACHE_DB = os.environ.get('TEMPLE_RESPONSE_CACHE_DB')
+
+class CacheBackend:
+    """Shared cache tier storing JSON-serializable values by string key"""
+    
+    def get(self, key: str) -> Optional[Dict]:
+        raise NotImplementedError
+    
+    def set(self, key: str, value: Dict, ttl: float):
+        raise NotImplementedError
+    
+    def clear(self):
+        raise NotImplementedError
+
+class SQLiteCacheBackend(CacheBackend):
+    """Shared tier in a local SQLite file; stands in for Redis or memcached on a single host"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)'
+            )
+    
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections cannot be shared across threads, so each worker thread opens its own
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+    
+    def get(self, key: str) -> Optional[Dict]:
+        row = self._connection().execute(
+            'SELECT value FROM responses WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def set(self, key: str, value: Dict, ttl: float):
+        with self._connection() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, json.dumps(value), time.time() + ttl),
+            )
+            # Opportunistically drop expired rows so the file does not grow without bound
+            connection.execute('DELETE FROM responses WHERE expires_at <= ?', (time.time(),))
+    
+    def clear(self):
+        with self._connection() as connection:
+            connection.execute('DELETE FROM responses')
+
+class ResponseCache:
+    """
+    LRU + TTL response cache with an optional shared tier
+    Keys include the vector index version, so any add, update or delete makes older entries unreachable,
+    and the version the BM25 index was built from, so hybrid responses computed while it still serves
+    the previous catalog are not found again once its rebuild lands
+    """
+    
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL,
+                 shared: Optional[CacheBackend] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared = shared
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._version = None
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self._hit_ms = 0.0
+        self._miss_ms = 0.0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+    
+    def make_key(self, endpoint: str, query: str, filters: Optional[Dict], limit: Optional[int]) -> str:
+        """Stable key for a request against the current index versions"""
+        version = (index_version(), lexical_index.version or '')
+        with self._lock:
+            if version != self._version:
+                # Everything cached so far is for an older index; free it rather than wait for eviction
+                self._entries.clear()
+                self._version = version
+        
+        request = json.dumps([endpoint, normalize_query_text(query), filters or {}, limit], sort_keys=True)
+        return f"{version[0][:16]}:{version[1][:16]}:{hashlib.sha256(request.encode('utf-8')).hexdigest()}"
+    
+    def get_local(self, key: str) -> Optional[Dict]:
+        """Look a key up in the in-process tier"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+    
+    def get_shared(self, key: str) -> Optional[Dict]:
+        """Look a key up in the shared tier, promoting hits into the in-process tier"""
+        if self.shared is None:
+            return None
+        try:
+            value = self.shared.get(key)
+        except sqlite3.Error as e:
+            print(f"Shared response cache unavailable: {e}")
+            return None
+        if value is not None:
+            self._put_local(key, value)
+        return value
+    
+    def put(self, key: str, value: Dict):
+        """Store a response in both tiers"""
+        self._put_local(key, value)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, value, self.ttl)
+            except sqlite3.Error as e:
+                print(f"Shared response cache unavailable: {e}")
+    
+    def _put_local(self, key: str, value: Dict):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def record(self, tier: Optional[str], elapsed_ms: float):
+        """Count a lookup outcome: tier is 'memory', 'shared' or None for a miss"""
+        with self._lock:
+            if tier is None:
+                self.misses += 1
+                self._miss_ms += elapsed_ms
+            else:
+                if tier == 'memory':
+                    self.memory_hits += 1
+                else:
+                    self.shared_hits += 1
+                self._hit_ms += elapsed_ms
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.shared is not None:
+            self.shared.clear()
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self.memory_hits + self.shared_hits
+            lookups = hits + self.misses
+            mean_miss_ms = self._miss_ms / self.misses if self.misses else 0.0
+            mean_hit_ms = self._hit_ms / hits if hits else 0.0
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'shared_tier': type(self.shared).__name__ if self.shared else None,
+                'memory_hits': self.memory_hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+                'mean_hit_ms': round(mean_hit_ms, 3),
+                'mean_miss_ms': round(mean_miss_ms, 3),
+                # Time not spent recomputing, estimated from the average miss
+                'saved_ms': round(hits * max(mean_miss_ms - mean_hit_ms, 0.0), 1),
+            }
+
+# Global response cache for the search endpoints
+response_cache = ResponseCache(shared=SQLiteCacheBackend(RESPONSE_CACHE_DB) if RESPONSE_CACHE_DB else None)
+
+async def cached_response(endpoint: str, query: str, filters: Optional[Dict], limit: Optional[int],
+                          compute: Callable[[], Awaitable[Dict]]) -> Dict:
+    """Serve a response from the cache tiers, or compute and store it"""
+    # Until the index is built there is no version to key entries by, and reading one would block the loop
+    if not response_cache.enabled or not is_ready():
+        return await compute()
+    
+    start = time.perf_counter()
+    key = response_cache.make_key(endpoint, query, filters, limit)
+    tier = 'memory'
+    value = response_cache.get_local(key)
+    if value is None and response_cache.shared is not None:
+        # The shared tier does blocking I/O, so keep it off the event loop
+        tier = 'shared'
+        value = await asyncio.get_running_loop().run_in_executor(None, response_cache.get_shared, key)
+    if value is None:
+        tier = None
+        value = await compute()
+        if response_cache.shared is not None:
+            await asyncio.get_running_loop().run_in_executor(None, response_cache.put, key, value)
+        else:
+            response_cache.put(key, value)
+    
+    response_cache.record(tier, (time.perf_counter() - start) * 1000)
+    return value
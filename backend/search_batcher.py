@@ -0,0 +1,132 @@
+"""
+Micro-batching for concurrent searches
+Queries arriving within a short window are embedded together and answered by one batched index search
+"""
+
+import asyncio
+import os
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_tool import process_query_batch
+from search_pool import SearchPool, SearchPoolSaturated, search_pool
+from vector_store import search_temples_vector_batch
+
+# How long the first query of a batch waits for company; 0 sends every query on its own
+BATCH_WINDOW_MS = float(os.environ.get('TEMPLE_BATCH_WINDOW_MS', '2'))
+# A batch is sent as soon as it holds this many queries, even inside the window
+BATCH_MAX_SIZE = int(os.environ.get('TEMPLE_BATCH_MAX_SIZE', '32'))
+
+class MicroBatcher:
+    """
+    Coalesces concurrent submissions into calls of batch_fn(items) -> results, one result per item
+    Runs on the event loop; the batch itself runs on the shared search pool
+    """
+    
+    def __init__(self, batch_fn: Callable[[List], List], window_ms: float = BATCH_WINDOW_MS,
+                 max_batch: int = BATCH_MAX_SIZE, pool: SearchPool = None):
+        self.batch_fn = batch_fn
+        self.pool = pool or search_pool
+        self.window = max(window_ms, 0.0) / 1000
+        self.max_batch = max(max_batch, 1)
+        self._pending: List[Tuple[object, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running = set()  # Strong references so in-flight batch tasks are not collected
+        self.batch_sizes = Counter()
+    
+    async def submit(self, item):
+        """Queue one item and wait for its result from the next batch"""
+        if not self.window or self.max_batch == 1:
+            self.batch_sizes[1] += 1
+            return (await self.pool.run(self.batch_fn, [item]))[0]
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+    
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        
+        self.batch_sizes[len(batch)] += 1
+        task = asyncio.ensure_future(self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+    
+    def _run_each(self, items: List) -> List[Tuple[object, Optional[Exception]]]:
+        """Run items one at a time, so an item that fails takes only its own request down"""
+        outcomes = []
+        for item in items:
+            try:
+                outcomes.append((self.batch_fn([item])[0], None))
+            except Exception as e:
+                outcomes.append((None, e))
+        return outcomes
+    
+    async def _run(self, batch: List[Tuple[object, asyncio.Future]]):
+        items = [item for item, _ in batch]
+        try:
+            try:
+                outcomes = [(result, None) for result in await self.pool.run(self.batch_fn, items)]
+            except SearchPoolSaturated:
+                raise
+            except Exception:
+                if len(batch) == 1:
+                    raise
+                # One bad item (invalid filters, say) fails the whole call; retry each on its own
+                outcomes = await self.pool.run(self._run_each, items)
+        except Exception as e:
+            # Saturation fails every waiter in the batch the same way
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), (result, error) in zip(batch, outcomes):
+            if future.done():  # The waiting request may have been cancelled
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+    
+    def stats(self) -> Dict:
+        batches = sum(self.batch_sizes.values())
+        queries = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            'window_ms': self.window * 1000,
+            'max_batch': self.max_batch,
+            'batches': batches,
+            'queries': queries,
+            'mean_batch_size': round(queries / batches, 2) if batches else 0.0,
+            'batch_size_histogram': dict(sorted(self.batch_sizes.items())),
+        }
+
+def vector_search_batch(items: List[Tuple[str, Optional[dict], int]]) -> List[List[Tuple[dict, float]]]:
+    """Adapt (query, filters, top_k) items to search_temples_vector_batch"""
+    queries, filters_list, top_ks = zip(*items)
+    return search_temples_vector_batch(list(queries), list(filters_list), list(top_ks))
+
+# Global batchers for the two search endpoints
+vector_batcher = MicroBatcher(vector_search_batch)
+query_batcher = MicroBatcher(process_query_batch)
+
+async def search_vector_coalesced(query: str, filters: dict = None, top_k: int = 5) -> List[Tuple[dict, float]]:
+    """Vector search that shares an index call with concurrent queries"""
+    return await vector_batcher.submit((query, filters, top_k))
+
+async def process_query_coalesced(query: str, filters: Dict = None, location: Dict = None) -> List[Dict]:
+    """Natural language query that shares an index call with concurrent queries"""
+    return await query_batcher.submit((query, filters, location))
+
+def batcher_stats() -> Dict:
+    return {'vector_search': vector_batcher.stats(), 'query': query_batcher.stats()}
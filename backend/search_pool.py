@@ -0,0 +1,103 @@
+"""
+Bounded thread pool for CPU-bound search work
+Keeps embedding and FAISS scans off the asyncio event loop and sheds load when saturated
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict
+
+from profiler import profiler
+
+# Worker threads running searches; 0 runs them inline on the event loop (the old behaviour)
+SEARCH_WORKERS = int(os.environ.get('TEMPLE_SEARCH_WORKERS', str(os.cpu_count() or 1)))
+# Calls allowed to wait for a worker before new ones are rejected; 0 derives it from the worker count
+SEARCH_QUEUE_DEPTH = int(os.environ.get('TEMPLE_SEARCH_QUEUE_DEPTH', '0'))
+# OpenMP threads each worker lets FAISS use; more than 1 oversubscribes cores when workers run together
+SEARCH_FAISS_THREADS = int(os.environ.get('TEMPLE_SEARCH_FAISS_THREADS', '1'))
+# Seconds clients are told to wait before retrying a rejected call
+RETRY_AFTER_SECONDS = 1
+
+def _init_worker(faiss_threads: int):
+    # omp_set_num_threads only affects the calling thread, so each worker sets its own; faiss is
+    # imported here so modules that only need the pool do not pay for it at import time
+    import faiss
+    faiss.omp_set_num_threads(faiss_threads)
+
+class SearchPoolSaturated(Exception):
+    """Raised when every worker is busy and the wait queue is full"""
+
+class SearchPool:
+    """Runs blocking callables on worker threads, admitting at most workers + queue_depth at once"""
+    
+    def __init__(self, workers: int = SEARCH_WORKERS, queue_depth: int = SEARCH_QUEUE_DEPTH,
+                 faiss_threads: int = SEARCH_FAISS_THREADS):
+        self.workers = max(workers, 0)
+        self.queue_depth = queue_depth if queue_depth > 0 else 8 * max(self.workers, 1)
+        self._executor = None
+        if self.workers:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix='search',
+                initializer=_init_worker, initargs=(max(faiss_threads, 1),),
+            )
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+        self._completed = 0
+    
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_depth
+    
+    def _admit(self):
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._rejected += 1
+                raise SearchPoolSaturated(f"{self._in_flight} searches in flight; try again shortly")
+            self._in_flight += 1
+    
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+    
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Await fn(*args, **kwargs) on a worker thread, raising SearchPoolSaturated if over capacity"""
+        # Slow calls leave a stack profile behind when TEMPLE_PROFILE_SLOW_MS is set
+        call = profiler.wrap(partial(fn, *args, **kwargs))
+        if self._executor is None:
+            return call()
+        
+        self._admit()
+        try:
+            future = self._executor.submit(call)
+        except BaseException:
+            self._release()
+            raise
+        # Release the slot when the work finishes, not when the awaiting request goes away
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queue_depth': self.queue_depth,
+                'in_flight': self._in_flight,
+                'completed': self._completed,
+                'rejected': self._rejected,
+            }
+    
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+# Global pool shared by every endpoint
+search_pool = SearchPool()
+
+async def run_search(fn: Callable, *args, **kwargs):
+    """Run a blocking search call on the shared pool"""
+    return await search_pool.run(fn, *args, **kwargs)
@@ -0,0 +1,45 @@
+"""
+Fast JSON encoding for API responses
+Encodes with orjson when it is installed (pip install orjson) and assembles responses from already
+encoded fragments, so large results skip Pydantic validation and the standard encoder
+"""
+
+import json
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Fields a temple record can be projected to with ?fields=
+TEMPLE_FIELDS = ('id', 'name', 'deity', 'state', 'city', 'history', 'photo_url', 'location',
+                 'era', 'architecture', 'significance')
+
+def dumps(value) -> bytes:
+    """Compact UTF-8 JSON, through orjson when it is available"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def json_array(items: Iterable[bytes]) -> bytes:
+    """JSON array from already encoded items"""
+    return b'[' + b','.join(items) + b']'
+
+def json_object(**members: bytes) -> bytes:
+    """JSON object from already encoded member values, in keyword order"""
+    return b'{' + b','.join(dumps(key) + b':' + value for key, value in members.items()) + b'}'
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Validate a comma-separated field projection; None or blank keeps whole records"""
+    if not fields or not fields.strip():
+        return None
+    selected = tuple(dict.fromkeys(field.strip() for field in fields.split(',') if field.strip()))
+    unknown = [field for field in selected if field not in TEMPLE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields {', '.join(unknown)}; expected some of {', '.join(TEMPLE_FIELDS)}")
+    return selected
+
+def project(temple: Dict, fields: Tuple[str, ...]) -> Dict:
+    """The selected fields of a temple record, in the order they were asked for"""
+    return {field: temple[field] for field in fields if field in temple}
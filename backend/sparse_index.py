@@ -0,0 +1,168 @@
+"""
+Exact inner-product search over sparse embeddings
+Documents stay in a compressed sparse column matrix, so a query only reads the columns it has weight in
+"""
+
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+# Writes land in a small tail matrix that is folded into the main one once the tail and the rows
+# deleted from main outnumber this fraction of main (or MIN_CHANGED_ROWS), so a single-row write
+# costs O(tail) and the O(corpus) fold is paid once per many writes
+FOLD_FRACTION = 32
+MIN_CHANGED_ROWS = 4096
+
+# (column matrix, row ids, live mask)
+Segment = Tuple[sparse.csc_matrix, np.ndarray, np.ndarray]
+
+def _rows_of(sorted_ids: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """Rows of a sorted, unique id array holding any of ids"""
+    if not len(sorted_ids):
+        return np.empty(0, dtype=np.int64)
+    rows = np.minimum(np.searchsorted(sorted_ids, ids), len(sorted_ids) - 1)
+    return rows[sorted_ids[rows] == ids]
+
+def _compacted(segments: Sequence[Segment], sort_ids: bool) -> Segment:
+    """The live rows of segments in one column matrix, ordered by id if asked"""
+    matrix = sparse.vstack([matrix for matrix, _, _ in segments], format='csr', dtype=np.float32)
+    ids = np.concatenate([ids for _, ids, _ in segments])
+    rows = np.flatnonzero(np.concatenate([alive for _, _, alive in segments]))
+    if sort_ids:
+        rows = rows[np.argsort(ids[rows], kind='stable')]
+    return matrix[rows].tocsc(), ids[rows], np.ones(len(rows), dtype=np.bool_)
+
+class SparseVectorIndex:
+    """
+    Inner-product index over sparse rows keyed by temple id, searched like a FAISS index
+    Rows live in a main column matrix sorted by id plus a tail of recent writes. Added rows wait in
+    pending blocks until the next search merges them into the tail, deleted rows are masked, and both
+    are folded into the main matrix once enough accumulate. Only documents sharing a feature with the
+    query can match, so a search may return fewer than k hits, padded with id -1 as FAISS does
+    """
+    
+    def __init__(self, dimension: int):
+        self.d = dimension
+        self.is_trained = True
+        self.ntotal = 0
+        self._main = self._empty()
+        self._tail = self._empty()
+        self._pending: List[Tuple[sparse.csr_matrix, np.ndarray]] = []
+        # Searches run concurrently under the store's read lock and may merge pending rows
+        self._lock = threading.Lock()
+    
+    def _empty(self) -> Segment:
+        return (sparse.csc_matrix((0, self.d), dtype=np.float32), np.empty(0, dtype=np.int64),
+                np.empty(0, dtype=np.bool_))
+    
+    @property
+    def nbytes(self) -> int:
+        blocks = [(matrix, ids) for matrix, ids, _ in (self._main, self._tail)] + self._pending
+        return sum(matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes + ids.nbytes
+                   for matrix, ids in blocks)
+    
+    def train(self, vectors):
+        """Nothing to learn; present so the index can be used like any FAISS index"""
+    
+    def add_with_ids(self, vectors: sparse.spmatrix, ids: np.ndarray):
+        """Queue rows under temple ids that are not live in the index (remove them first to replace)"""
+        vectors = sparse.csr_matrix(vectors, dtype=np.float32)
+        if vectors.shape[1] != self.d:
+            raise ValueError(f"Expected {self.d}-dimensional vectors, got {vectors.shape[1]}")
+        self._pending.append((vectors, np.asarray(ids, dtype=np.int64)))
+        self.ntotal += vectors.shape[0]
+    
+    def remove_ids(self, ids: np.ndarray) -> int:
+        """Mask rows by temple id, returning how many were removed; callers exclude concurrent searches"""
+        ids = np.asarray(ids, dtype=np.int64)
+        (_, main_ids, main_alive), (_, tail_ids, tail_alive) = self._segments()
+        main_rows = _rows_of(main_ids, ids)
+        main_rows = main_rows[main_alive[main_rows]]
+        tail_rows = np.flatnonzero(np.isin(tail_ids, ids) & tail_alive)
+        main_alive[main_rows] = False
+        tail_alive[tail_rows] = False
+        count = len(main_rows) + len(tail_rows)
+        self.ntotal -= count
+        return count
+    
+    def _segments(self) -> Tuple[Segment, Segment]:
+        """Main and tail segments with pending rows merged into the tail, folding the tail into main once it grows"""
+        with self._lock:
+            if self._pending:
+                self._tail = _compacted([self._tail] + [(block, ids, np.ones(len(ids), dtype=np.bool_))
+                                                         for block, ids in self._pending], sort_ids=False)
+                self._pending = []
+            main_rows = len(self._main[1])
+            changed = len(self._tail[1]) + main_rows - int(np.count_nonzero(self._main[2]))
+            if changed > max(MIN_CHANGED_ROWS, main_rows // FOLD_FRACTION):
+                self._main = _compacted([self._main, self._tail], sort_ids=True)
+                self._tail = self._empty()
+            return self._main, self._tail
+    
+    def search(self, queries: sparse.spmatrix, k: int,
+               candidates: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k (scores, ids) per query row, optionally among candidate temple ids only"""
+        queries = sparse.csr_matrix(queries, dtype=np.float32)
+        scores = np.full((queries.shape[0], k), -np.inf, dtype=np.float32)
+        labels = np.full((queries.shape[0], k), -1, dtype=np.int64)
+        if k <= 0:
+            return scores, labels
+        
+        # Products touch only the query's columns; each segment gives one sparse score column per query
+        columns = np.unique(queries.indices)
+        segments = []
+        for position, (matrix, ids, alive) in enumerate(self._segments()):
+            if not len(ids):
+                continue
+            allowed = alive
+            if candidates is not None:
+                if position == 0:
+                    allowed = np.zeros(len(ids), dtype=np.bool_)
+                    allowed[_rows_of(ids, np.asarray(candidates, dtype=np.int64))] = True
+                    allowed &= alive
+                else:
+                    allowed = alive & np.isin(ids, candidates)
+            products = (matrix[:, columns] @ queries[:, columns].T).tocsc()
+            segments.append((products, ids, allowed))
+        
+        for row in range(queries.shape[0]):
+            values, row_ids = [], []
+            for products, ids, allowed in segments:
+                start, end = products.indptr[row], products.indptr[row + 1]
+                rows = products.indices[start:end]
+                keep = allowed[rows]
+                values.append(products.data[start:end][keep])
+                row_ids.append(ids[rows[keep]])
+            if not segments:
+                break
+            values, row_ids = np.concatenate(values), np.concatenate(row_ids)
+            if len(values) > k:
+                best = np.argpartition(-values, k - 1)[:k]
+                values, row_ids = values[best], row_ids[best]
+            order = np.argsort(-values, kind='stable')
+            scores[row, :len(order)] = values[order]
+            labels[row, :len(order)] = row_ids[order]
+        return scores, labels
+    
+    def save(self, path: str):
+        matrix, ids, _ = _compacted(self._segments(), sort_ids=True)
+        with open(path, 'wb') as f:
+            np.savez(f, dimension=self.d, data=matrix.data, indices=matrix.indices,
+                     indptr=matrix.indptr, ids=ids)
+    
+    @classmethod
+    def load(cls, path: str) -> 'SparseVectorIndex':
+        with np.load(path) as arrays:
+            index = cls(int(arrays['dimension']))
+            ids = arrays['ids']
+            matrix = sparse.csc_matrix(
+                (arrays['data'], arrays['indices'], arrays['indptr']), shape=(len(ids), index.d)
+            )
+        index._main = (matrix, ids, np.ones(len(ids), dtype=np.bool_))
+        if np.any(ids[1:] <= ids[:-1]):
+            # Artifacts written before rows were kept in id order
+            index._main = _compacted([index._main], sort_ids=True)
+        index.ntotal = len(ids)
+        return index
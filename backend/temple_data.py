@@ -3,6 +3,20 @@ Temple dataset management module
 Contains sample Indian temple data with metadata
 """
 
+import hashlib
+import json
+import os
+from collections import Counter
+from itertools import combinations, islice
+
+from serialization import dumps
+from temple_loader import iter_dataset
+from temple_store import ColumnarTempleStore
+
+# Dataset file (.jsonl, .csv or .parquet) served instead of the sample temples below; index
+# artifacts built with build_index.py --source only load when the server reads the same file
+DATA_PATH = os.environ.get('TEMPLE_DATA_PATH')
+
 # Sample temple dataset - in production, this would be loaded from a database or scraped data
 TEMPLES_DATA = [
     {
@@ -137,32 +151,201 @@ TEMPLES_DATA = [
     }
 ]
 
+# Temples columnarized per batch while the catalog loads, bounding the dicts alive at once
+LOAD_BATCH_SIZE = 65536
+
+# Facets counted for /stats, individually and as every pairwise cross-tab
+STATS_FACETS = ('state', 'deity', 'era', 'architecture')
+STATS_CROSS_TABS = tuple(combinations(STATS_FACETS, 2))
+
+class FacetCounts:
+    """
+    Temple counts per facet value and per pair of facet values, adjusted as rows come and go
+    Callers serialize access; snapshot() renders the /stats body once per change
+    """
+    
+    def __init__(self):
+        self.total = 0
+        self.counts = {facet: Counter() for facet in STATS_FACETS}
+        self.cross_tabs = {pair: Counter() for pair in STATS_CROSS_TABS}
+        self._snapshot = None
+    
+    def add(self, temple, delta: int = 1):
+        self.total += delta
+        for facet, counts in self.counts.items():
+            counts[temple.get(facet) or ""] += delta
+        for (first, second), counts in self.cross_tabs.items():
+            counts[(temple.get(first) or "", temple.get(second) or "")] += delta
+        self._snapshot = None
+    
+    def remove(self, temple):
+        self.add(temple, -1)
+    
+    def snapshot(self):
+        """(JSON body, ETag) of the current counts; rebuilt only after a change"""
+        if self._snapshot is None:
+            stats = {"total_temples": self.total}
+            for facet, counts in self.counts.items():
+                stats[f"by_{facet}"] = {value: count for value, count in sorted(counts.items()) if count > 0}
+            cross_tabs = {}
+            for (first, second), counts in self.cross_tabs.items():
+                table = {}
+                for (first_value, second_value), count in sorted(counts.items()):
+                    if count > 0:
+                        table.setdefault(first_value, {})[second_value] = count
+                cross_tabs[f"{first}_{second}"] = table
+            stats["cross_tabs"] = cross_tabs
+            
+            body = json.dumps(stats, separators=(",", ":")).encode("utf-8")
+            # Derived from the content, so every worker serving the same data hands out the same tag
+            self._snapshot = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        return self._snapshot
+
+class TempleCatalog:
+    """
+    Temple dataset held in one columnar table (see temple_store), plus /stats counts and encoded JSON
+    Records become dicts only when read; the vector store built over the catalog shares its table
+    """
+    
+    def __init__(self, temples):
+        self.records = ColumnarTempleStore()
+        # Bumped on every change so caches derived from the catalog can tell they are stale
+        self.version = 0
+        self.facet_counts = FacetCounts()
+        # id -> JSON bytes of the temple; responses are assembled from these instead of re-encoding
+        self._encoded = {}
+        # Vector store indexing these records; once attached, writes go through it so that
+        # vectors and records change under one lock
+        self._index = None
+        
+        temples = iter(temples)
+        batch = list(islice(temples, LOAD_BATCH_SIZE))
+        while batch:
+            self.apply_upsert(batch)
+            batch = list(islice(temples, LOAD_BATCH_SIZE))
+    
+    def __len__(self):
+        return len(self.records)
+    
+    def attach_index(self, index):
+        """Send later writes through a vector store sharing the records; callers hold the records lock"""
+        self._index = index
+    
+    def apply_upsert(self, temples):
+        """Insert new temples and replace existing ones in place; callers hold the records lock for writing"""
+        # Within one batch the last record for an ID wins
+        temples = list({temple["id"]: temple for temple in temples}.values())
+        for temple in temples:
+            previous = self.records.get(temple["id"])
+            if previous is not None:
+                self.facet_counts.remove(previous)
+                self._encoded.pop(temple["id"], None)
+            self.facet_counts.add(temple)
+        self.records.extend(temples)
+        self.version += 1
+    
+    def apply_delete(self, temple_ids):
+        """Remove temples by ID, returning how many existed; callers hold the records lock for writing"""
+        removed = 0
+        for temple_id in set(temple_ids):
+            previous = self.records.get(temple_id)
+            if previous is not None:
+                self.facet_counts.remove(previous)
+                self._encoded.pop(temple_id, None)
+                removed += 1
+        if removed:
+            self.records.delete(temple_ids)
+            self.version += 1
+        return removed
+    
+    def upsert(self, temples):
+        """Insert new temples and replace existing ones in place, keeping their position"""
+        with self.records.lock.write():
+            if self._index is None:
+                self.apply_upsert(temples)
+                return
+        self._index.upsert_temples(temples)
+    
+    def delete(self, temple_ids):
+        """Remove temples by ID, returning how many existed"""
+        with self.records.lock.write():
+            if self._index is None:
+                return self.apply_delete(temple_ids)
+        return self._index.delete_temples(temple_ids)
+    
+    def stats_snapshot(self):
+        """(JSON body, ETag) of dataset statistics, maintained as temples change"""
+        with self.records.lock.read():
+            return self.facet_counts.snapshot()
+    
+    def encoded(self, temple_id: int):
+        """
+        JSON bytes of a temple by ID, or None; encoded once and reused until the record is replaced or
+        deleted, so every search result or listing that returns the temple shares one encoding
+        """
+        body = self._encoded.get(temple_id)
+        if body is not None:
+            return body
+        with self.records.lock.read():
+            version = self.version
+            temple = self.records.get(temple_id)
+        if temple is None:
+            return None
+        body = dumps(temple)
+        with self.records.lock.read():
+            # Kept only if no write landed while encoding, so an entry always matches the current record
+            if self.version == version:
+                self._encoded[temple_id] = body
+        return body
+    
+    def encode_all(self):
+        """Encode every temple up front, so no request pays for it and pre-forked workers share the bytes"""
+        with self.records.lock.read():
+            version = self.version
+            temples = self.records.live_records()
+        encoded = {temple_id: dumps(temples[position])
+                   for position, temple_id in enumerate(temples.ids.tolist()) if temple_id not in self._encoded}
+        with self.records.lock.read():
+            if self.version == version:
+                self._encoded.update(encoded)
+    
+    def all(self):
+        """Every temple in dataset order, as a sequence that materializes records as they are read"""
+        with self.records.lock.read():
+            return self.records.live_records()
+    
+    def get(self, temple_id: int):
+        """Return a temple by ID, or None"""
+        with self.records.lock.read():
+            return self.records.get(temple_id)
+    
+    def filter(self, **criteria):
+        """Temples matching every given facet value (case-insensitive), in dataset order"""
+        criteria = {facet: value for facet, value in criteria.items() if value}
+        with self.records.lock.read():
+            return self.records.filter(criteria)
+
+def load_dataset(path=None):
+    """Temples from the dataset file at path or TEMPLE_DATA_PATH, or the sample temples if neither is set"""
+    path = path or DATA_PATH
+    if not path:
+        return TEMPLES_DATA
+    return iter_dataset(path)
+
+catalog = TempleCatalog(load_dataset())
+
 def get_all_temples():
     """Return all temples in the dataset"""
-    return TEMPLES_DATA
+    return catalog.all()
 
 def get_temple_by_id(temple_id: int):
     """Return a specific temple by ID"""
-    for temple in TEMPLES_DATA:
-        if temple["id"] == temple_id:
-            return temple
-    return None
+    return catalog.get(temple_id)
 
-def search_temples_by_filters(state=None, deity=None, era=None):
+def search_temples_by_filters(state=None, deity=None, era=None, city=None, architecture=None):
     """Filter temples by various criteria"""
-    filtered_temples = TEMPLES_DATA
-    
-    if state:
-        filtered_temples = [t for t in filtered_temples if t["state"].lower() == state.lower()]
-    
-    if deity:
-        filtered_temples = [t for t in filtered_temples if t["deity"].lower() == deity.lower()]
-    
-    if era:
-        filtered_temples = [t for t in filtered_temples if t["era"].lower() == era.lower()]
-    
-    return filtered_temples
+    return catalog.filter(state=state, deity=deity, era=era, city=city, architecture=architecture)
 
 def get_temple_text_for_embedding(temple):
     """Create searchable text for a temple for vector embeddings"""
-    return f"{temple['name']} {temple['deity']} {temple['state']} {temple['city']} {temple['history']} {temple['era']} {temple['architecture']}"
+    return f"{temple['name']} {temple['deity']} {temple['state']} {temple['city']} {temple.get('history', '')} {temple['era']} {temple.get('architecture', '')}"
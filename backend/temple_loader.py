@@ -0,0 +1,182 @@
+"""
+Streaming bulk loader for large temple datasets
+Reads JSONL, CSV or Parquet files in chunks and feeds them into a TempleVectorStore
+"""
+
+import csv
+import json
+import os
+import random
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# embeddings and vector_store import temple_data, which loads TEMPLE_DATA_PATH through this module,
+# so the functions that build stores import them when called
+
+REQUIRED_FIELDS = ('id', 'name', 'deity', 'state', 'city', 'era')
+TEXT_FIELDS = ('name', 'deity', 'state', 'city', 'history', 'photo_url', 'era', 'architecture', 'significance')
+
+def iter_jsonl(path: str) -> Iterator[Dict]:
+    """Yield one record per non-empty line of a JSON Lines file"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def iter_csv(path: str) -> Iterator[Dict]:
+    """Yield one record per CSV row; location comes from lat/lng columns"""
+    with open(path, encoding='utf-8', newline='') as f:
+        yield from csv.DictReader(f)
+
+def iter_parquet(path: str, batch_size: int = 10000) -> Iterator[Dict]:
+    """Yield records from a Parquet file one record batch at a time"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Loading Parquet files requires pyarrow (pip install pyarrow)") from e
+    
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        yield from batch.to_pylist()
+
+READERS = {
+    '.jsonl': iter_jsonl,
+    '.ndjson': iter_jsonl,
+    '.csv': iter_csv,
+    '.parquet': iter_parquet,
+}
+
+def iter_records(path: str) -> Iterator[Dict]:
+    """Stream raw records from a dataset file, picking the reader from its extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in READERS:
+        raise ValueError(f"Unsupported dataset format '{extension}', expected one of {', '.join(READERS)}")
+    return READERS[extension](path)
+
+def validate_temple(record: Dict) -> Dict:
+    """Normalize a raw record to the TEMPLES_DATA schema, raising ValueError if it is unusable"""
+    missing = [field for field in REQUIRED_FIELDS if record.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f"missing required fields: {', '.join(missing)}")
+    
+    # Optional fields the record leaves out stay out, rather than coming back as empty strings
+    temple = {field: str(record[field]) for field in TEXT_FIELDS if record.get(field) not in (None, '')}
+    try:
+        temple['id'] = int(record['id'])
+        location = record.get('location') or {}
+        if isinstance(location, str):
+            location = json.loads(location)
+        lat, lng = location.get('lat', record.get('lat')), location.get('lng', record.get('lng'))
+        if lat not in (None, '') or lng not in (None, ''):
+            temple['location'] = {'lat': float(lat), 'lng': float(lng)}
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"invalid id or location: {e}") from e
+    return temple
+
+def iter_valid_temples(records: Iterable[Dict], stats: Optional[Dict] = None) -> Iterator[Dict]:
+    """Validate records, counting and skipping the ones that cannot be loaded"""
+    for record in records:
+        if stats is not None:
+            stats['rows_read'] += 1
+        try:
+            yield validate_temple(record)
+        except ValueError as e:
+            if stats is not None:
+                stats['rows_invalid'] += 1
+                if stats['rows_invalid'] <= 10:
+                    print(f"Skipping record {record.get('id')!r}: {e}")
+
+def iter_chunks(items: Iterable, chunk_size: int) -> Iterator[List]:
+    """Group an iterable into lists of at most chunk_size items"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def sample_temples(path: str, sample_size: int, seed: int = 0) -> List[Dict]:
+    """Uniform sample of a dataset file's valid temples, reservoir-sampled in one streaming pass"""
+    rng = random.Random(seed)
+    sample = []
+    for seen, temple in enumerate(iter_valid_temples(iter_records(path))):
+        if seen < sample_size:
+            sample.append(temple)
+        else:
+            slot = rng.randrange(seen + 1)
+            if slot < sample_size:
+                sample[slot] = temple
+    return sample
+
+def _chunk_size(chunk_size: Optional[int]) -> int:
+    from vector_store import BUILD_BATCH_SIZE
+    chunk_size = BUILD_BATCH_SIZE if chunk_size is None else chunk_size
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+    return chunk_size
+
+def _new_stats() -> Dict:
+    return {'rows_read': 0, 'rows_loaded': 0, 'rows_invalid': 0, 'seconds': 0.0, 'rows_per_sec': 0.0}
+
+def iter_dataset(path: str) -> Iterator[Dict]:
+    """Stream every valid temple of a dataset file in file order, reporting the count once done"""
+    stats = _new_stats()
+    yield from iter_valid_temples(iter_records(path), stats)
+    print(f"Loaded {stats['rows_read'] - stats['rows_invalid']} temples from {path} "
+          f"({stats['rows_invalid']} invalid rows skipped)")
+
+def load_into_store(path: str, store: 'TempleVectorStore', chunk_size: Optional[int] = None) -> Dict:
+    """
+    Stream a dataset file into an existing store: validate, build text, embed and add per chunk
+    Only one chunk of records is held by the pipeline at a time
+    """
+    chunk_size = _chunk_size(chunk_size)
+    stats = _new_stats()
+    start = time.perf_counter()
+    
+    for chunk in iter_chunks(iter_valid_temples(iter_records(path), stats), chunk_size):
+        store.add_temples(chunk)
+        stats['rows_loaded'] += len(chunk)
+        elapsed = time.perf_counter() - start
+        print(f"Loaded {stats['rows_loaded']} temples ({stats['rows_loaded'] / elapsed:,.0f} rows/sec)")
+    
+    stats['seconds'] = round(time.perf_counter() - start, 3)
+    if stats['seconds']:
+        stats['rows_per_sec'] = round(stats['rows_loaded'] / stats['seconds'], 1)
+    return stats
+
+def build_store_from_file(path: str, chunk_size: Optional[int] = None,
+                          index_type: Optional[str] = None) -> 'TempleVectorStore':
+    """
+    Build a vector store from a dataset file in streaming passes
+    The first pass collects the vocabulary and row count, the second embeds and indexes; IVF and PQ
+    indexes take one more in between to draw their training sample from the whole file
+    """
+    from embeddings import create_embedding
+    from vector_store import TempleVectorStore, training_sample_size
+    chunk_size = _chunk_size(chunk_size)
+    vocab_stats = _new_stats()
+    valid_temples = iter_valid_temples(iter_records(path), vocab_stats)
+    embedding_model = create_embedding(temples=valid_temples)
+    if embedding_model.embedding_type == 'vocab':
+        expected_size = vocab_stats['rows_read'] - vocab_stats['rows_invalid']
+        print(f"Vocabulary of {len(embedding_model.vocab)} words from {expected_size} valid temples")
+    else:
+        # Other embeddings have no vocabulary, so the first pass only counts rows
+        for _ in valid_temples:
+            pass
+        expected_size = vocab_stats['rows_read'] - vocab_stats['rows_invalid']
+        print(f"{expected_size} valid temples to embed with the {embedding_model.embedding_type} embedding")
+    
+    store = TempleVectorStore(
+        temples=[], index_type=index_type, embedding_model=embedding_model, expected_size=expected_size
+    )
+    sample_size = training_sample_size(store.index, expected_size, chunk_size)
+    if sample_size:
+        print(f"Training the {store.index_type} index on {sample_size} temples sampled across the dataset")
+        store.train(sample_temples(path, sample_size))
+    stats = load_into_store(path, store, chunk_size)
+    print(f"Indexed {stats['rows_loaded']} temples in {stats['seconds']}s "
+          f"({stats['rows_per_sec']:,.0f} rows/sec, {stats['rows_invalid']} invalid rows skipped)")
+    return store
@@ -0,0 +1,386 @@
+"""
+Compact columnar storage for temple records
+Keeps low-cardinality facets as interned codes, coordinates as float64 and text in byte blobs.
+The catalog and the vector store share one table; records become dicts only when they are read.
+"""
+
+import threading
+from collections.abc import Sequence
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+CATEGORICAL_FIELDS = ('deity', 'state', 'city', 'era', 'architecture')
+TEXT_FIELDS = ('name', 'history', 'photo_url', 'significance')
+# Key order of materialized records, matching TEMPLES_DATA
+RECORD_FIELDS = ('id', 'name', 'deity', 'state', 'city', 'history', 'photo_url', 'location',
+                 'era', 'architecture', 'significance')
+# Category code of a record without the field
+ABSENT = -1
+
+def intersect_sorted(arrays: Iterable[np.ndarray]) -> Optional[np.ndarray]:
+    """Intersection of sorted, unique arrays; None when there are none to intersect"""
+    # Intersect the smallest sets first so the work tracks the most selective facet
+    result = None
+    for array in sorted(arrays, key=len):
+        result = array if result is None else np.intersect1d(result, array, assume_unique=True)
+        if len(result) == 0:
+            break
+    return result
+
+class ReadWriteLock:
+    """Lets any number of searches run together while index mutations run alone"""
+    
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writer = False
+    
+    @contextmanager
+    def read(self):
+        with self._condition:
+            while self._writer:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+    
+    @contextmanager
+    def write(self):
+        with self._condition:
+            while self._writer:
+                self._condition.wait()
+            # Claim the lock first so new readers queue behind this writer
+            self._writer = True
+            while self._readers:
+                self._condition.wait()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+class GrowableArray:
+    """1-D numpy array with amortized appends; views taken earlier stay valid after growth"""
+    
+    def __init__(self, dtype, capacity: int = 1024):
+        self._data = np.empty(max(capacity, 1), dtype=dtype)
+        self._size = 0
+    
+    def __len__(self):
+        return self._size
+    
+    def extend(self, values: np.ndarray):
+        values = np.asarray(values, dtype=self._data.dtype)
+        required = self._size + len(values)
+        if required > len(self._data):
+            grown = np.empty(max(required, 2 * len(self._data)), dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:required] = values
+        self._size = required
+    
+    def view(self) -> np.ndarray:
+        """Read-only view of the filled part of the array"""
+        view = self._data[:self._size]
+        view.flags.writeable = False
+        return view
+    
+    def set(self, positions, value):
+        self._data[:self._size][positions] = value
+    
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+class TextColumn:
+    """Variable-length UTF-8 strings stored as one byte blob plus end offsets; None marks an absent field"""
+    
+    def __init__(self):
+        self.blob = GrowableArray(np.uint8, 64 * 1024)
+        self.ends = GrowableArray(np.int64)
+        self.present = GrowableArray(np.bool_)
+    
+    def extend(self, values: List[Optional[str]]):
+        encoded = [(value or '').encode('utf-8') for value in values]
+        start = self.ends.view()[-1] if len(self.ends) else 0
+        self.ends.extend(start + np.cumsum([len(value) for value in encoded], dtype=np.int64))
+        self.blob.extend(np.frombuffer(b''.join(encoded), dtype=np.uint8))
+        self.present.extend([value is not None for value in values])
+    
+    def get(self, row: int) -> Optional[str]:
+        if not self.present.view()[row]:
+            return None
+        ends = self.ends.view()
+        start = ends[row - 1] if row else 0
+        return self.blob.view()[start:ends[row]].tobytes().decode('utf-8')
+    
+    @property
+    def nbytes(self) -> int:
+        return self.blob.nbytes + self.ends.nbytes + self.present.nbytes
+
+class CategoricalColumn:
+    """Low-cardinality strings stored as int32 codes into an interned category list"""
+    
+    def __init__(self):
+        self.codes = GrowableArray(np.int32)
+        self.categories: List[str] = []
+        self._code_of: Dict[str, int] = {}
+    
+    def code_for(self, value: Optional[str]) -> int:
+        if value is None:
+            return ABSENT
+        code = self._code_of.get(value)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(value)
+            self._code_of[value] = code
+        return code
+    
+    def extend(self, values: List[Optional[str]]):
+        self.codes.extend([self.code_for(value) for value in values])
+    
+    def get(self, row: int) -> Optional[str]:
+        code = self.codes.view()[row]
+        return None if code == ABSENT else self.categories[code]
+    
+    def codes_matching(self, value: str) -> List[int]:
+        """Codes of every category equal to value, ignoring case"""
+        value = value.casefold()
+        return [code for code, category in enumerate(self.categories) if category.casefold() == value]
+    
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes
+
+class TempleRows(Sequence):
+    """
+    Rows of a ColumnarTempleStore as a read-only sequence of dicts, each materialized when read
+    Rows are never rewritten, so a view keeps describing the records it was taken from while the store changes
+    """
+    
+    def __init__(self, store: 'ColumnarTempleStore', rows: np.ndarray):
+        self.store = store
+        self.rows = rows
+    
+    def __len__(self):
+        return len(self.rows)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return TempleRows(self.store, self.rows[index])
+        return self.store[int(self.rows[index])]
+    
+    def __iter__(self) -> Iterator[Dict]:
+        for row in self.rows.tolist():
+            yield self.store[row]
+    
+    @property
+    def ids(self) -> np.ndarray:
+        """Temple ids of the rows, without materializing them"""
+        return self.store.ids.view()[self.rows]
+    
+    def centre(self) -> Optional[Tuple[float, float]]:
+        """Mean (lat, lng) of the rows that have a location, or None if none does"""
+        lat, lng = self.store.lat.view()[self.rows], self.store.lng.view()[self.rows]
+        located = ~(np.isnan(lat) | np.isnan(lng))
+        if not located.any():
+            return None
+        return float(lat[located].mean()), float(lng[located].mean())
+
+class ColumnarTempleStore:
+    """
+    Append-only columnar temple table; records are materialized as dicts only on access
+    Updating a temple appends a new row and retires the old one, so rows are never rewritten. The new
+    row inherits the old one's place in dataset order. Writers hold lock for writing, readers for reading.
+    """
+    
+    def __init__(self, temples: Iterable[Dict] = ()):
+        self.ids = GrowableArray(np.int64)
+        self.alive = GrowableArray(np.bool_)
+        # Position in dataset order; a replacement row keeps the position of the row it retires
+        self.order = GrowableArray(np.int64)
+        self._row_of: Dict[int, int] = {}
+        self._next_order = 0
+        # NaN for temples without a location
+        self.lat = GrowableArray(np.float64)
+        self.lng = GrowableArray(np.float64)
+        self.categorical = {field: CategoricalColumn() for field in CATEGORICAL_FIELDS}
+        self.text = {field: TextColumn() for field in TEXT_FIELDS}
+        self.lock = ReadWriteLock()
+        # (live rows in dataset order, their order values), patched in place by writes
+        self._live = None
+        # (field, case-folded value) -> live rows / sorted ids; a write drops only the values it touches
+        self._facet_rows = {}
+        self._facet_ids = {}
+        self.extend(temples)
+    
+    def __len__(self):
+        """Number of live temples"""
+        return len(self._row_of)
+    
+    def __contains__(self, temple_id: int) -> bool:
+        return temple_id in self._row_of
+    
+    @property
+    def num_rows(self) -> int:
+        """Physical rows, including ones retired by updates and deletes"""
+        return len(self.ids)
+    
+    def _changed(self, retired: np.ndarray, added: np.ndarray):
+        """Bring cached row sets up to date after rows stopped (retired) or started (added) being live"""
+        rows = np.concatenate([retired, added])
+        for field, column in self.categorical.items():
+            codes = np.unique(column.codes.view()[rows])
+            for code in codes[codes != ABSENT].tolist():
+                key = (field, column.categories[code].casefold())
+                self._facet_rows.pop(key, None)
+                self._facet_ids.pop(key, None)
+        
+        if self._live is not None:
+            # Orders are unique among live rows, so each retired row is found by its order and each
+            # added row slots in by its order; O(live) copying instead of a re-sort
+            live_rows, live_orders = self._live
+            orders = self.order.view()
+            keep = np.ones(len(live_rows), dtype=np.bool_)
+            keep[np.searchsorted(live_orders, orders[retired])] = False
+            live_rows, live_orders = live_rows[keep], live_orders[keep]
+            added = added[np.argsort(orders[added], kind='stable')]
+            positions = np.searchsorted(live_orders, orders[added])
+            self._live = (np.insert(live_rows, positions, added), np.insert(live_orders, positions, orders[added]))
+    
+    def extend(self, temples: Iterable[Dict]):
+        """Append temples column by column, retiring earlier rows with the same id"""
+        temples = list(temples)
+        if not temples:
+            return
+        first_row = self.num_rows
+        alive = np.ones(len(temples), dtype=np.bool_)
+        order = np.empty(len(temples), dtype=np.int64)
+        retired = []
+        for offset, temple in enumerate(temples):
+            previous = self._row_of.get(temple['id'])
+            if previous is None:
+                order[offset] = self._next_order
+                self._next_order += 1
+            elif previous >= first_row:
+                # Repeated id within this batch: last one wins, in the first one's place
+                alive[previous - first_row] = False
+                order[offset] = order[previous - first_row]
+            else:
+                retired.append(previous)
+                order[offset] = self.order.view()[previous]
+            self._row_of[temple['id']] = first_row + offset
+        retired = np.array(retired, dtype=np.int64)
+        self.alive.set(retired, False)
+        
+        self.ids.extend([temple['id'] for temple in temples])
+        self.alive.extend(alive)
+        self.order.extend(order)
+        locations = [temple.get('location') or {} for temple in temples]
+        self.lat.extend([location.get('lat', np.nan) for location in locations])
+        self.lng.extend([location.get('lng', np.nan) for location in locations])
+        for field, column in self.categorical.items():
+            column.extend([temple.get(field) for temple in temples])
+        for field, column in self.text.items():
+            column.extend([temple.get(field) for temple in temples])
+        self._changed(retired, first_row + np.flatnonzero(alive))
+    
+    def delete(self, temple_ids: Iterable[int]) -> int:
+        """Retire the rows of the given temples, returning how many existed"""
+        rows = [self._row_of.pop(temple_id) for temple_id in temple_ids if temple_id in self._row_of]
+        if rows:
+            rows = np.array(rows, dtype=np.int64)
+            self.alive.set(rows, False)
+            self._changed(rows, np.empty(0, dtype=np.int64))
+        return len(rows)
+    
+    def get(self, temple_id: int) -> Optional[Dict]:
+        """Materialize the live record for a temple id, or None"""
+        row = self._row_of.get(temple_id)
+        return None if row is None else self[row]
+    
+    def __getitem__(self, row: int) -> Dict:
+        """Materialize one row as a TEMPLES_DATA-shaped dict, leaving out fields the record does not have"""
+        if not 0 <= row < self.num_rows:
+            raise IndexError(f"row {row} out of range")
+        values = {field: column.get(row) for field, column in self.categorical.items()}
+        values.update((field, column.get(row)) for field, column in self.text.items())
+        values['id'] = int(self.ids.view()[row])
+        lat, lng = float(self.lat.view()[row]), float(self.lng.view()[row])
+        if not (np.isnan(lat) or np.isnan(lng)):
+            values['location'] = {'lat': lat, 'lng': lng}
+        return {field: values[field] for field in RECORD_FIELDS if values.get(field) is not None}
+    
+    def __iter__(self) -> Iterator[Dict]:
+        """Materialize live records in dataset order"""
+        return iter(self.live_records())
+    
+    def live_rows(self) -> np.ndarray:
+        """Rows of live temples in dataset order"""
+        live = self._live
+        if live is None:
+            rows = np.flatnonzero(self.alive.view())
+            orders = self.order.view()[rows]
+            order = np.argsort(orders, kind='stable')
+            live = (rows[order], orders[order])
+            self._live = live
+        return live[0]
+    
+    def live_records(self) -> TempleRows:
+        """Live temples in dataset order, materialized as they are read"""
+        return TempleRows(self, self.live_rows())
+    
+    def live_ids(self) -> np.ndarray:
+        """Ids of live temples in dataset order"""
+        return self.ids.view()[self.live_rows()]
+    
+    def facet_rows(self, field: str, value: str) -> np.ndarray:
+        """Ascending rows of live temples whose categorical field equals value (case-insensitive)"""
+        key = (field, value.casefold())
+        rows = self._facet_rows.get(key)
+        if rows is None:
+            column = self.categorical[field]
+            codes = column.codes_matching(value)
+            if codes:
+                rows = np.flatnonzero(np.isin(column.codes.view(), codes) & self.alive.view())
+            else:
+                rows = np.empty(0, dtype=np.int64)
+            self._facet_rows[key] = rows
+        return rows
+    
+    def facet_ids(self, field: str, value: str) -> np.ndarray:
+        """Sorted ids of live temples whose categorical field equals value (case-insensitive)"""
+        key = (field, value.casefold())
+        ids = self._facet_ids.get(key)
+        if ids is None:
+            ids = np.sort(self.ids.view()[self.facet_rows(field, value)])
+            self._facet_ids[key] = ids
+        return ids
+    
+    def filter(self, criteria: Dict[str, str]) -> TempleRows:
+        """Live temples matching every categorical field value (case-insensitive), in dataset order"""
+        rows = intersect_sorted(self.facet_rows(field, value) for field, value in criteria.items())
+        rows = self.live_rows() if rows is None else rows[np.argsort(self.order.view()[rows], kind='stable')]
+        return TempleRows(self, rows)
+    
+    def located(self):
+        """(ids, lat, lng) of live temples that have a location"""
+        lat, lng = self.lat.view(), self.lng.view()
+        rows = np.flatnonzero(self.alive.view() & ~np.isnan(lat) & ~np.isnan(lng))
+        return self.ids.view()[rows], lat[rows], lng[rows]
+    
+    @property
+    def nbytes(self) -> int:
+        """Approximate bytes held by the column buffers"""
+        total = self.ids.nbytes + self.alive.nbytes + self.order.nbytes + self.lat.nbytes + self.lng.nbytes
+        total += sum(column.nbytes for column in self.categorical.values())
+        total += sum(column.nbytes for column in self.text.values())
+        return total
@@ -0,0 +1,12 @@
+"""
+Shared test setup: the backend modules are flat, so tests import them from the parent directory
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Build indexes on first use and keep the response cache out of the way unless a test wants it
+os.environ.setdefault('TEMPLE_WARMUP', 'lazy')
+os.environ.setdefault('TEMPLE_RESPONSE_CACHE_SIZE', '0')
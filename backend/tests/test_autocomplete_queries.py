@@ -0,0 +1,101 @@
+import threading
+
+import autocomplete
+from autocomplete import AutocompleteEngine
+from langchain_tool import query_processor
+
+def popular_suggestions(engine: AutocompleteEngine, prefix: str):
+    engine._build_query_index()
+    return [suggestion for suggestion, _ in engine._query_index.complete(prefix)]
+
+def ask(engine: AutocompleteEngine, query: str, times: int):
+    for _ in range(times):
+        engine.record_query(query)
+
+def test_unrecognized_queries_are_never_suggested():
+    engine = AutocompleteEngine([], accept_query=query_processor.is_suggestible)
+    ask(engine, "shvia temples", 20)
+    ask(engine, "buy cheap pills", 20)
+    ask(engine, "shiva temples", 20)
+    
+    assert popular_suggestions(engine, "sh") == ["shiva temples"]
+    assert popular_suggestions(engine, "bu") == []
+
+def test_logging_a_query_does_not_check_it():
+    checked = []
+    engine = AutocompleteEngine([], accept_query=lambda query: checked.append(query) or True)
+    ask(engine, "konark sun temple", 10)
+    assert checked == []
+    
+    engine._build_query_index()
+    assert checked == ["konark sun temple"]
+
+def test_popular_queries_keep_their_display_case():
+    engine = AutocompleteEngine([])
+    ask(engine, "Konark  Sun Temple ", 3)
+    ask(engine, "konark sun temple", 3)
+    assert popular_suggestions(engine, "sun") == ["Konark Sun Temple"]
+
+def test_suggestions_drop_case_only_duplicates():
+    engine = AutocompleteEngine(["Famous Vishnu temples"])
+    engine.warm_up()
+    ask(engine, "famous vishnu temples", 10)
+    engine._build_query_index()
+    assert engine.suggest("famous", 5) == ["Famous Vishnu temples"]
+
+def test_warm_up_leaves_nothing_to_rebuild():
+    engine = AutocompleteEngine([])
+    engine.warm_up()
+    engine.suggest("shiva")
+    assert engine.ready and not engine._refreshing
+
+def test_query_needs_min_count_to_be_suggested():
+    engine = AutocompleteEngine([])
+    ask(engine, "konark sun temple", int(autocomplete.SUGGEST_MIN_QUERY_COUNT) - 1)
+    assert popular_suggestions(engine, "kon") == []
+    ask(engine, "konark sun temple", 1)
+    assert popular_suggestions(engine, "kon") == ["konark sun temple"]
+
+def test_counts_decay_until_forgotten():
+    engine = AutocompleteEngine([])
+    ask(engine, "konark sun temple", 12)
+    assert popular_suggestions(engine, "kon") == ["konark sun temple"]
+    
+    # One half-life later 12 asks count as 6, three later as 1.5, five later as 0.375
+    engine._decayed_at -= autocomplete.SUGGEST_QUERY_HALF_LIFE_HOURS * 3600
+    assert popular_suggestions(engine, "kon") == ["konark sun temple"]
+    engine._decayed_at -= 2 * autocomplete.SUGGEST_QUERY_HALF_LIFE_HOURS * 3600
+    assert popular_suggestions(engine, "kon") == []
+    engine._decayed_at -= 2 * autocomplete.SUGGEST_QUERY_HALF_LIFE_HOURS * 3600
+    engine._build_query_index()
+    assert "konark sun temple" not in engine.query_counts
+
+def test_rebuild_drops_queries_the_catalog_no_longer_supports():
+    known = {"konark sun temple"}
+    engine = AutocompleteEngine([], accept_query=lambda query: query in known)
+    ask(engine, "konark sun temple", 10)
+    assert popular_suggestions(engine, "kon") == ["konark sun temple"]
+    
+    known.clear()  # As if the temple had been deleted
+    assert popular_suggestions(engine, "kon") == []
+
+def test_is_suggestible():
+    assert query_processor.is_suggestible("Shiva temples in Tamil Nadu")
+    assert query_processor.is_suggestible("temples within 50 km of Madurai")
+    assert not query_processor.is_suggestible("temple in")
+    assert not query_processor.is_suggestible("shvia temples")
+
+def test_first_suggestion_builds_the_index_in_the_pool(monkeypatch):
+    from fastapi.testclient import TestClient
+    
+    import main
+    
+    engine = AutocompleteEngine(autocomplete.CURATED_SUGGESTIONS)
+    monkeypatch.setattr(main, 'autocomplete', engine)
+    built_on = []
+    build = engine._build_catalog_index
+    monkeypatch.setattr(engine, '_build_catalog_index', lambda: built_on.append(threading.current_thread()) or build())
+    
+    response = TestClient(main.app).get("/suggestions", params={'q': "shiva"})
+    assert response.status_code == 200 and response.json()['suggestions']
+    assert built_on and built_on[0].name.startswith('search')
@@ -0,0 +1,60 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from bm25_index import BM25_B, BM25_K1, BM25Index, tokenize
+
+WORDS = ['shiva', 'vishnu', 'temple', 'ancient', 'madurai', 'gopuram', 'river', 'hill', 'stone', 'gold']
+
+def brute_force(texts, ids, query, top_k, allowed_ids=None):
+    """Textbook BM25 over every document"""
+    docs = [tokenize(text) for text in texts]
+    average_length = sum(map(len, docs)) / len(docs)
+    scores = {}
+    for temple_id, doc in zip(ids, docs):
+        if allowed_ids is not None and temple_id not in allowed_ids:
+            continue
+        score = 0.0
+        for term in set(tokenize(query)):
+            freq = doc.count(term)
+            if not freq:
+                continue
+            doc_freq = sum(term in other for other in docs)
+            idf = math.log(1 + (len(docs) - doc_freq + 0.5) / (doc_freq + 0.5))
+            score += idf * freq * (BM25_K1 + 1) / (freq + BM25_K1 * (1 - BM25_B + BM25_B * len(doc) / average_length))
+        if score > 0:
+            scores[temple_id] = score
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+
+@pytest.mark.parametrize('seed', range(20))
+def test_search_matches_brute_force(seed):
+    rng = random.Random(seed)
+    ids = rng.sample(range(1, 1000), 60)
+    texts = [' '.join(rng.choices(WORDS[:rng.randint(3, len(WORDS))], k=rng.randint(1, 12))) for _ in ids]
+    index = BM25Index(ids, texts)
+    query = ' '.join(rng.sample(WORDS, rng.randint(1, 3)))
+    allowed_ids = set(rng.sample(ids, 20)) if seed % 2 else None
+    allowed = index.rows_for_ids(np.array(sorted(allowed_ids))) if allowed_ids else None
+    
+    expected = brute_force(texts, ids, query, 10, allowed_ids)
+    found = index.search(query, 10, allowed)
+    
+    assert len(found) == len(expected)
+    assert [score for _, score in found] == pytest.approx([score for _, score in expected], rel=1e-5)
+    # Ties may come out in either order, so compare ids by score
+    assert {(temple_id, round(score, 4)) for temple_id, score in found} == \
+        {(temple_id, round(score, 4)) for temple_id, score in expected}
+
+def test_unknown_terms_and_empty_index():
+    index = BM25Index([1, 2], ["shiva temple", "vishnu temple"])
+    assert index.search("ganesha", 5) == []
+    assert [temple_id for temple_id, _ in index.search("shiva", 5)] == [1]
+    assert BM25Index([], []).search("shiva", 5) == []
+
+def test_accumulator_is_clean_between_queries():
+    index = BM25Index([1, 2, 3], ["shiva temple", "vishnu temple", "shiva vishnu"])
+    first = index.search("shiva", 3)
+    index.search("vishnu temple", 3)
+    assert index.search("shiva", 3) == first
@@ -0,0 +1,37 @@
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.synthetic import generate_temples
+from temple_loader import build_store_from_file
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVE_SCRIPT = """
+import json
+from temple_data import get_all_temples
+from vector_store import get_vector_store
+store = get_vector_store()
+print(json.dumps({'temples': len(get_all_temples()), 'indexed': len(store.temple_ids),
+                  'loaded': store._mmap_path is not None}))
+"""
+
+def write_jsonl(path, temples):
+    with open(path, 'w', encoding='utf-8') as f:
+        for temple in temples:
+            f.write(json.dumps(temple) + '\n')
+
+def test_artifact_built_from_a_file_is_served_with_that_file(tmp_path):
+    dataset = tmp_path / 'temples.jsonl'
+    write_jsonl(dataset, generate_temples(300, seed=7))
+    index_dir = tmp_path / 'index'
+    build_store_from_file(str(dataset), chunk_size=64, index_type='flat').save(str(index_dir))
+    
+    env = dict(os.environ, TEMPLE_DATA_PATH=str(dataset), TEMPLE_INDEX_DIR=str(index_dir), TEMPLE_INDEX_TYPE='flat')
+    output = subprocess.run([sys.executable, '-c', SERVE_SCRIPT], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    
+    assert 'Ignoring index artifact' not in output
+    served = json.loads(output.strip().splitlines()[-1])
+    assert served == {'temples': 300, 'indexed': 300, 'loaded': True}
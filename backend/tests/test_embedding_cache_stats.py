@@ -0,0 +1,27 @@
+from fastapi.testclient import TestClient
+
+from main import app
+
+client = TestClient(app)
+
+def metric_value(text: str, name: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(name + ' '):
+            return float(line.split()[1])
+    raise AssertionError(f"{name} missing from /metrics")
+
+def test_query_embedding_cache_is_published():
+    client.post("/search/vector", json={'query': "embedding cache probe"})
+    before = client.get("/stats/search").json()['query_embedding_cache']
+    client.post("/search/vector", json={'query': "Embedding  cache probe"})
+    after = client.get("/stats/search").json()['query_embedding_cache']
+    
+    assert after['hits'] == before['hits'] + 1
+    assert after['misses'] == before['misses']
+    assert after['size'] >= 1
+    
+    metrics = client.get("/metrics").text
+    assert "# TYPE temple_query_embedding_cache_hits_total counter" in metrics
+    assert metric_value(metrics, 'temple_query_embedding_cache_hits_total') == after['hits']
+    assert metric_value(metrics, 'temple_query_embedding_cache_misses_total') == after['misses']
+    assert metric_value(metrics, 'temple_query_embedding_cache_entries') == after['size']
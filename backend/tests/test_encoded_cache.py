@@ -0,0 +1,55 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from main import app, encode_temple
+from temple_data import catalog
+from vector_store import search_temples_vector
+
+client = TestClient(app)
+
+def search_and_encode(query):
+    version = catalog.version
+    return [encode_temple(temple, version=version) for temple, _ in search_temples_vector(query, top_k=3)]
+
+def test_search_results_reuse_the_catalog_encoding():
+    first = search_and_encode("Shiva temple in Tamil Nadu")
+    again = search_and_encode("Shiva temple in Tamil Nadu")
+    
+    assert len(first) == 3
+    # Each search materializes new dicts; the bytes still come from one cache entry per temple
+    assert all(body is cached for body, cached in zip(first, again))
+    assert all(catalog.encoded(json.loads(body)['id']) is body for body in first)
+
+def test_replacing_a_temple_drops_its_encoding():
+    temple = dict(catalog.get(3))
+    before = catalog.encoded(3)
+    try:
+        catalog.upsert([dict(temple, significance="Re-encoded")])
+        assert catalog.encoded(3) is not before
+        assert json.loads(catalog.encoded(3))['significance'] == "Re-encoded"
+    finally:
+        catalog.upsert([temple])
+    assert catalog.encoded(3) == before
+
+def test_query_response_embeds_the_cached_bytes():
+    body = client.post("/query", json={'query': "Vishnu temples"}).content
+    for result in json.loads(body)['results']:
+        assert catalog.encoded(result['temple']['id']) in body
+
+def test_results_read_before_a_write_keep_their_own_record():
+    version = catalog.version
+    temple = catalog.get(3)
+    try:
+        catalog.upsert([dict(temple, significance="Changed after the search")])
+        catalog.encoded(3)
+        assert json.loads(encode_temple(temple, version=version)) == temple
+        assert encode_temple(catalog.get(3), version=catalog.version) is catalog.encoded(3)
+    finally:
+        catalog.upsert([temple])
+
+def test_listing_embeds_the_cached_bytes():
+    body = client.get("/temples", params={'state': "Tamil Nadu", 'limit': 2}).content
+    temples = json.loads(body)['temples']
+    assert len(temples) == 2
+    assert all(catalog.encoded(temple['id']) in body for temple in temples)
@@ -0,0 +1,58 @@
+import json
+
+import faiss
+import pytest
+
+import vector_store
+from benchmarks.synthetic import generate_temples
+from temple_loader import build_store_from_file, sample_temples
+from vector_store import TempleVectorStore, base_index
+
+def write_jsonl(path, temples):
+    with open(path, 'w', encoding='utf-8') as f:
+        for temple in temples:
+            f.write(json.dumps(temple) + '\n')
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / 'temples.jsonl'
+    write_jsonl(path, generate_temples(2000, seed=3))
+    return str(path)
+
+@pytest.mark.parametrize('index_type', ['ivf', 'ivfpq'])
+def test_streamed_build_trains_on_a_sample_larger_than_a_chunk(dataset, index_type):
+    store = build_store_from_file(dataset, chunk_size=16, index_type=index_type)
+    index = base_index(store.index)
+    
+    assert isinstance(index, faiss.IndexIVF) and index.is_trained
+    assert index.nlist > 16
+    assert index.ntotal == 2000
+    results = store.search("Shiva temple Thanjavur", top_k=5)
+    assert len(results) == 5
+
+def test_in_memory_build_trains_before_adding():
+    store = TempleVectorStore(temples=generate_temples(2000, seed=3), index_type='ivf')
+    
+    assert base_index(store.index).ntotal == 2000
+    assert store.search("Vishnu temple", top_k=3)
+
+def test_sample_is_drawn_from_the_whole_file(dataset):
+    sample = sample_temples(dataset, 200)
+    ids = [temple['id'] for temple in sample]
+    
+    assert len(set(ids)) == 200
+    assert max(ids) > 1000
+
+def test_nlist_larger_than_the_dataset_is_rejected(dataset, monkeypatch):
+    monkeypatch.setattr(vector_store, 'IVF_NLIST', 5000)
+    with pytest.raises(ValueError, match='TEMPLE_IVF_NLIST=5000'):
+        build_store_from_file(dataset, index_type='ivf')
+
+def test_chunk_size_must_be_positive(dataset):
+    with pytest.raises(ValueError, match='chunk_size'):
+        build_store_from_file(dataset, chunk_size=0, index_type='ivf')
+
+def test_untrained_index_refuses_rows():
+    store = TempleVectorStore(temples=[], index_type='ivf', expected_size=2000)
+    with pytest.raises(ValueError, match='train'):
+        store.add_temples(generate_temples(10))
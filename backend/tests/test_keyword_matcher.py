@@ -0,0 +1,32 @@
+import pytest
+
+from langchain_tool import KeywordMatcher, query_processor
+
+@pytest.mark.parametrize('query, state', [
+    ("Vishnu temples in Andhra Pradesh", "Andhra Pradesh"),
+    ("Shiva temples in Uttar Pradesh", "Uttar Pradesh"),
+    ("Shiva temples in Tamil Nadu", "Tamil Nadu"),
+    ("temples in andhra", "Andhra Pradesh"),
+    ("temples in UP", "Uttar Pradesh"),
+    ("Shiva temples in TN", "Tamil Nadu"),
+    ("temples in ap", "Andhra Pradesh"),
+])
+def test_state_is_taken_from_the_full_name(query, state):
+    assert query_processor.extract_filters(query)['state'] == state
+
+def test_shared_state_words_are_not_aliases():
+    assert 'state' not in query_processor.extract_filters("temples in pradesh")
+    assert 'state' not in query_processor.extract_filters("pick up temple photos")
+
+def test_capitalized_aliases_match_only_in_capitals():
+    matcher = KeywordMatcher({'state': {'uttar pradesh': ['UP']}})
+    assert matcher.match("Shiva temples in UP") == {'state': ['uttar pradesh']}
+    assert matcher.match("pick up temple photos") == {}
+    assert matcher.match("Up next: temples") == {}
+    assert 'up' in query_processor.known_words
+
+def test_longest_alias_wins():
+    matcher = KeywordMatcher({'place': {'new delhi': ['new delhi'], 'delhi': ['delhi']},
+                              'era': {'modern': ['new']}})
+    assert matcher.match("temples of new delhi") == {'place': ['new delhi']}
+    assert matcher.match("new temples in delhi") == {'era': ['modern'], 'place': ['delhi']}
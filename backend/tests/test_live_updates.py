@@ -0,0 +1,157 @@
+import random
+
+import numpy as np
+import pytest
+
+import geo_index
+import sparse_index
+import vector_store
+from benchmarks.synthetic import generate_temples
+from geo_index import GeoIndex
+from temple_store import ColumnarTempleStore
+from vector_store import TempleVectorStore
+
+QUERIES = ["Shiva temple", "Vishnu temple in Tamil Nadu", "ancient Dravidian gopuram", "Kerala"]
+
+def apply_random_writes(store, temples, seed, steps=60):
+    """Upsert, delete and re-insert temples one at a time, returning the records left"""
+    rng = random.Random(seed)
+    records = {temple['id']: temple for temple in temples}
+    for step in range(steps):
+        temple = temples[rng.randrange(len(temples))]
+        if step % 3 == 1 and temple['id'] in records:
+            store.delete_temples([temple['id']])
+            del records[temple['id']]
+        else:
+            donor = temples[rng.randrange(len(temples))]
+            temple = dict(temple, name=f"{temple['name']} {step}", history=donor['history'], location=donor['location'])
+            store.upsert_temples([temple])
+            records[temple['id']] = temple
+    return records
+
+def ranking(store, query, filters=None):
+    results = store.search_with_filters(query, filters, top_k=1000)
+    return {temple['id']: round(score, 4) for temple, score in results}
+
+@pytest.mark.parametrize('index_type', ['flat', 'sparse'])
+def test_single_writes_match_a_fresh_build(index_type, monkeypatch):
+    # Small thresholds so the run crosses several deferred flushes and sparse folds
+    monkeypatch.setattr(vector_store, 'MAX_DEFERRED_REMOVALS', 4)
+    monkeypatch.setattr(sparse_index, 'MIN_CHANGED_ROWS', 8)
+    temples = generate_temples(300, seed=5)
+    store = TempleVectorStore(temples=temples, index_type=index_type)
+    records = apply_random_writes(store, temples, seed=1)
+    
+    fresh = TempleVectorStore(temples=list(records.values()), index_type=index_type,
+                              embedding_model=store.embedding_model)
+    assert sorted(store.temple_ids) == sorted(records)
+    assert store.num_vectors == len(records)
+    for query in QUERIES:
+        assert ranking(store, query) == ranking(fresh, query)
+        assert ranking(store, query, {'state': "Tamil Nadu"}) == ranking(fresh, query, {'state': "Tamil Nadu"})
+
+def test_flat_deletes_are_removed_together(monkeypatch):
+    monkeypatch.setattr(vector_store, 'MAX_DEFERRED_REMOVALS', 5)
+    temples = generate_temples(100, seed=2)
+    store = TempleVectorStore(temples=temples, index_type='flat')
+    
+    store.delete_temples([temples[0]['id']])
+    store.delete_temples([temples[1]['id']])
+    # Still stored, but never returned
+    assert store.index.ntotal == 100 and store.num_vectors == 98
+    assert not {temples[0]['id'], temples[1]['id']} & set(ranking(store, temples[0]['name']))
+    
+    store.upsert_temples([temples[0]])
+    assert store.index.ntotal == 100 and store.num_vectors == 99
+    assert temples[0]['id'] in ranking(store, temples[0]['name'])
+    
+    store.delete_temples([temple['id'] for temple in temples[2:6]])
+    assert store.index.ntotal == store.num_vectors == 95
+
+def test_flat_updates_overwrite_vectors_in_place():
+    temples = generate_temples(50, seed=4)
+    store = TempleVectorStore(temples=temples, index_type='flat')
+    renamed = dict(temples[10], name="Zanskar Gompa", history="Monastery above the Zanskar river")
+    
+    store.upsert_temples([renamed])
+    assert store.index.ntotal == 50
+    temple, _ = store.search("Zanskar river monastery", top_k=1)[0]
+    assert temple['id'] == renamed['id'] and temple['name'] == "Zanskar Gompa"
+
+def test_patched_geo_index_matches_a_rebuilt_one(monkeypatch):
+    monkeypatch.setattr(geo_index, 'MIN_OVERLAY_POINTS', 10 ** 6)
+    rng = np.random.default_rng(0)
+    ids = np.arange(500)
+    lat, lng = rng.uniform(8, 35, 500), rng.uniform(68, 97, 500)
+    geo = GeoIndex(ids, lat, lng)
+    
+    for step in range(40):
+        moved = rng.choice(500, 3, replace=False)
+        lat[moved], lng[moved] = rng.uniform(8, 35, 3), rng.uniform(68, 97, 3)
+        geo = geo.updated(moved, moved, lat[moved], lng[moved])
+    removed = rng.choice(500, 20, replace=False)
+    geo = geo.updated(removed, [], [], [])
+    live = np.setdiff1d(ids, removed)
+    rebuilt = GeoIndex(live, lat[live], lng[live])
+    
+    assert len(geo) == len(live)
+    for q_lat, q_lng in zip(rng.uniform(8, 35, 20), rng.uniform(68, 97, 20)):
+        for found, expected in ((geo.within(q_lat, q_lng, 300), rebuilt.within(q_lat, q_lng, 300)),
+                                (geo.nearest(q_lat, q_lng, 7), rebuilt.nearest(q_lat, q_lng, 7)),
+                                (geo.nearest(q_lat, q_lng, 5, 150), rebuilt.nearest(q_lat, q_lng, 5, 150))):
+            np.testing.assert_array_equal(found[0], expected[0])
+            np.testing.assert_allclose(found[1], expected[1])
+
+def test_geo_index_asks_for_a_rebuild_once_changes_pile_up():
+    geo = GeoIndex(np.arange(2000), np.full(2000, 20.0), np.full(2000, 78.0))
+    assert geo.updated(np.arange(10), [], [], []) is not None
+    assert geo.updated(np.arange(1500), [], [], []) is None
+
+def test_store_caches_follow_writes():
+    temples = generate_temples(200, seed=6)
+    store = ColumnarTempleStore(temples)
+    store.live_ids(), store.facet_ids('state', "Tamil Nadu"), store.facet_ids('deity', "Shiva")
+    
+    rng = random.Random(3)
+    for step in range(50):
+        temple = temples[rng.randrange(len(temples))]
+        if step % 4 == 0:
+            store.delete([temple['id']])
+        else:
+            store.extend([dict(temple, state=rng.choice(["Tamil Nadu", "Kerala", "Odisha"]))])
+        
+        fresh = ColumnarTempleStore(store.live_records())
+        np.testing.assert_array_equal(store.live_ids(), fresh.live_ids())
+        for field, value in (('state', "tamil nadu"), ('deity', "Shiva"), ('state', "Kerala")):
+            np.testing.assert_array_equal(store.facet_ids(field, value), fresh.facet_ids(field, value))
+
+def test_writes_to_a_memory_mapped_artifact_survive_a_save(tmp_path):
+    temples = generate_temples(120, seed=8)
+    TempleVectorStore(temples=temples, index_type='flat').save(str(tmp_path / 'before'))
+    store = TempleVectorStore(temples=temples, index_dir=str(tmp_path / 'before'))
+    assert store._mmap_path is not None
+    
+    store.delete_temples([temples[0]['id'], temples[1]['id']])
+    store.upsert_temples([dict(temples[2], name="Zanskar Gompa", history="Monastery above the Zanskar river")])
+    store.save(str(tmp_path / 'after'))
+    
+    reloaded = TempleVectorStore(temples=list(store.temples_data.live_records()), index_dir=str(tmp_path / 'after'))
+    assert reloaded._mmap_path is not None
+    assert reloaded.index.ntotal == 118
+    assert reloaded.search("Zanskar river monastery", top_k=1)[0][0]['id'] == temples[2]['id']
+
+def test_vocabulary_grows_by_replacement():
+    temples = generate_temples(60, seed=9)
+    store = TempleVectorStore(temples=temples, index_type='flat')
+    model = store.embedding_model
+    saved = model.metadata()['vocab']
+    size = len(saved)
+    generation = model.query_cache.generation
+    stale = model.embed_query("Zanskar monastery")
+    
+    store.upsert_temples([dict(temples[0], history="Monastery above the Zanskar river")])
+    assert 'zanskar' in model.vocab and 'zanskar' not in saved and len(saved) == size
+    # An embedding computed from the old vocabulary is not cached once it has grown
+    model.query_cache.put("zanskar monastery", stale.copy(), generation)
+    assert model.query_cache.get("zanskar monastery") is None
+    assert not np.array_equal(model.embed_query("Zanskar monastery"), stale)
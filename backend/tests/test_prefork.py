@@ -0,0 +1,31 @@
+import os
+import threading
+
+import pytest
+
+from autocomplete import autocomplete
+from bm25_index import lexical_index
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_forked_workers_do_not_inherit_running_rebuilds(monkeypatch):
+    # As if the master forked while rebuild threads were running and holding the engines' locks
+    monkeypatch.setattr(autocomplete, '_refreshing', True)
+    monkeypatch.setattr(lexical_index, '_rebuilding', True)
+    held = [threading.Lock(), threading.Lock()]
+    for lock in held:
+        lock.acquire()
+    monkeypatch.setattr(autocomplete, '_lock', held[0])
+    monkeypatch.setattr(lexical_index, '_lock', held[1])
+    
+    pid = os.fork()
+    if pid == 0:
+        clean = (not autocomplete._refreshing and not lexical_index._rebuilding
+                 and autocomplete._lock.acquire(blocking=False) and lexical_index._lock.acquire(blocking=False))
+        os._exit(0 if clean else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+    
+    # The master's own state is left alone
+    assert autocomplete._refreshing and lexical_index._rebuilding
+    for lock in held:
+        lock.release()
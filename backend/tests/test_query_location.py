@@ -0,0 +1,34 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from langchain_tool import query_processor
+from main import app
+
+client = TestClient(app)
+
+MADURAI = {'lat': 9.92, 'lng': 78.12}
+
+def test_batch_query_uses_each_location():
+    response = client.post("/query/batch", json={'queries': [
+        {'query': "temples near me", 'location': MADURAI},
+        {'query': "temples near me"},
+    ]})
+    
+    assert response.status_code == 200
+    near, anywhere = response.json()['responses']
+    assert [result['temple']['city'] for result in near['results']] == ["Madurai"]
+    assert len(anywhere['results']) > 1
+
+def test_batch_matches_single_query_for_location():
+    single = client.post("/query", json={'query': "temples near me", 'location': MADURAI}).json()
+    batch = client.post("/query/batch", json={'queries': [{'query': "temples near me", 'location': MADURAI}]}).json()
+    assert batch['responses'][0] == single
+
+def test_location_without_coordinates_is_rejected():
+    assert client.post("/query", json={'query': "temples near me", 'location': {'lat': 9.9}}).status_code == 422
+    response = client.post("/query/batch", json={'queries': [{'query': "temples near me", 'location': {}}]})
+    assert response.status_code == 422
+
+def test_extract_near_rejects_malformed_location():
+    with pytest.raises(ValueError):
+        query_processor.extract_near("temples near me", {'lat': 9.9})
@@ -0,0 +1,32 @@
+import asyncio
+
+import response_cache as response_cache_module
+from bm25_index import lexical_index
+from response_cache import ResponseCache, cached_response
+from vector_store import get_vector_store, index_version
+
+def cached(calls):
+    async def compute():
+        calls.append(lexical_index.version)
+        return {'results': [], 'lexical_version': lexical_index.version}
+    return asyncio.run(cached_response('query', 'shiva temples', None, 5, compute))
+
+def test_responses_from_a_stale_lexical_index_are_not_served_after_it_rebuilds(monkeypatch):
+    monkeypatch.setattr(response_cache_module, 'response_cache', ResponseCache(max_size=8, ttl=60))
+    get_vector_store()
+    lexical_index.current()
+    built = lexical_index.version
+    assert built == index_version()
+    
+    # The store has moved on but the BM25 index still serves the previous catalog
+    calls = []
+    monkeypatch.setattr(lexical_index, '_version', 'previous')
+    cached(calls)
+    assert cached(calls)['lexical_version'] == 'previous'
+    assert calls == ['previous']
+    
+    # Once the rebuild lands, the response computed from the stale index is not reused
+    lexical_index._version = built
+    assert cached(calls)['lexical_version'] == built
+    assert cached(calls)['lexical_version'] == built
+    assert calls == ['previous', built]
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from search_batcher import MicroBatcher, process_query_coalesced, search_vector_coalesced
+from search_pool import SearchPool
+
+def double_or_fail(items):
+    if 'bad' in items:
+        raise ValueError("bad item")
+    return [item * 2 for item in items]
+
+async def submit_together(batcher, items):
+    return await asyncio.gather(*(batcher.submit(item) for item in items), return_exceptions=True)
+
+def test_failing_item_only_fails_its_own_request():
+    batcher = MicroBatcher(double_or_fail, window_ms=50, pool=SearchPool(workers=1))
+    outcomes = asyncio.run(submit_together(batcher, ['a', 'bad', 'c']))
+    
+    assert outcomes[0] == 'aa' and outcomes[2] == 'cc'
+    assert isinstance(outcomes[1], ValueError)
+    assert batcher.batch_sizes == {3: 1}
+
+def test_batch_error_with_single_item_is_raised():
+    batcher = MicroBatcher(double_or_fail, window_ms=50, pool=SearchPool(workers=1))
+    with pytest.raises(ValueError):
+        asyncio.run(batcher.submit('bad'))
+
+def test_invalid_near_filter_does_not_fail_batched_query():
+    async def run():
+        return await asyncio.gather(
+            process_query_coalesced("Shiva temples in Tamil Nadu", {}),
+            process_query_coalesced("temples", {'near': {'lat': 'x', 'lng': 78.0}}),
+            return_exceptions=True,
+        )
+    
+    good, bad = asyncio.run(run())
+    assert isinstance(bad, ValueError)
+    assert good and good[0]['temple']['state'] == "Tamil Nadu"
+
+def test_invalid_filter_does_not_fail_batched_vector_search():
+    async def run():
+        return await asyncio.gather(
+            search_vector_coalesced("sun temple", {}, 3),
+            search_vector_coalesced("sun temple", {'state': 5}, 3),
+            return_exceptions=True,
+        )
+    
+    good, bad = asyncio.run(run())
+    assert isinstance(bad, ValueError)
+    assert len(good) == 3
@@ -0,0 +1,75 @@
+import json
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import vector_store
+from main import app
+from temple_data import catalog
+from temple_loader import validate_temple
+from temple_store import ColumnarTempleStore, intersect_sorted
+
+client = TestClient(app)
+
+NEW_TEMPLE = {'id': 900001, 'name': "Test Shrine", 'deity': "Shiva", 'state': "Kerala", 'city': "Kochi",
+              'history': "Built for a test.", 'photo_url': "https://example.com/shrine.jpg",
+              'location': {'lat': 10.123456789, 'lng': 76.987654321}, 'era': "Modern",
+              'architecture': "Kerala"}
+
+def test_absent_fields_stay_absent():
+    temple = validate_temple(dict(NEW_TEMPLE, significance=''))
+    assert 'significance' not in temple
+    
+    catalog.upsert([temple])
+    try:
+        assert 'significance' not in catalog.get(900001)
+        body = json.loads(client.get("/temple/900001").content)
+        assert 'significance' not in body['temple']
+    finally:
+        catalog.delete([900001])
+
+def test_missing_location_is_not_a_zero_location():
+    store = ColumnarTempleStore([validate_temple({key: value for key, value in NEW_TEMPLE.items()
+                                                  if key != 'location'})])
+    assert 'location' not in store.get(900001)
+    assert len(store.located()[0]) == 0
+
+def test_coordinates_are_stored_unrounded():
+    store = ColumnarTempleStore([NEW_TEMPLE])
+    assert store.get(900001)['location'] == {'lat': 10.123456789, 'lng': 76.987654321}
+
+def test_catalog_and_vector_store_share_one_table():
+    store = vector_store.get_vector_store()
+    assert store.temples_data is catalog.records
+    
+    catalog.upsert([NEW_TEMPLE])
+    try:
+        assert 900001 in store.temple_ids
+        assert store.search("Test Shrine Kochi", top_k=1)[0][0]['id'] == 900001
+    finally:
+        catalog.delete([900001])
+    assert 900001 not in store.temple_ids
+
+def test_update_keeps_the_dataset_position():
+    ids = [temple['id'] for temple in catalog.all()]
+    temple = dict(catalog.get(ids[2]))
+    try:
+        catalog.upsert([dict(temple, name=temple['name'] + " (renamed)")])
+        assert [temple['id'] for temple in catalog.all()] == ids
+        assert catalog.all()[2]['name'].endswith("(renamed)")
+    finally:
+        catalog.upsert([temple])
+
+def test_city_is_a_facet():
+    city = catalog.all()[0]['city']
+    matches = catalog.filter(city=city.upper())
+    assert len(matches) > 0
+    assert all(temple['city'] == city for temple in matches)
+
+def test_catalog_and_vector_filters_intersect_alike():
+    assert intersect_sorted([]) is None
+    assert intersect_sorted([np.array([1, 4, 7, 9]), np.array([4, 9]), np.array([2, 4, 9, 11])]).tolist() == [4, 9]
+    assert intersect_sorted([np.array([1, 2]), np.array([], dtype=np.int64), np.array([2])]).tolist() == []
+    filters = {'state': "Tamil Nadu", 'deity': "Shiva"}
+    by_catalog = sorted(temple['id'] for temple in catalog.records.filter(filters))
+    assert vector_store.get_vector_store()._filter_candidates(filters).tolist() == by_catalog
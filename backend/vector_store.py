@@ -3,94 +3,556 @@ Vector store management for temple search using FAISS
 Handles embedding generation and similarity search
 """
 
+import hashlib
+import json
+import math
+import os
+import threading
+import time
 import numpy as np
 import faiss
-from typing import List, Tuple
-from temple_data import get_all_temples, get_temple_text_for_embedding
-
-class SimpleEmbedding:
-    """Simple embedding class that creates basic text embeddings"""
-    
-    def __init__(self, dimension=384):
-        self.dimension = dimension
-        # Simple vocabulary for basic embedding simulation
-        self.vocab = {}
-        self._build_vocab()
-    
-    def _build_vocab(self):
-        """Build vocabulary from temple data"""
-        temples = get_all_temples()
-        words = set()
-        
-        for temple in temples:
-            text = get_temple_text_for_embedding(temple).lower()
-            words.update(text.split())
-        
-        # Add common temple-related words
-        temple_words = [
-            'temple', 'shiva', 'vishnu', 'parvati', 'ancient', 'medieval', 'modern',
-            'dravidian', 'north', 'south', 'india', 'pilgrimage', 'heritage', 'jyotirlinga',
-            'tamil', 'nadu', 'uttar', 'pradesh', 'gujarat', 'punjab', 'odisha', 'kerala',
-            'karnataka', 'rajasthan', 'maharashtra', 'andhra', 'telangana', 'bihar',
-            'jharkhand', 'chhattisgarh', 'madhya', 'himachal', 'uttarakhand', 'haryana',
-            'delhi', 'goa', 'assam', 'bengal', 'tripura', 'manipur', 'nagaland', 'mizoram'
-        ]
-        
-        words.update(temple_words)
-        
-        for i, word in enumerate(sorted(words)):
-            self.vocab[word] = i
-    
-    def embed_text(self, text: str) -> np.ndarray:
-        """Create a simple embedding for text"""
-        words = text.lower().split()
-        embedding = np.zeros(self.dimension)
-        
-        # Simple bag-of-words with position encoding
-        for i, word in enumerate(words):
-            if word in self.vocab:
-                idx = self.vocab[word] % self.dimension
-                embedding[idx] += 1.0 / (i + 1)  # Position weighting
-        
-        # Add some randomness for better separation
-        noise = np.random.normal(0, 0.1, self.dimension)
-        embedding += noise
-        
-        # Normalize
-        norm = np.linalg.norm(embedding)
-        if norm > 0:
-            embedding = embedding / norm
-        
-        return embedding.astype(np.float32)
+from typing import Dict, Iterable, List, Optional, Tuple
+from embeddings import EMBEDDING_TYPE, EmbeddingBackend, create_embedding, normalize_query_text
+from geo_index import GeoIndex
+from metrics import registry, short_results, stage_timer
+from sparse_index import SparseVectorIndex
+from temple_data import catalog, get_temple_text_for_embedding
+from temple_store import ColumnarTempleStore, TempleRows, intersect_sorted
+
+# Bump whenever the on-disk layout written by TempleVectorStore.save changes
+INDEX_FORMAT_VERSION = 3
+INDEX_FILENAME = "index.faiss"
+SPARSE_INDEX_FILENAME = "index.npz"
+METADATA_FILENAME = "metadata.json"
+# Rows embedded per sparse batch while building; bounds the transient dense float32 block
+BUILD_BATCH_SIZE = 65536
+# Facets that get inverted id sets for pre-filtered search; categorical columns of the temple store
+FILTER_FACETS = ('state', 'deity', 'era', 'architecture')
+# Filter key restricting results to a circle: {'lat': ..., 'lng': ..., 'radius_km': ...}
+NEAR_FILTER = 'near'
+DEFAULT_NEAR_RADIUS_KM = 50.0
+# Filtered searches with at most this many candidates score them directly instead of scanning the index
+PREFILTER_EXACT_LIMIT = 20000
+# remove_ids on a flat index compacts the whole vector array, so deletes from one are deferred: the
+# vectors stay, searches skip them, and once this many accumulate one remove_ids drops them all
+MAX_DEFERRED_REMOVALS = 256
+
+# Index configuration: flat (exact), ivf, hnsw, ivfpq (compressed) or sparse (exact, sparse vectors); see create_index
+INDEX_TYPES = ('flat', 'ivf', 'hnsw', 'ivfpq', 'sparse')
+INDEX_TYPE = os.environ.get('TEMPLE_INDEX_TYPE') or ('sparse' if EMBEDDING_TYPE == 'hashed' else 'flat')
+IVF_NLIST = int(os.environ.get('TEMPLE_IVF_NLIST', '0'))  # 0 picks ~4*sqrt(N)
+IVF_NPROBE = int(os.environ.get('TEMPLE_IVF_NPROBE', '16'))
+HNSW_M = int(os.environ.get('TEMPLE_HNSW_M', '32'))
+HNSW_EF_SEARCH = int(os.environ.get('TEMPLE_HNSW_EF_SEARCH', '64'))
+PQ_M = int(os.environ.get('TEMPLE_PQ_M', '48'))  # sub-quantizers; must divide the dimension
+# k-means wants this many training vectors per centroid; faiss warns below it
+TRAINING_POINTS_PER_LIST = 39
+# Centroids per PQ sub-quantizer with 8-bit codes
+PQ_CENTROIDS = 256
+
+def create_index(dimension: int, index_type: str = 'flat', num_vectors: int = 0) -> faiss.Index:
+    """Create an empty inner-product index of the given type, sized for num_vectors"""
+    index_type = index_type.lower()
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}', expected one of {', '.join(INDEX_TYPES)}")
+    
+    if index_type == 'sparse':
+        return SparseVectorIndex(dimension)
+    
+    if index_type == 'hnsw':
+        return faiss.IndexHNSWFlat(dimension, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+    
+    if index_type in ('ivf', 'ivfpq'):
+        if index_type == 'ivfpq' and dimension % PQ_M:
+            raise ValueError(f"TEMPLE_PQ_M={PQ_M} must divide the embedding dimension {dimension}")
+        if IVF_NLIST and 0 < num_vectors < IVF_NLIST:
+            raise ValueError(f"TEMPLE_IVF_NLIST={IVF_NLIST} needs at least that many temples to train on; "
+                             f"the dataset has {num_vectors}")
+        # Training draws a sample from the whole corpus (see training_sample_size), so the
+        # coarse quantizer is sized to the corpus rather than to one build batch
+        nlist = IVF_NLIST or min(int(4 * math.sqrt(num_vectors)), num_vectors // TRAINING_POINTS_PER_LIST)
+        if index_type == 'ivfpq' and num_vectors < PQ_CENTROIDS:
+            print(f"Only {num_vectors} vectors to train PQ codebooks; using a flat index instead")
+            return faiss.IndexFlatIP(dimension)
+        if nlist < 1 or num_vectors < nlist:
+            print(f"Only {num_vectors} vectors to train IVF lists; using a flat index instead")
+            return faiss.IndexFlatIP(dimension)
+        if num_vectors < nlist * TRAINING_POINTS_PER_LIST:
+            print(f"Only {num_vectors} vectors to train {nlist} IVF lists; k-means wants "
+                  f"{nlist * TRAINING_POINTS_PER_LIST}, so expect lower recall")
+        
+        quantizer = faiss.IndexFlatIP(dimension)
+        if index_type == 'ivf':
+            return faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+        return faiss.IndexIVFPQ(quantizer, dimension, nlist, PQ_M, 8, faiss.METRIC_INNER_PRODUCT)
+    
+    return faiss.IndexFlatIP(dimension)  # Inner product for cosine similarity
+
+def training_sample_size(index: faiss.Index, num_vectors: int, chunk_size: int = BUILD_BATCH_SIZE) -> int:
+    """
+    Vectors to train an untrained index on before any are added; 0 if it needs no training
+    At least one build chunk and enough for every IVF list (and PQ codebook), drawn across the whole corpus
+    """
+    index = base_index(index)
+    if index.is_trained:
+        return 0
+    wanted = max(chunk_size, index.nlist * TRAINING_POINTS_PER_LIST)
+    if isinstance(index, faiss.IndexIVFPQ):
+        wanted = max(wanted, PQ_CENTROIDS * TRAINING_POINTS_PER_LIST)
+    return min(wanted, num_vectors)
+
+def index_type_of(index: faiss.Index) -> str:
+    """Name the INDEX_TYPES entry an index was created as"""
+    index = base_index(index)
+    if isinstance(index, SparseVectorIndex):
+        return 'sparse'
+    if isinstance(index, faiss.IndexHNSW):
+        return 'hnsw'
+    if isinstance(index, faiss.IndexIVFPQ):
+        return 'ivfpq'
+    if isinstance(index, faiss.IndexIVF):
+        return 'ivf'
+    return 'flat'
+
+def base_index(index: faiss.Index) -> faiss.Index:
+    """Unwrap an IndexIDMap2 to the index that stores the vectors"""
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.downcast_index(index.index)
+    return index
+
+def index_nbytes(index: faiss.Index) -> int:
+    """Bytes of vector data an index holds; IVF lists, graph links and id maps are not counted"""
+    index = base_index(index)
+    if isinstance(index, SparseVectorIndex):
+        return index.nbytes
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    return index.ntotal * getattr(index, 'code_size', index.d * 4)
+
+def with_temple_ids(index: faiss.Index) -> faiss.Index:
+    """Key an index by temple id so vectors can be replaced and removed individually"""
+    if isinstance(index, SparseVectorIndex):
+        return index  # Rows are stored with their temple ids already
+    if isinstance(index, faiss.IndexIVF):
+        # IVF lists store ids natively; a hashtable direct map adds lookup and removal by id
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        return index
+    return faiss.IndexIDMap2(index)
+
+def _hash_temples(digest, temple_ids: Iterable[int], texts: Iterable[str]):
+    for temple_id, text in zip(temple_ids, texts):
+        digest.update(str(temple_id).encode('utf-8'))
+        digest.update(text.encode('utf-8'))
+
+def _fingerprint_digest(temples: Iterable[dict]):
+    digest = hashlib.sha256()
+    for temple in temples:
+        _hash_temples(digest, [temple['id']], [get_temple_text_for_embedding(temple)])
+    return digest
+
+def dataset_fingerprint(temples: Iterable[dict]) -> str:
+    """Hash the ids and embedding text of a dataset to detect stale index artifacts"""
+    return _fingerprint_digest(temples).hexdigest()
+
+def parse_near_filter(near: dict) -> Tuple[float, float, float]:
+    """Validate a near filter, returning (lat, lng, radius_km)"""
+    try:
+        lat, lng = float(near['lat']), float(near['lng'])
+        radius_km = float(near.get('radius_km') or DEFAULT_NEAR_RADIUS_KM)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"near filter needs numeric lat, lng and optional radius_km: {e}") from e
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180) or radius_km <= 0:
+        raise ValueError("near filter coordinates or radius out of range")
+    return lat, lng, radius_km
 
 class TempleVectorStore:
     """Vector store for temple search using FAISS"""
     
-    def __init__(self):
-        self.embedding_model = SimpleEmbedding()
+    def __init__(self, temples: Optional[Iterable[dict]] = None, index_dir: Optional[str] = None, mmap: bool = True,
+                 index_type: Optional[str] = None, nprobe: int = IVF_NPROBE, ef_search: int = HNSW_EF_SEARCH,
+                 embedding_model: Optional[EmbeddingBackend] = None, expected_size: int = 0):
+        self.embedding_model = None
         self.index = None
-        self.temple_ids = []
-        self.temples_data = []
-        self._build_index()
+        self.index_type = index_type or INDEX_TYPE
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        # Records live in compact columns and are only materialized for returned rows. Without temples
+        # the store indexes the catalog's own table, and record and vector writes go through it together
+        self.catalog = catalog if temples is None else None
+        self.temples_data = catalog.records if temples is None else ColumnarTempleStore(temples)
+        # KD-tree over live temple locations, built on first use and patched by writes
+        self._geo_index = None
+        self._geo_lock = threading.Lock()
+        # Searches share the records lock; updates serialize on _update_lock and hold _lock only to mutate
+        self._lock = self.temples_data.lock
+        self._update_lock = threading.Lock()
+        # Set while the index is a read-only memory map of this artifact file
+        self._mmap_path = None
+        # Sorted ids of deleted temples whose vectors are still in a flat index (see MAX_DEFERRED_REMOVALS)
+        self._deferred_removals = np.empty(0, dtype=np.int64)
+        # Content hash of every write applied so far; equals dataset_fingerprint after a plain build
+        self._version_digest = hashlib.sha256()
+        self.version = self._version_digest.hexdigest()
+        
+        # Records cannot change underneath the build; catalog writes wait until the store is attached
+        with self._lock.read():
+            temples = self.temples_data.live_records()
+            # Prefer a prebuilt artifact; fall back to embedding everything in-process
+            if not (index_dir and self._load_index(index_dir, temples, mmap)):
+                # A caller streaming temples in later (see temple_loader) supplies the vocabulary
+                # and expected corpus size up front, so the index can be sized before any rows arrive
+                self.embedding_model = embedding_model or create_embedding(temples=temples)
+                self._build_index(temples, expected_size)
+            if self.catalog is not None:
+                self.catalog.attach_index(self)
+        self._prepare_index()
+    
+    @property
+    def temple_ids(self) -> List[int]:
+        """Ids of the indexed temples"""
+        return self.temples_data.live_ids().tolist()
+    
+    def _build_index(self, temples: TempleRows, expected_size: int = 0):
+        """Build FAISS index from the stored records"""
+        index = create_index(self.embedding_model.dimension, self.index_type, max(len(temples), expected_size))
+        self.index_type = index_type_of(index)
+        self.index = with_temple_ids(index)
+        
+        sample_size = training_sample_size(self.index, len(temples))
+        if sample_size:
+            # Seeded, so rebuilding the same dataset trains the same centroids
+            rng = np.random.default_rng(0)
+            positions = np.sort(rng.choice(len(temples), sample_size, replace=False))
+            self.train([temples[position] for position in positions.tolist()])
+        
+        # Embed in large sparse batches so each index.add gets one contiguous float32 matrix
+        for start in range(0, len(temples), BUILD_BATCH_SIZE):
+            batch = list(temples[start:start + BUILD_BATCH_SIZE])
+            texts = [get_temple_text_for_embedding(temple) for temple in batch]
+            ids = [temple['id'] for temple in batch]
+            self.index.add_with_ids(self._embed_documents(texts), np.array(ids, dtype=np.int64))
+            self._advance_version(ids, texts)
+    
+    def train(self, temples: List[dict]):
+        """
+        Learn IVF centroids and PQ codebooks from a sample of the corpus before any temples are added
+        Streaming builds draw the sample from the whole dataset (see temple_loader.sample_temples)
+        """
+        if self.index.is_trained:
+            return
+        texts = [get_temple_text_for_embedding(temple) for temple in temples]
+        self.index.train(self._embed_documents(texts))
+    
+    def add_temples(self, temples: List[dict]):
+        """Embed a batch of temples and add them to the index, replacing any with the same id"""
+        self._write_temples(temples, grow_vocab=False)
+    
+    def upsert_temples(self, temples: List[dict]) -> Dict:
+        """Insert or replace temples while searches keep running, growing the vocabulary as needed"""
+        return self._write_temples(temples, grow_vocab=True)
+    
+    def delete_temples(self, temple_ids: List[int]) -> int:
+        """Remove temples from the index, returning how many were present"""
+        with self._update_lock:
+            present = [temple_id for temple_id in set(temple_ids) if temple_id in self.temples_data]
+            if not present:
+                return 0
+            with self._lock.write():
+                self._remove_vectors(present)
+                if self.catalog is None:
+                    self.temples_data.delete(present)
+                else:
+                    self.catalog.apply_delete(present)
+                self._patch_geo(present)
+                self._advance_version(sorted(present))
+            return len(present)
+    
+    def _write_temples(self, temples: List[dict], grow_vocab: bool) -> Dict:
+        # Within one batch the last record for an id wins
+        temples = list({temple['id']: temple for temple in temples}.values())
+        if not temples:
+            return {'inserted': 0, 'updated': 0, 'new_words': 0}
+        
+        with self._update_lock:
+            ids = np.array([temple['id'] for temple in temples], dtype=np.int64)
+            existing = [temple_id for temple_id in ids.tolist() if temple_id in self.temples_data]
+            if existing and self.index_type == 'hnsw':
+                raise ValueError("HNSW indexes cannot remove vectors; rebuild the index to update or delete temples")
+            if not self.index.is_trained:
+                raise ValueError(f"The {self.index_type} index must be trained on a sample of the dataset "
+                                 f"before temples are added; call train() first")
+            
+            # Embedding is the slow part and happens before searches are blocked
+            texts = [get_temple_text_for_embedding(temple) for temple in temples]
+            new_words = self.embedding_model.extend_vocab(texts) if grow_vocab else 0
+            embeddings = self._embed_documents(texts)
+            
+            with self._lock.write():
+                self._ensure_writable()
+                self._write_vectors(ids, embeddings, existing)
+                if self.catalog is None:
+                    self.temples_data.extend(temples)
+                else:
+                    self.catalog.apply_upsert(temples)
+                self._patch_geo(ids, temples)
+                self._advance_version(ids.tolist(), texts)
+        
+        return {'inserted': len(temples) - len(existing), 'updated': len(existing), 'new_words': new_words}
+    
+    @property
+    def is_sparse(self) -> bool:
+        return isinstance(self.index, SparseVectorIndex)
+    
+    def _embed_documents(self, texts: List[str]):
+        """Document vectors in the form the index stores: CSR rows for the sparse index, dense otherwise"""
+        if self.is_sparse:
+            return self.embedding_model.embed_sparse(texts)
+        return self.embedding_model.embed_batch(texts)
+    
+    def _embed_queries(self, queries: List[str]):
+        """Query vectors matching _embed_documents; sparse ones are cheap enough to skip the query cache"""
+        if self.is_sparse:
+            return self.embedding_model.embed_sparse([normalize_query_text(query) for query in queries])
+        return self.embedding_model.embed_queries(queries)
+    
+    def _advance_version(self, temple_ids: List[int], texts: Optional[List[str]] = None):
+        """Fold a write into the version hash; texts is None for deletes. Callers hold the write lock"""
+        if texts is None:
+            self._version_digest.update(b'\0delete')
+            texts = [''] * len(temple_ids)
+        _hash_temples(self._version_digest, temple_ids, texts)
+        self.version = self._version_digest.hexdigest()
+    
+    def _is_flat(self) -> bool:
+        """Whether the index is flat storage behind an IndexIDMap2"""
+        return isinstance(self.index, faiss.IndexIDMap2) and isinstance(base_index(self.index), faiss.IndexFlat)
+    
+    def _write_vectors(self, ids: np.ndarray, embeddings, existing: List[int]):
+        """Add vectors by temple id, replacing the ones of existing temples; callers hold the write lock"""
+        if self._is_flat():
+            # Vectors already in flat storage, live or awaiting removal, are overwritten where they are
+            index = base_index(self.index)
+            stored_ids = faiss.rev_swig_ptr(self.index.id_map.data(), self.index.ntotal)
+            vectors = faiss.rev_swig_ptr(index.get_xb(), index.ntotal * index.d).reshape(index.ntotal, index.d)
+            rows = np.flatnonzero(np.isin(stored_ids, ids))
+            if len(rows):
+                replaced = stored_ids[rows]
+                position = {temple_id: offset for offset, temple_id in enumerate(ids.tolist())}
+                vectors[rows] = embeddings[[position[temple_id] for temple_id in replaced.tolist()]]
+                self._deferred_removals = np.setdiff1d(self._deferred_removals, replaced)
+                added = ~np.isin(ids, replaced)
+                ids, embeddings = ids[added], embeddings[added]
+        elif existing:
+            self._remove_vectors(existing)
+        if len(ids):
+            self.index.add_with_ids(embeddings, ids)
+    
+    def _remove_vectors(self, temple_ids: List[int]):
+        """Drop vectors by temple id; callers hold the write lock"""
+        if self.index_type == 'hnsw':
+            raise ValueError("HNSW indexes cannot remove vectors; rebuild the index to update or delete temples")
+        ids = np.array(temple_ids, dtype=np.int64)
+        if self._is_flat():
+            self._deferred_removals = np.union1d(self._deferred_removals, ids)
+            if len(self._deferred_removals) >= MAX_DEFERRED_REMOVALS:
+                self._flush_removals()
+            return
+        self._ensure_writable()
+        if self.is_sparse:
+            self.index.remove_ids(ids)
+            return
+        # IVF hashtable removal needs an explicit id array; the id map scans with a hashed batch
+        selector = faiss.IDSelectorArray(ids) if isinstance(self.index, faiss.IndexIVF) else faiss.IDSelectorBatch(ids)
+        self.index.remove_ids(selector)
+    
+    def _flush_removals(self):
+        """Drop every deferred vector with one remove_ids; callers hold the write lock"""
+        if len(self._deferred_removals):
+            self._ensure_writable()
+            self.index.remove_ids(faiss.IDSelectorBatch(self._deferred_removals))
+            self._deferred_removals = np.empty(0, dtype=np.int64)
+    
+    def _search_index(self, query_embeddings, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """index.search over every live vector, skipping ones awaiting removal; callers hold the read lock"""
+        deferred = self._deferred_removals
+        if not len(deferred):
+            return self.index.search(query_embeddings, k)
+        # Fetch enough that k remain after the skipped ids, then move those to the end of each row
+        scores, indices = self.index.search(query_embeddings, min(k + len(deferred), self.index.ntotal))
+        skipped = np.isin(indices, deferred)
+        order = np.argsort(skipped, axis=1, kind='stable')[:, :k]
+        scores, indices = np.take_along_axis(scores, order, 1), np.take_along_axis(indices, order, 1)
+        indices[np.take_along_axis(skipped, order, 1)] = -1
+        return scores, indices
+    
+    @property
+    def num_vectors(self) -> int:
+        """Vectors of live temples in the index"""
+        return self.index.ntotal - len(self._deferred_removals)
+    
+    def _ensure_writable(self):
+        """Swap a read-only memory-mapped index for a private in-memory copy before mutating it"""
+        if self._mmap_path:
+            self.index = faiss.read_index(self._mmap_path)
+            self._mmap_path = None
+            self._prepare_index()
+    
+    def _prepare_index(self):
+        """Apply query-time parameters to the underlying approximate index"""
+        index = base_index(self.index)
+        if isinstance(index, faiss.IndexIVF):
+            index.nprobe = self.nprobe
+        elif isinstance(index, faiss.IndexHNSW):
+            index.hnsw.efSearch = self.ef_search
+    
+    def configure_search(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        """Change the recall/latency tradeoff of an approximate index without rebuilding it"""
+        if nprobe is not None:
+            self.nprobe = nprobe
+        if ef_search is not None:
+            self.ef_search = ef_search
+        self._prepare_index()
+    
+    def _search_params(self, selector) -> faiss.SearchParameters:
+        """SearchParameters of the type the current index expects, restricted to selector"""
+        index = base_index(self.index)
+        if isinstance(index, faiss.IndexIVF):
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self.nprobe)
+        if isinstance(index, faiss.IndexHNSW):
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=self.ef_search)
+        return faiss.SearchParameters(sel=selector)
     
-    def _build_index(self):
-        """Build FAISS index from temple data"""
-        temples = get_all_temples()
-        embeddings = []
+    def _geo(self) -> GeoIndex:
+        """Spatial index of live temples, built on first use after a change; callers hold a lock"""
+        geo = self._geo_index
+        if geo is None:
+            with self._geo_lock:
+                geo = self._geo_index
+                if geo is None:
+                    geo = GeoIndex(*self.temples_data.located())
+                    self._geo_index = geo
+        return geo
+    
+    def _patch_geo(self, removed_ids, temples: List[dict] = ()):
+        """Patch a built spatial index for a write, or drop it when a rebuild is due; callers hold the write lock"""
+        if self._geo_index is not None:
+            located = [temple for temple in temples if 'location' in temple]
+            self._geo_index = self._geo_index.updated(
+                removed_ids, [temple['id'] for temple in located],
+                [temple['location']['lat'] for temple in located], [temple['location']['lng'] for temple in located],
+            )
+    
+    def nearby(self, lat: float, lng: float, radius_km: Optional[float] = None,
+               limit: int = 10) -> List[Tuple[dict, float]]:
+        """Nearest temples to a point with their distance in km, optionally within radius_km"""
+        with self._lock.read():
+            ids, distances = self._geo().nearest(lat, lng, limit, radius_km)
+            return self._collect_results(distances, ids)
+    
+    def filter_ids(self, filters: dict) -> Optional[np.ndarray]:
+        """Sorted ids of temples passing the facet and radius filters; None when no such filter applies"""
+        with self._lock.read():
+            return self._filter_candidates(filters)
+    
+    def _filter_candidates(self, filters: dict) -> Optional[np.ndarray]:
+        """Intersect facet and radius id sets for the given filters; None means no such filter applies"""
+        id_sets = []
+        for facet in FILTER_FACETS:
+            value = filters.get(facet)
+            if value:
+                if not isinstance(value, str):
+                    raise ValueError(f"Filter '{facet}' must be a string")
+                id_sets.append(self.temples_data.facet_ids(facet, value))
+        if filters.get(NEAR_FILTER):
+            lat, lng, radius_km = parse_near_filter(filters[NEAR_FILTER])
+            ids, _ = self._geo().within(lat, lng, radius_km)
+            id_sets.append(np.sort(ids))
+        return intersect_sorted(id_sets)
+    
+    def save(self, index_dir: str):
+        """Write the index, id mapping and vocabulary to a versioned artifact directory"""
+        os.makedirs(index_dir, exist_ok=True)
+        # Writers wait until the vectors, ids and vocabulary are all taken from the same state, and
+        # artifacts hold live vectors only
+        with self._update_lock:
+            if len(self._deferred_removals):
+                with self._lock.write():
+                    self._flush_removals()
+            with self._lock.read():
+                if self.is_sparse:
+                    self.index.save(os.path.join(index_dir, SPARSE_INDEX_FILENAME))
+                else:
+                    faiss.write_index(self.index, os.path.join(index_dir, INDEX_FILENAME))
+                temple_ids = self.temple_ids
+                temples = self.temples_data.live_records()
+            model_metadata = self.embedding_model.metadata()
+        
+        metadata = {
+            'format_version': INDEX_FORMAT_VERSION,
+            'dataset_fingerprint': dataset_fingerprint(temples),
+            'index_type': self.index_type,
+            'temple_ids': temple_ids,
+            **model_metadata,
+        }
+        # Write metadata last and atomically so a half-written artifact is never loaded
+        metadata_path = os.path.join(index_dir, METADATA_FILENAME)
+        with open(metadata_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(metadata, f)
+        os.replace(metadata_path + '.tmp', metadata_path)
+    
+    def _load_index(self, index_dir: str, temples: TempleRows, mmap: bool = True) -> bool:
+        """Load a prebuilt artifact for the stored records, returning False if it is missing or stale"""
+        metadata_path = os.path.join(index_dir, METADATA_FILENAME)
+        if not os.path.exists(metadata_path):
+            return False
         
-        for temple in temples:
-            text = get_temple_text_for_embedding(temple)
-            embedding = self.embedding_model.embed_text(text)
-            embeddings.append(embedding)
-            self.temple_ids.append(temple['id'])
-            self.temples_data.append(temple)
+        with open(metadata_path, encoding='utf-8') as f:
+            metadata = json.load(f)
+        if metadata.get('format_version') != INDEX_FORMAT_VERSION:
+            print(f"Ignoring index artifact in {index_dir}: unsupported format version")
+            return False
+        self.index_type = metadata.get('index_type', 'flat')
+        index_path = os.path.join(index_dir, SPARSE_INDEX_FILENAME if self.index_type == 'sparse' else INDEX_FILENAME)
+        if not os.path.exists(index_path):
+            return False
+        digest = _fingerprint_digest(temples)
+        if metadata.get('dataset_fingerprint') != digest.hexdigest():
+            print(f"Ignoring index artifact in {index_dir}: it was built from a different dataset "
+                  f"(serve the file it was built from with TEMPLE_DATA_PATH)")
+            return False
+        embedding_model = create_embedding(
+            metadata.get('embedding', 'vocab'),
+            dimension=metadata['dimension'],
+            vocab=metadata.get('vocab'),
+            noise_scale=metadata.get('noise_scale', 0.0),
+        )
+        if embedding_model.model_id != metadata.get('model_id'):
+            print(f"Ignoring index artifact in {index_dir}: embedding model has changed since it was built")
+            return False
         
-        # Create FAISS index
-        embeddings_array = np.array(embeddings)
-        dimension = embeddings_array.shape[1]
+        # Memory-mapped loading lets every worker share one copy of the index pages. IVF
+        # inverted lists take IO_FLAG_MMAP; flat code storage needs IO_FLAG_MMAP_IFC (faiss 1.8
+        # and later), and the two flags cannot be combined for IVF indexes
+        if self.index_type == 'sparse':
+            self.index = SparseVectorIndex.load(index_path)
+        else:
+            io_flags = 0
+            if mmap and self.index_type in ('flat', 'hnsw') and not hasattr(faiss, 'IO_FLAG_MMAP_IFC'):
+                # IO_FLAG_MMAP alone would quietly read flat codes into memory anyway
+                print(f"faiss {faiss.__version__} cannot memory-map {self.index_type} indexes (needs faiss 1.8 "
+                      f"or later); loading {index_path} into memory")
+                mmap = False
+            if mmap:
+                io_flags = faiss.IO_FLAG_MMAP_IFC if self.index_type in ('flat', 'hnsw') else faiss.IO_FLAG_MMAP
+                io_flags |= faiss.IO_FLAG_READ_ONLY
+            self.index = faiss.read_index(index_path, io_flags)
+            if mmap:
+                self._mmap_path = index_path
         
-        self.index = faiss.IndexFlatIP(dimension)  # Inner product for cosine similarity
-        self.index.add(embeddings_array)
+        self.embedding_model = embedding_model
+        self._version_digest = digest
+        self.version = digest.hexdigest()
+        return True
     
     def search(self, query: str, top_k: int = 5) -> List[Tuple[dict, float]]:
         """Search for temples similar to the query"""
@@ -98,50 +560,204 @@ class TempleVectorStore:
             return []
         
         # Create embedding for query
-        query_embedding = self.embedding_model.embed_text(query)
-        query_embedding = query_embedding.reshape(1, -1)
+        with stage_timer('embedding'):
+            query_embedding = self._embed_queries([query])
         
         # Search in FAISS index
-        scores, indices = self.index.search(query_embedding, min(top_k, len(self.temples_data)))
-        
-        results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx < len(self.temples_data):
-                temple = self.temples_data[idx]
-                results.append((temple, float(score)))
-        
-        return results
+        with self._lock.read():
+            return self._search_all(query_embedding, top_k)
     
     def search_with_filters(self, query: str, filters: dict = None, top_k: int = 5) -> List[Tuple[dict, float]]:
         """Search with additional filters"""
-        # First get vector search results
-        vector_results = self.search(query, top_k * 2)  # Get more results to filter
-        
         if not filters:
-            return vector_results[:top_k]
+            return self.search(query, top_k)
         
-        # Apply filters
-        filtered_results = []
-        for temple, score in vector_results:
-            include = True
-            
-            if filters.get('state') and temple['state'].lower() != filters['state'].lower():
-                include = False
-            
-            if filters.get('deity') and temple['deity'].lower() != filters['deity'].lower():
-                include = False
-            
-            if filters.get('era') and temple['era'].lower() != filters['era'].lower():
-                include = False
+        with stage_timer('embedding'):
+            query_embedding = self._embed_queries([query])
+        with self._lock.read():
+            with stage_timer('filtering'):
+                candidates = self._filter_candidates(filters)
+            if candidates is None:
+                return self._search_all(query_embedding, top_k)
+            return self._search_candidates(query_embedding, candidates, top_k)
+    
+    def _search_all(self, query_embedding: np.ndarray, top_k: int) -> List[Tuple[dict, float]]:
+        """Top-k over the whole index for a one-row query matrix; callers hold the read lock"""
+        top_k = min(top_k, self.num_vectors)
+        with stage_timer('faiss_search'):
+            scores, indices = self._search_index(query_embedding, top_k)
+        return self._checked_results('unfiltered', scores[0], indices[0], top_k)
+    
+    def _search_candidates(self, query_embedding: np.ndarray, candidates: np.ndarray,
+                           top_k: int) -> List[Tuple[dict, float]]:
+        """Exact top-k among candidate temple ids for a one-row query matrix; callers hold the read lock"""
+        if len(candidates) == 0:
+            return []
+        top_k = min(top_k, len(candidates))
+        
+        if self.is_sparse:
+            with stage_timer('faiss_search'):
+                scores, indices = self.index.search(query_embedding, top_k, candidates)
+            return self._checked_results('prefilter_sparse', scores[0], indices[0], top_k)
+        
+        if len(candidates) <= PREFILTER_EXACT_LIMIT:
+            # Score only the candidate vectors, so cost tracks the size of the filtered set
+            with stage_timer('faiss_search'):
+                scores = self.index.reconstruct_batch(candidates) @ query_embedding[0]
+                best = np.argpartition(-scores, top_k - 1)[:top_k]
+                best = best[np.argsort(-scores[best], kind='stable')]
+            return self._checked_results('prefilter_exact', scores[best], candidates[best], top_k)
+        
+        # Large candidate sets: let FAISS skip everything outside the selector during the scan
+        with stage_timer('faiss_search'):
+            params = self._search_params(faiss.IDSelectorBatch(candidates))
+            scores, indices = self.index.search(query_embedding, top_k, params=params)
+        return self._checked_results('prefilter_selector', scores[0], indices[0], top_k)
+    
+    def _checked_results(self, path: str, scores: np.ndarray, indices: np.ndarray,
+                         expected: int) -> List[Tuple[dict, float]]:
+        """
+        _collect_results, counting searches that came back short although expected temples qualified
+        Approximate indexes probing too few lists under a selector are the usual cause
+        """
+        with stage_timer('collect_results'):
+            results = self._collect_results(scores, indices)
+        if len(results) < expected:
+            short_results.inc(path)
+        return results
+    
+    def search_batch(self, queries: List[str], filters_list: List[Optional[dict]] = None,
+                     top_ks: List[int] = None) -> List[List[Tuple[dict, float]]]:
+        """
+        Search many queries at once, returning one result list per query in order
+        Unfiltered queries share a single index.search call; filtered ones use their own id sets
+        """
+        if not queries:
+            return []
+        filters_list = filters_list or [None] * len(queries)
+        top_ks = top_ks or [5] * len(queries)
+        with stage_timer('embedding'):
+            query_embeddings = self._embed_queries(queries)
+        results = [[] for _ in queries]
+        
+        with self._lock.read():
+            unfiltered = []
+            for i, filters in enumerate(filters_list):
+                with stage_timer('filtering'):
+                    candidates = self._filter_candidates(filters) if filters else None
+                if candidates is None:
+                    unfiltered.append(i)
+                else:
+                    results[i] = self._search_candidates(query_embeddings[i:i + 1], candidates, top_ks[i])
             
-            if include:
-                filtered_results.append((temple, score))
+            if unfiltered and self.num_vectors:
+                k = min(max(top_ks[i] for i in unfiltered), self.num_vectors)
+                with stage_timer('faiss_search'):
+                    scores, indices = self._search_index(query_embeddings[unfiltered], k)
+                for row, i in enumerate(unfiltered):
+                    top_k = min(top_ks[i], k)
+                    results[i] = self._checked_results('unfiltered', scores[row][:top_k], indices[row][:top_k], top_k)
         
-        return filtered_results[:top_k]
+        return results
+    
+    def _collect_results(self, scores: np.ndarray, indices: np.ndarray) -> List[Tuple[dict, float]]:
+        """Pair temple ids with records, skipping the -1 padding FAISS uses for missing hits"""
+        results = []
+        for score, temple_id in zip(scores, indices):
+            temple = self.temples_data.get(int(temple_id)) if temple_id >= 0 else None
+            if temple is not None:
+                results.append((temple, float(score)))
+        
+        return results
+
+# The global vector store is built on first use, or by warm_up when the API starts, instead of at
+# import time; set TEMPLE_INDEX_DIR to serve a prebuilt artifact and TEMPLE_DATA_PATH to the dataset
+# it was built from (see build_index.py)
+_build_lock = threading.Lock()
 
-# Global vector store instance
-vector_store = TempleVectorStore()
+def get_vector_store() -> TempleVectorStore:
+    """The global vector store, building it if nobody has yet; concurrent callers wait for one build"""
+    # Read through globals(): the name is unbound until the first build, and callers may replace it
+    store = globals().get('vector_store')
+    if store is None:
+        with _build_lock:
+            store = globals().get('vector_store')
+            if store is None:
+                store = TempleVectorStore(index_dir=os.environ.get('TEMPLE_INDEX_DIR'))
+                globals()['vector_store'] = store
+    return store
+
+def __getattr__(name: str):
+    # `vector_store.vector_store` from other modules builds the store on first access
+    if name == 'vector_store':
+        return get_vector_store()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def is_ready() -> bool:
+    """Whether the global vector store has been built"""
+    return globals().get('vector_store') is not None
+
+def warm_up() -> float:
+    """Build the global vector store and run one search through it, returning the seconds taken"""
+    start = time.perf_counter()
+    store = get_vector_store()
+    store.search('temple', 1)
+    return time.perf_counter() - start
+
+def _built_store() -> TempleVectorStore:
+    # Gauges read this so a scrape never triggers a build; the KeyError just omits them until then
+    return globals()['vector_store']
+
+# Sizes read at scrape time, so they follow upserts, deletes and rebuilds of the global store
+registry.gauge('temple_index_vectors', 'Vectors in the served index', lambda: _built_store().num_vectors)
+registry.gauge(
+    'temple_index_bytes', 'Bytes of vector data in the served index', lambda: index_nbytes(_built_store().index)
+)
+registry.gauge(
+    'temple_store_bytes', 'Bytes held by the columnar temple records', lambda: _built_store().temples_data.nbytes
+)
+registry.observed_counter(
+    'temple_query_embedding_cache_hits_total', 'Query embeddings served from the LRU cache',
+    lambda: _built_store().embedding_model.query_cache.hits
+)
+registry.observed_counter(
+    'temple_query_embedding_cache_misses_total', 'Query embeddings computed because the LRU cache missed',
+    lambda: _built_store().embedding_model.query_cache.misses
+)
+registry.gauge(
+    'temple_query_embedding_cache_entries', 'Query embeddings held by the LRU cache',
+    lambda: _built_store().embedding_model.query_cache.stats()['size']
+)
+
+def embedding_cache_stats() -> Dict:
+    """Query embedding cache counters of the served store; empty until the store is built"""
+    store = globals().get('vector_store')
+    if store is None:
+        return {}
+    return store.embedding_model.query_cache.stats()
+
+def index_version() -> str:
+    """Version of the served index; changes whenever temples are added, updated or deleted"""
+    return get_vector_store().version
 
 def search_temples_vector(query: str, filters: dict = None, top_k: int = 5) -> List[Tuple[dict, float]]:
     """Main function to search temples using vector similarity"""
-    return vector_store.search_with_filters(query, filters, top_k)
+    return get_vector_store().search_with_filters(query, filters, top_k)
+
+def search_temples_vector_batch(queries: List[str], filters_list: List[Optional[dict]] = None,
+                                top_ks: List[int] = None) -> List[List[Tuple[dict, float]]]:
+    """Search several queries with one batched index call"""
+    return get_vector_store().search_batch(queries, filters_list, top_ks)
+
+def find_temples_nearby(lat: float, lng: float, radius_km: Optional[float] = None,
+                        limit: int = 10) -> List[Tuple[dict, float]]:
+    """Nearest temples to a point in the global vector store"""
+    return get_vector_store().nearby(lat, lng, radius_km, limit)
+
+def upsert_temples(temples: List[dict]) -> Dict:
+    """Insert or replace temples in the global vector store"""
+    return get_vector_store().upsert_temples(temples)
+
+def delete_temples(temple_ids: List[int]) -> int:
+    """Remove temples from the global vector store"""
+    return get_vector_store().delete_temples(temple_ids)